@@ -0,0 +1,59 @@
+"""
+Benchmark for the binary signature encoding.
+
+Compares size and round-trip time (encode + decode) of ring signatures stored
+with pickle and with the binary format of the encoding module, with plain and
+compressed points, for every ring size.
+
+Usage:
+    python -m benchmarks.encoding [--ring-sizes 2 16 128] [--repeat 20]
+"""
+import argparse
+import pickle
+import time
+
+from py_ecc.bn128 import multiply, G1
+
+from nr_verify.schemas import encoding
+from nr_verify.schemas.node_ring_schnorr import NodeRingSchnorr
+from nr_verify.schemas.util import randsn
+
+
+def round_trip(encode, decode, signature, repeat: int):
+    """
+    Returns the encoded size and the mean round-trip time of `signature`.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        data = encode(signature)
+        decode(data)
+    return len(data), (time.perf_counter() - start) / repeat
+
+
+def main():
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ring-sizes", type=int, nargs="+", default=[2, 16, 128])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    formats = {
+        "pickle": (pickle.dumps, pickle.loads),
+        "binary": (encoding.encode_ring_signature, encoding.decode_ring_signature),
+        "compressed": (lambda signature: encoding.encode_ring_signature(signature, True),
+                       encoding.decode_ring_signature),
+    }
+    scheme = NodeRingSchnorr()
+    print(f"{'ring':>6} {'format':>11} {'size [B]':>10} {'round trip [ms]':>16}")
+    for ring_size in args.ring_sizes:
+        ring = [multiply(G1, randsn()) for _ in range(ring_size - 1)]
+        signature = scheme.nr_sign(randsn(), 0, ring)
+        for name, (encode, decode) in formats.items():
+            size, seconds = round_trip(encode, decode, signature, args.repeat)
+            print(f"{ring_size:>6} {name:>11} {size:>10} {1000 * seconds:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark for fixed-base G1 multiplication.
+
+Signing over a ring of n members needs about 3n + 3 generator multiplications
+(public key, ephemeral randomness and inner Schnorr signatures). The benchmark
+times that workload with the generic `py_ecc` double-and-add and with the
+precomputed G1 table, and prints the speedup per ring size.
+
+Usage:
+    python -m benchmarks.fixed_base [--ring-sizes 1 4 16 64] [--window 6] [--table PATH]
+"""
+import argparse
+import os
+import time
+
+from py_ecc.bn128 import multiply, G1
+
+from nr_verify.schemas.fixed_base import FixedBaseTable
+from nr_verify.schemas.util import randsn
+
+
+def generator_multiplications(ring_size: int) -> int:
+    """
+    Number of generator multiplications performed by `nr_sign` for a ring of the given size.
+    """
+    return 3 * ring_size + 3
+
+
+def time_calls(func, scalars) -> float:
+    """
+    Returns wall time in seconds of calling `func` on every scalar.
+    """
+    start = time.perf_counter()
+    for scalar in scalars:
+        func(scalar)
+    return time.perf_counter() - start
+
+
+def build_table(window: int, path: str):
+    """
+    Builds (or loads, when `path` exists) a G1 table and reports how long it took.
+    """
+    start = time.perf_counter()
+    if path and os.path.exists(path):
+        table = FixedBaseTable.load(path)
+        action = "loaded"
+    else:
+        table = FixedBaseTable(window=window)
+        action = "built"
+        if path:
+            table.save(path)
+    print(f"G1 table (window {table.window}) {action} in {time.perf_counter() - start:.3f}s")
+    return table
+
+
+def main():
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ring-sizes", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--window", type=int, default=6)
+    parser.add_argument("--table", default=None, help="load the table from / persist it to this file")
+    args = parser.parse_args()
+
+    table = build_table(args.window, args.table)
+
+    print(f"{'ring':>6} {'mults':>6} {'generic [s]':>12} {'table [s]':>10} {'speedup':>8}")
+    for ring_size in args.ring_sizes:
+        scalars = [randsn() for _ in range(generator_multiplications(ring_size))]
+        generic = time_calls(lambda scalar: multiply(G1, scalar), scalars)
+        fixed = time_calls(table.multiply, scalars)
+        print(f"{ring_size:>6} {len(scalars):>6} {generic:>12.4f} {fixed:>10.4f} {generic / fixed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Gas and throughput benchmark of the Solidity verifiers.
+
+Compiles `contracts/*.sol` with solc, reusing the JSON build artifact `--artifacts` (e.g. the
+contracts.json of the deployment script) while the sources are unchanged. Deploys SchnorrSignature
+and SchnorrSignatureNodeRing into an in-process py-evm chain (eth-tester) and, for every ring size,
+verifies one `nr_sign` signature (deterministic nonces, ring members derived from a fixed seed) on
+chain and in Python.
+
+Reported per case, as JSON (`--output`, stdout by default):
+    gas: gas used by a transaction calling verify, including the 21000 base cost and the calldata.
+    execution_gas: gas minus the base cost and the calldata cost (EIP-2028: 16 per non-zero,
+        4 per zero byte), i.e. what the contract code itself spends. Calls so cheap that the
+        calldata floor price of EIP-7623 applies are charged the floor instead.
+    calldata_bytes, calldata_gas: size and cost of the ABI-encoded call.
+    evm_seconds: minimum wall time of an `eth_call` over `--repeat` runs (py-evm, not a real node).
+    python_seconds: minimum wall time of the corresponding Python verification.
+    valid: the verdict of the contract, which must match the Python one.
+
+Usage:
+    python -m benchmarks.gas [--ring-sizes 1 2 4 8 16 32] [--contracts-dir ../contracts]
+        [--solc-version 0.8.18] [--artifacts contracts.json] [--repeat 3] [--output results.json]
+"""
+import argparse
+import importlib.metadata
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from eth_tester import EthereumTester, PyEVMBackend
+from web3 import Web3
+from web3.providers.eth_tester import EthereumTesterProvider
+
+from nr_verify.deployment.async_client import ring_call_data, schnorr_call_data
+from nr_verify.deployment.compiler import compile_contracts
+from nr_verify.schemas import curve
+from nr_verify.schemas.node_ring_schnorr import NodeRingSchnorr
+from nr_verify.schemas.schnorr_signature import SchnorrSignature
+
+SEED = 0x6A5
+DEFAULT_RING_SIZES = [1, 2, 4, 8, 16, 32]
+DEFAULT_CONTRACTS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "contracts")
+DEFAULT_SOLC_VERSION = "0.8.18"
+DEFAULT_GAS_LIMIT = 1_000_000_000
+CONTRACT_FILES = ["EllipticCurve.sol", "SchnorrSignature.sol", "SchnorrSignatureNodeRing.sol"]
+
+BASE_GAS = 21000
+_PRIVATE_KEY = 0x1234567890ABCDEF
+_MESSAGE = 0xC0FFEE
+
+
+def calldata_gas(data: bytes) -> int:
+    """
+    Returns the intrinsic gas of call data: 16 per non-zero and 4 per zero byte.
+    """
+    zeros = data.count(0)
+    return 4 * zeros + 16 * (len(data) - zeros)
+
+
+def load_artifacts(contracts_dir: str = None, solc_version: str = DEFAULT_SOLC_VERSION, artifacts: str = None):
+    """
+    Returns {contract name: {'bytecode', 'abi'}}, compiled or taken from the build artifact `artifacts`.
+    """
+    contracts_dir = contracts_dir or DEFAULT_CONTRACTS_DIR
+    return compile_contracts([os.path.join(contracts_dir, name) for name in CONTRACT_FILES], solc_version, artifacts)
+
+
+def local_chain(gas_limit: int = DEFAULT_GAS_LIMIT) -> Web3:
+    """
+    Returns a Web3 instance on a fresh in-process py-evm chain with the given block gas limit.
+    """
+    backend = PyEVMBackend(genesis_parameters=PyEVMBackend.generate_genesis_params({"gas_limit": gas_limit}))
+    return Web3(EthereumTesterProvider(EthereumTester(backend)))
+
+
+def deploy(w3: Web3, artifact: dict) -> str:
+    """
+    Deploys a compiled contract from the first test account and returns its address.
+    """
+    transaction = w3.eth.send_transaction({"from": w3.eth.accounts[0], "data": "0x" + artifact["bytecode"]})
+    return w3.eth.wait_for_transaction_receipt(transaction).contractAddress
+
+
+def _min_time(func, repeat: int):
+    # Returns the result of `func` and its minimum wall time over `repeat` runs
+    best = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def measure(w3: Web3, address: str, data: bytes, python_verify, repeat: int) -> dict:
+    """
+    Measures one verify call on chain and its Python counterpart.
+    """
+    transaction = {"from": w3.eth.accounts[0], "to": address, "data": "0x" + data.hex()}
+    receipt = w3.eth.wait_for_transaction_receipt(w3.eth.send_transaction(transaction))
+    if not receipt.status:
+        raise AssertionError(f"Verify transaction to {address} failed")
+    gas = receipt.gasUsed
+    result, evm_seconds = _min_time(lambda: w3.eth.call(transaction), repeat)
+    expected, python_seconds = _min_time(python_verify, repeat)
+    valid = bool(int.from_bytes(bytes(result), "big"))
+    if valid != bool(expected):
+        raise AssertionError(f"Contract verdict {valid} differs from the Python verdict {expected}")
+    return {
+        "gas": gas,
+        "execution_gas": gas - BASE_GAS - calldata_gas(data),
+        "calldata_bytes": len(data),
+        "calldata_gas": calldata_gas(data),
+        "evm_seconds": evm_seconds,
+        "python_seconds": python_seconds,
+        "valid": valid,
+    }
+
+
+def cases(ring_sizes):
+    """
+    Yields benchmark cases (name, ring_size, contract, call data, Python verification).
+    """
+    public_key, signature = SchnorrSignature(deterministic=True).sign(_PRIVATE_KEY, _MESSAGE)
+    yield ("verify", None, "SchnorrSignature", schnorr_call_data(public_key, _MESSAGE, signature),
+           lambda: SchnorrSignature.verify(public_key, _MESSAGE, signature))
+
+    scheme = NodeRingSchnorr(deterministic=True)
+    for ring_size in ring_sizes:
+        rng = random.Random(SEED + ring_size)
+        ring = [curve.to_py_ecc(curve.multiply(curve.G1, rng.randrange(1, curve.CURVE_ORDER)))
+                for _ in range(ring_size - 1)]
+        ring_signature = scheme.nr_sign(_PRIVATE_KEY, _MESSAGE, ring)
+        yield ("nr_verify", ring_size, "SchnorrSignatureNodeRing", ring_call_data(_MESSAGE, ring_signature),
+               lambda ring_signature=ring_signature: scheme.nr_verify(_MESSAGE, ring_signature))
+
+
+def run(artifacts: dict, ring_sizes, repeat: int = 3, gas_limit: int = DEFAULT_GAS_LIMIT, log=None) -> dict:
+    # pylint: disable=R0913,R0917
+    """
+    Deploys the verifiers and measures every case.
+
+    Returns:
+        dict: {"meta": environment description, "results": one dict per case}
+    """
+    w3 = local_chain(gas_limit)
+    addresses = {name: deploy(w3, artifacts[name]) for name in ("SchnorrSignature", "SchnorrSignatureNodeRing")}
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": SEED,
+        "repeat": repeat,
+        "gas_limit": gas_limit,
+        "py_evm": importlib.metadata.version("py-evm"),
+    }
+    results = []
+    for name, ring_size, contract, data, python_verify in cases(ring_sizes):
+        result = {"name": name, "ring_size": ring_size,
+                  **measure(w3, addresses[contract], data, python_verify, repeat)}
+        results.append(result)
+        if log is not None:
+            print(f"{name:<10} {ring_size or '-':>5} {result['gas']:>12} gas {result['calldata_bytes']:>8} bytes "
+                  f"{1000 * result['evm_seconds']:>10.2f} ms evm {1000 * result['python_seconds']:>9.2f} ms python",
+                  file=log)
+    return {"meta": meta, "results": results}
+
+
+def main(argv=None) -> int:
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ring-sizes", type=int, nargs="+", default=DEFAULT_RING_SIZES)
+    parser.add_argument("--contracts-dir", default=DEFAULT_CONTRACTS_DIR)
+    parser.add_argument("--solc-version", default=DEFAULT_SOLC_VERSION)
+    parser.add_argument("--artifacts", help="JSON build artifact reused while the sources are unchanged")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--gas-limit", type=int, default=DEFAULT_GAS_LIMIT)
+    parser.add_argument("--output", default="-", help="result file, - for stdout")
+    args = parser.parse_args(argv)
+
+    artifacts = load_artifacts(args.contracts_dir, args.solc_version, args.artifacts)
+    results = run(artifacts, args.ring_sizes, args.repeat, args.gas_limit, log=sys.stderr)
+    results["meta"]["solc_version"] = args.solc_version
+    report = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(report)
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
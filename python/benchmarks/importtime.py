@@ -0,0 +1,107 @@
+"""
+Cold start benchmark of a verify-only run.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters (`--repeat` times, the
+fastest run counts) and parses the import time report written to stderr. Fails (exit code 1)
+if the cumulative import time of the module exceeds `--budget-ms`, or if any of the heavy
+dependencies a verification does not need (web3, solcx, dotenv, eth_abi, py_ecc.bn128, aiohttp)
+was imported.
+
+Reported as JSON (`--output`, stdout by default):
+    total_ms: cumulative import time of the module.
+    slowest: the `--top` modules with the largest self time, in ms.
+    forbidden: heavy modules that were imported anyway.
+    within_budget: whether total_ms <= budget_ms and nothing forbidden was imported.
+
+Usage:
+    python -m benchmarks.importtime [--module nr_verify.bulk_verify] [--budget-ms 150] [--repeat 5]
+        [--top 10] [--output results.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULE = "nr_verify.bulk_verify"
+DEFAULT_BUDGET_MS = 150.0
+FORBIDDEN_MODULES = ["web3", "solcx", "dotenv", "eth_abi", "py_ecc.bn128", "aiohttp"]
+
+_PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def parse_importtime(report: str) -> dict:
+    """
+    Parses a `-X importtime` report.
+
+    Returns:
+        dict: {module name: (self time, cumulative time)} in microseconds.
+    """
+    times = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        times[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return times
+
+
+def measure_import(module: str) -> dict:
+    """
+    Imports `module` in a fresh interpreter with `-X importtime` and returns the parsed report.
+    """
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_PACKAGE_DIR,
+                                                                            os.environ.get("PYTHONPATH")])))
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], env=environment,
+                             capture_output=True, text=True, check=True)
+    return parse_importtime(process.stderr)
+
+
+def run(module: str = DEFAULT_MODULE, budget_ms: float = DEFAULT_BUDGET_MS, repeat: int = 5, top: int = 10) -> dict:
+    """
+    Measures the cold import of `module` and checks it against the budget.
+    """
+    times = min((measure_import(module) for _ in range(max(repeat, 1))), key=lambda report: report[module][1])
+    total_ms = times[module][1] / 1000
+    forbidden = [name for name in FORBIDDEN_MODULES if name in times]
+    slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "module": module,
+        "python": sys.version.split()[0],
+        "total_ms": total_ms,
+        "budget_ms": budget_ms,
+        "modules": len(times),
+        "slowest": [{"module": name, "self_ms": self_us / 1000} for name, (self_us, _) in slowest],
+        "forbidden": forbidden,
+        "within_budget": total_ms <= budget_ms and not forbidden,
+    }
+
+
+def main(argv=None) -> int:
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", default="-", help="result file, - for stdout")
+    args = parser.parse_args(argv)
+
+    result = run(args.module, args.budget_ms, args.repeat, args.top)
+    report = json.dumps(result, indent=2)
+    if args.output != "-":
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+    else:
+        print(report)
+    print(f"{args.module}: {result['total_ms']:.1f} ms (budget {args.budget_ms:.1f} ms)"
+          + (f", imported {', '.join(result['forbidden'])}" if result["forbidden"] else ""), file=sys.stderr)
+    return 0 if result["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
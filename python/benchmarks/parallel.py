@@ -0,0 +1,57 @@
+"""
+Benchmark for the process pool mode of NodeRingSchnorr.
+
+Signs and verifies one signature per ring size serially and with a pool of
+`--workers` processes (all cores by default), checking that both modes produce
+the same signature (nonces are derived deterministically for that).
+
+Usage:
+    python -m benchmarks.parallel [--ring-sizes 256 1024] [--workers 8]
+"""
+import argparse
+import time
+
+from py_ecc.bn128 import multiply, G1
+
+from nr_verify.schemas.node_ring_schnorr import NodeRingSchnorr
+from nr_verify.schemas.util import randsn
+
+
+def sign_and_verify(scheme: NodeRingSchnorr, private_key: int, ring):
+    """
+    Signs message 0 over `ring` and verifies the signature.
+    Returns the signature and the signing and verification times.
+    """
+    start = time.perf_counter()
+    signature = scheme.nr_sign(private_key, 0, list(ring))
+    sign = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert scheme.nr_verify(0, signature)
+    return signature, sign, time.perf_counter() - start
+
+
+def main():
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ring-sizes", type=int, nargs="+", default=[256, 1024])
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    serial = NodeRingSchnorr(deterministic=True)
+    with NodeRingSchnorr(workers=args.workers, deterministic=True) as parallel:
+        print(f"workers: {parallel.pool.workers}")
+        print(f"{'ring':>6} {'sign [s]':>10} {'par. [s]':>10} {'verify [s]':>11} {'par. [s]':>10}")
+        for ring_size in args.ring_sizes:
+            ring = [multiply(G1, randsn()) for _ in range(ring_size - 1)]
+            private_key = randsn()
+            signature, sign, verify = sign_and_verify(serial, private_key, ring)
+            parallel_signature, parallel_sign, parallel_verify = sign_and_verify(parallel, private_key, ring)
+            assert parallel_signature == signature
+            print(f"{ring_size:>6} {sign:>10.4f} {parallel_sign:>10.4f} {verify:>11.4f} {parallel_verify:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark for batch verification of NodeRingSchnorr signatures.
+
+Compares verifying a queue of ring signatures one `nr_verify` call at a time
+with a single `nr_verify_batch` call, for every combination of ring size and
+batch size. All signatures of one run share a ring, which is the common case
+for a stable set of nodes.
+
+Usage:
+    python -m benchmarks.ring_batch [--ring-sizes 2 8] [--batch-sizes 4 16]
+"""
+import argparse
+import time
+
+from py_ecc.bn128 import multiply, G1
+
+from nr_verify.schemas.node_ring_schnorr import NodeRingSchnorr
+from nr_verify.schemas.util import randsn
+
+
+def sign_queue(scheme: NodeRingSchnorr, ring_size: int, batch_size: int):
+    """
+    Produces `batch_size` (message, signature) pairs over one ring with `ring_size` members.
+    """
+    ring = [multiply(G1, randsn()) for _ in range(ring_size - 1)]
+    private_key = randsn()
+    return [(message, scheme.nr_sign(private_key, message, list(ring))) for message in range(batch_size)]
+
+
+def main():
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ring-sizes", type=int, nargs="+", default=[2, 8])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 16])
+    args = parser.parse_args()
+
+    scheme = NodeRingSchnorr()
+    print(f"{'ring':>6} {'batch':>6} {'loop [s]':>10} {'batch [s]':>10} {'speedup':>8}")
+    for ring_size in args.ring_sizes:
+        for batch_size in args.batch_sizes:
+            items = sign_queue(scheme, ring_size, batch_size)
+
+            start = time.perf_counter()
+            assert all(scheme.nr_verify(message, signature) for message, signature in items)
+            loop = time.perf_counter() - start
+
+            start = time.perf_counter()
+            assert all(scheme.nr_verify_batch(items))
+            batch = time.perf_counter() - start
+
+            print(f"{ring_size:>6} {batch_size:>6} {loop:>10.4f} {batch:>10.4f} {loop / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Load test of the micro-batching verification service on localhost.
+
+Starts a VerificationService per batch size on a free localhost port (or uses the running service
+given with `--port`), opens `--clients` connections and sends `--requests` Schnorr signature
+records over them, at most `--window` unanswered per connection. Every `--invalid-every`-th
+signature is invalid (none with 0); invalid signatures make batches fall back to bisection.
+Prints throughput and client-side latency percentiles per batch size, followed by the metrics
+reported by the service; batch size 1 is the per-request baseline.
+
+Usage:
+    python -m benchmarks.service [--batch-sizes 1 16 64] [--max-delay-ms 2] [--clients 8]
+        [--requests 2000] [--window 64] [--invalid-every 100] [--workers N] [--port PORT]
+"""
+import argparse
+import asyncio
+import time
+
+from nr_verify import bulk_verify, verify_service
+from nr_verify.schemas.schnorr_signature import SchnorrSignature
+
+_DISTINCT_SIGNATURES = 100
+
+
+def make_records(count: int, invalid_every: int = 0) -> list:
+    """
+    Returns `count` encoded Schnorr records (cycling over a few distinct signatures) and their expected status.
+    """
+    records = []
+    for i in range(_DISTINCT_SIGNATURES):
+        public_key, signature = SchnorrSignature.sign(0x1000 + i, i)
+        valid = not invalid_every or (i + 1) % invalid_every
+        records.append((bulk_verify.encode_record(i if valid else i + 1, signature, public_key),
+                        verify_service.VALID if valid else verify_service.INVALID))
+    return [records[i % len(records)] for i in range(count)]
+
+
+async def _client(port: int, records: list, window: int, latencies: bulk_verify.LatencyHistogram):
+    slots = asyncio.Semaphore(window)
+
+    async def send(record, expected):
+        async with slots:
+            start = time.perf_counter()
+            assert await client.verify_record(record) == expected
+            latencies.add(time.perf_counter() - start)
+
+    async with await verify_service.VerificationClient.connect(verify_service.DEFAULT_HOST, port) as client:
+        await asyncio.gather(*[send(record, expected) for record, expected in records])
+
+
+async def load(port: int, records: list, clients: int, window: int) -> dict:
+    """
+    Sends the records over `clients` connections and returns throughput, latencies and the service metrics.
+    """
+    latencies = bulk_verify.LatencyHistogram()
+    start = time.perf_counter()
+    await asyncio.gather(*[_client(port, records[i::clients], window, latencies) for i in range(clients)])
+    seconds = time.perf_counter() - start
+    async with await verify_service.VerificationClient.connect(verify_service.DEFAULT_HOST, port) as client:
+        metrics = await client.metrics()
+    return {"seconds": seconds, "requests_per_second": len(records) / seconds,
+            "p50_ms": 1000 * latencies.percentile(0.5), "p99_ms": 1000 * latencies.percentile(0.99),
+            "metrics": metrics}
+
+
+async def run(args, records):
+    """
+    Runs the load test for every batch size, or once against the service on `args.port`.
+    """
+    print(f"{'batch':>6} {'req/s':>9} {'p50 [ms]':>9} {'p99 [ms]':>9} {'batches':>8} {'mean':>6}")
+    for batch_size in [None] if args.port else args.batch_sizes:
+        if args.port:
+            result = await load(args.port, records, args.clients, args.window)
+        else:
+            async with verify_service.VerificationService(batch_size, args.max_delay_ms / 1000,
+                                                          workers=args.workers) as service:
+                result = await load(service.address[1], records, args.clients, args.window)
+        metrics = result["metrics"]
+        print(f"{batch_size or '-':>6} {result['requests_per_second']:>9.1f} {result['p50_ms']:>9.2f} "
+              f"{result['p99_ms']:>9.2f} {metrics['batches']:>8} {metrics['mean_batch_size']:>6.1f}")
+
+
+def main():
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--max-delay-ms", type=float, default=1000 * verify_service.DEFAULT_MAX_DELAY)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--window", type=int, default=64)
+    parser.add_argument("--invalid-every", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--port", type=int, default=None, help="load an already running service instead")
+    args = parser.parse_args()
+    asyncio.run(run(args, make_records(args.requests, args.invalid_every)))
+
+
+if __name__ == "__main__":
+    main()
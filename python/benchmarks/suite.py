@@ -0,0 +1,185 @@
+"""
+Benchmark suite for the signature schemes.
+
+Times `sign`, `verify`, `nr_sign` and `nr_verify` per curve backend (the ring
+operations for every ring size, counting the signer), and the hashing
+primitives `encode_packed`, `keccak256` and `hash_to_scalar`. Inputs are derived
+from a fixed seed and signatures are made in deterministic mode, so runs are
+reproducible. Every case is calibrated to run for
+at least `--min-time` seconds per sample and is sampled `--repeat` times; the
+minimum time per call is the figure compared across runs.
+
+Results are written as JSON (`--output`, stdout by default). With `--baseline`,
+the results are compared with a previous run and every case slower than the
+baseline by more than `--threshold` is flagged; the exit code is then 1.
+
+Note that the bn128 backend runs on py_ecc and needs minutes for large rings.
+
+Usage:
+    python -m benchmarks.suite [--ring-sizes 1 4 16 64 256 1024] [--backends jacobian bn128]
+        [--repeat 5] [--min-time 0.2] [--output results.json] [--baseline baseline.json] [--threshold 0.25]
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+
+from nr_verify.schemas import curve, hashing
+from nr_verify.schemas.backends import BACKENDS
+from nr_verify.schemas.node_ring_schnorr import NodeRingSchnorr
+from nr_verify.schemas.schnorr_signature import SchnorrSignature
+from nr_verify.schemas.util import encode_packed, keccak256
+
+SEED = 0x5EED
+DEFAULT_RING_SIZES = [1, 4, 16, 64, 256, 1024]
+DEFAULT_THRESHOLD = 0.25
+
+_PRIVATE_KEY = 0x1234567890ABCDEF
+_MESSAGE = 0xC0FFEE
+
+
+def case_key(case: dict) -> str:
+    """
+    Returns the identifier of a benchmark case, e.g. "nr_verify/jacobian/64".
+    """
+    return "/".join(str(case[field]) for field in ("name", "backend", "ring_size") if case.get(field) is not None)
+
+
+def measure(func, repeat: int, min_time: float) -> dict:
+    """
+    Times `func` with at least `min_time` seconds per sample, `repeat` samples.
+
+    Returns:
+        dict: Calls per sample and the minimum and median seconds per call.
+    """
+    number = 1
+    while True:
+        elapsed = timeit.timeit(func, number=number)
+        if elapsed >= min_time:
+            break
+        number = max(number + 1, int(number * min(10.0, 1.2 * min_time / max(elapsed, 1e-9))))
+    samples = sorted([elapsed] + timeit.repeat(func, number=number, repeat=max(repeat - 1, 0)))
+    return {
+        "number": number,
+        "min": samples[0] / number,
+        "median": samples[len(samples) // 2] / number,
+    }
+
+
+def _hash_input():
+    # The input of a ring member hash: message, R_i, X_i and s_i
+    return [_MESSAGE] + [random.randrange(curve.CURVE_ORDER) for _ in range(5)]
+
+
+def cases(ring_sizes, backends):
+    """
+    Yields benchmark cases (name, backend, ring_size) with a prepared zero-argument function each.
+    """
+    random.seed(SEED)
+    values = _hash_input()
+    packed = encode_packed(*values)
+    yield ("encode_packed", None, None), lambda: encode_packed(*values)
+    yield ("keccak256", None, None), lambda: keccak256(packed)
+    yield ("hash_to_scalar", None, None), lambda: hashing.hash_to_scalar(*values)
+
+    for backend in backends:
+        schnorr = SchnorrSignature(backend, deterministic=True)
+        public_key, signature = schnorr.sign(_PRIVATE_KEY, _MESSAGE)
+        yield ("sign", backend, None), lambda schnorr=schnorr: schnorr.sign(_PRIVATE_KEY, _MESSAGE)
+        yield ("verify", backend, None), lambda schnorr=schnorr, public_key=public_key, signature=signature: (
+            schnorr.verify(public_key, _MESSAGE, signature))
+
+        scheme = NodeRingSchnorr(backend, deterministic=True)
+        for ring_size in ring_sizes:
+            random.seed(SEED + ring_size)
+            ring = [curve.to_py_ecc(curve.multiply(curve.G1, random.randrange(1, curve.CURVE_ORDER)))
+                    for _ in range(ring_size - 1)]
+            ring_signature = scheme.nr_sign(_PRIVATE_KEY, _MESSAGE, list(ring))
+            yield ("nr_sign", backend, ring_size), lambda scheme=scheme, ring=ring: (
+                scheme.nr_sign(_PRIVATE_KEY, _MESSAGE, list(ring)))
+            yield ("nr_verify", backend, ring_size), lambda scheme=scheme, ring_signature=ring_signature: (
+                scheme.nr_verify(_MESSAGE, ring_signature))
+
+
+def run(ring_sizes, backends, repeat: int, min_time: float, log=None) -> dict:
+    """
+    Runs every benchmark case.
+
+    Returns:
+        dict: {"meta": environment description, "results": one dict per case}
+    """
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "gmpy2": curve.gmpy2 is not None,
+        "seed": SEED,
+        "repeat": repeat,
+        "min_time": min_time,
+    }
+    results = []
+    for (name, backend, ring_size), func in cases(ring_sizes, backends):
+        result = {"name": name, "backend": backend, "ring_size": ring_size, **measure(func, repeat, min_time)}
+        results.append(result)
+        if log is not None:
+            print(f"{case_key(result):<28} {1000 * result['min']:>12.4f} ms", file=log)
+    return {"meta": meta, "results": results}
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD):
+    """
+    Compares the minimum time per call of every case present in both runs.
+
+    Returns:
+        list: Tuples (key, baseline seconds, current seconds, ratio, slower), slower being True
+            when the case got slower than the baseline by more than `threshold`.
+    """
+    reference = {case_key(case): case["min"] for case in baseline["results"]}
+    rows = []
+    for case in results["results"]:
+        key = case_key(case)
+        if key in reference:
+            ratio = case["min"] / reference[key]
+            rows.append((key, reference[key], case["min"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None) -> int:
+    """
+    Run the benchmark suite.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ring-sizes", type=int, nargs="+", default=DEFAULT_RING_SIZES)
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=["jacobian"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--output", default="-", help="result file, - for stdout")
+    parser.add_argument("--baseline", help="results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.ring_sizes, args.backends, args.repeat, args.min_time, log=sys.stderr)
+    if args.output == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline, encoding="utf-8") as file:
+        rows = compare(results, json.load(file), args.threshold)
+    print(f"{'case':<28} {'baseline [ms]':>14} {'current [ms]':>13} {'ratio':>7}", file=sys.stderr)
+    for key, reference, current, ratio, slower in rows:
+        flag = "  SLOWER" if slower else ""
+        print(f"{key:<28} {1000 * reference:>14.4f} {1000 * current:>13.4f} {ratio:>7.2f}{flag}", file=sys.stderr)
+    return 1 if any(slower for *_, slower in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
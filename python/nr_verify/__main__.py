@@ -0,0 +1,54 @@
+"""
+Command line entry point of nr_verify.
+
+Each command lives in its own module, which is only imported once the command is chosen, so
+`verify` and `serve` never load web3, solcx or dotenv.
+
+Usage:
+    python -m nr_verify verify [signature file] [options]   (see nr_verify.bulk_verify)
+    python -m nr_verify serve [options]                     (see nr_verify.verify_service)
+    python -m nr_verify deploy                              (compile and deploy the contracts of .env)
+    python -m nr_verify client                              (verify a signature with a deployed contract)
+"""
+import importlib
+import sys
+
+# command: (module, function, takes the remaining arguments, description)
+COMMANDS = {
+    "verify": ("nr_verify.bulk_verify", "main", True, "verify a file or stream of signatures"),
+    "serve": ("nr_verify.verify_service", "main", True, "run the micro-batching verification service"),
+    "deploy": ("nr_verify.deployment.deployment", "deploy_contract", False, "deploy the contracts"),
+    "client": ("nr_verify.deployment.client", "run_client", False, "verify a signature on chain"),
+}
+
+
+def usage() -> str:
+    """
+    Returns the usage message listing the commands.
+    """
+    commands = "\n".join(f"    {name:<8} {description}" for name, (*_, description) in COMMANDS.items())
+    return f"usage: python -m nr_verify <command> [arguments]\n\ncommands:\n{commands}"
+
+
+def main(argv=None) -> int:
+    """
+    Run the command named by the first argument.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    if argv[0] not in COMMANDS:
+        print(f"error: unknown command {argv[0]!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    module_name, function_name, takes_arguments, _ = COMMANDS[argv[0]]
+    function = getattr(importlib.import_module(module_name), function_name)
+    if takes_arguments:
+        return function(argv[1:])
+    function()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,490 @@
+"""
+Module: bulk_verify
+Command line tool re-verifying large files of SchnorrSignature and NodeRingSchnorr signatures.
+
+Records are streamed from a file or stdin, verified in batches (`verify_batch` / `nr_verify_batch`),
+optionally on a pool of worker processes, and a verdict per record is written as soon as its
+batch is done. Memory use is bounded by the batch size and the number of batches in flight.
+
+Input formats:
+    binary: consecutive records `frame | message | public key`, where frame is a signature
+        encoded by the schemas.encoding module, message is a 32-byte big-endian integer and the
+        public key (Schnorr signatures only) is an encoded point with the compression of the frame.
+        Signatures referencing a registered ring (`nr_sign_ring`) are verified against the rings
+        given with `--ring`, key store files of the ring keys (see the key_store module).
+    jsonl: one JSON object per line, integers given as numbers or "0x" strings:
+        {"kind": "schnorr", "message": m, "public_key": [x, y], "signature": [[x, y], s]}
+        {"kind": "ring", "message": m, "signature": [new_public_key, [R_i...], [[X_i, s_i]...],
+            master_sum, [P_i...]]}
+    auto (default): binary if the input starts with the encoding magic, jsonl otherwise.
+
+Output: one JSON line per record, in input order: {"record": index, "valid": bool}, with an
+additional "error" for records that could not be read (including records failing the
+STRUCTURE checks of the prechecks module, e.g. with a point at infinity or a scalar not below
+the curve order), that reference an unknown ring, or whose verification failed.
+A summary with throughput and latency percentiles is printed to stderr. The exit code is 0 if
+every signature is valid, 1 if any is not, and 2 if the input could not be read to the end.
+
+Usage:
+    python -m nr_verify.bulk_verify [INPUT] [--format auto] [--batch-size 256] [--workers N] [--output FILE]
+        [--ring KEY_STORE ...]
+"""
+import argparse
+import concurrent.futures
+import json
+import math
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+from .schemas import curve, encoding, prechecks
+from .schemas.key_store import KeyStore
+from .schemas.node_ring_schnorr import NodeRingSchnorr
+from .schemas.ring_registry import RingRegistry, UnknownRingError
+from .schemas.schnorr_signature import SchnorrSignature
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_READ_SIZE = 1 << 20
+
+_MESSAGE_SIZE = 32
+_KINDS = {"schnorr": encoding.SCHNORR_SIGNATURE, "ring": encoding.RING_SIGNATURE}
+_RING_SCHEME = NodeRingSchnorr()
+
+
+def encode_record(message: int, signature, public_key=None, compressed: bool = False) -> bytes:
+    """
+    Encodes a binary input record; `public_key` is required for Schnorr signatures and marks them as such.
+    """
+    if public_key is None:
+        encode = (encoding.encode_ring_reference_signature if isinstance(signature[0], bytes)
+                  else encoding.encode_ring_signature)
+        frame = encode(signature, compressed)
+        return frame + message.to_bytes(_MESSAGE_SIZE, "big")
+    frame = encoding.encode_schnorr_signature(signature, compressed)
+    return frame + message.to_bytes(_MESSAGE_SIZE, "big") + encoding.encode_point(public_key, compressed)
+
+
+def json_record(message: int, signature, public_key=None) -> str:
+    """
+    Formats a JSONL input record; `public_key` is required for Schnorr signatures and marks them as such.
+    """
+    def point(value):
+        value = curve.from_py_ecc(value)
+        return None if value is None else [hex(value[0]), hex(value[1])]
+
+    if public_key is None:
+        new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = signature
+        return json.dumps({"kind": "ring", "message": hex(message), "signature": [
+            point(new_public_key),
+            [point(randomness) for randomness in ephemeral_randomness],
+            [[point(public_ephemeral_val), hex(small_s)] for public_ephemeral_val, small_s in sigmas],
+            hex(master_sum),
+            [point(ext_public_key) for ext_public_key in ext_public_keys]
+        ]})
+    public_ephemeral_val, small_s = signature
+    return json.dumps({"kind": "schnorr", "message": hex(message), "public_key": point(public_key),
+                       "signature": [point(public_ephemeral_val), hex(small_s)]})
+
+
+def decode_record(buffer) -> tuple:
+    """
+    Decodes one binary input record spanning the whole buffer into (kind, message, public key, signature),
+    raising ValueError if it is malformed (see `check_structure`).
+    """
+    view = memoryview(buffer)
+    if _record_size(view, 0) != len(view):
+        raise ValueError("Record size does not match its frame")
+    _, compressed, _ = encoding.frame_info(view)
+    kind, signature, position = encoding.decode(view)
+    message = int.from_bytes(view[position:position + _MESSAGE_SIZE], "big")
+    public_key = None
+    if kind == encoding.SCHNORR_SIGNATURE:
+        public_key, _ = encoding.decode_point(view, position + _MESSAGE_SIZE, compressed)
+    check_structure(kind, message, public_key, signature)
+    return kind, message, public_key, signature
+
+
+def check_structure(kind: int, message: int, public_key, signature):
+    """
+    Runs the STRUCTURE checks of the prechecks module on a decoded record (and, for Schnorr
+    records, the CURVE checks), so malformed records are rejected alike for every scheme.
+
+    Raises:
+        prechecks.SignatureRejected: A ValueError, if a check fails.
+    """
+    if kind == encoding.SCHNORR_SIGNATURE:
+        prechecks.parse_schnorr(public_key, message, signature)
+    elif kind == encoding.RING_SIGNATURE:
+        new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = signature
+        prechecks.parse_values(message, new_public_key, ephemeral_randomness, sigmas, master_sum,
+                               len(ext_public_keys))
+        prechecks.parse_keys(ext_public_keys)
+    elif kind == encoding.RING_REFERENCE_SIGNATURE:
+        # The ring size is checked against the registered ring when verifying
+        _, new_public_key, ephemeral_randomness, sigmas, master_sum = signature
+        prechecks.parse_values(message, new_public_key, ephemeral_randomness, sigmas, master_sum,
+                               len(ephemeral_randomness))
+
+
+def _record_size(view: memoryview, offset: int) -> int:
+    kind, compressed, size = encoding.frame_info(view, offset)
+    size += _MESSAGE_SIZE
+    if kind == encoding.SCHNORR_SIGNATURE:
+        size += encoding.point_size(compressed)
+    return size
+
+
+def iter_binary_records(stream, read_size: int = DEFAULT_READ_SIZE):
+    """
+    Streams binary records from a binary file object.
+
+    Yields:
+        tuple: (record, error) with record = (kind, message, public key, signature), or None and
+            the error message if the record is malformed.
+
+    Raises:
+        ValueError: If the record boundaries cannot be determined, as reading cannot go on after that.
+    """
+    buffer = bytearray()
+    offset = 0
+    eof = False
+    while True:
+        available = len(buffer) - offset
+        record, error, size = None, None, None
+        with memoryview(buffer) as view:
+            if available >= encoding.MAX_HEADER_SIZE or (eof and available):
+                size = _record_size(view, offset)
+            if size is not None and available >= size:
+                with view[offset:offset + size] as record_view:
+                    try:
+                        record = decode_record(record_view)
+                    except ValueError as exc:
+                        error = str(exc)
+        if size is not None and available >= size:
+            offset += size
+            yield record, error
+            continue
+        if eof:
+            if available:
+                raise ValueError(f"Truncated record at the end of the input ({available} bytes)")
+            return
+        del buffer[:offset]
+        offset = 0
+        chunk = stream.read(max(read_size, (size or 0) - available))
+        eof = not chunk
+        buffer += chunk
+
+
+def _json_int(value) -> int:
+    if isinstance(value, str):
+        return int(value, 0)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError(f"Expected an integer, got {value!r}")
+
+
+def _json_point(value) -> curve.Point:
+    if value is None:
+        raise ValueError("Point at infinity")
+    if not isinstance(value, list) or len(value) != 2:
+        raise ValueError(f"Expected a point [x, y], got {value!r}")
+    point = (_json_int(value[0]), _json_int(value[1]))
+    if not curve.is_on_curve(point):
+        raise ValueError(f"Point {value!r} is not on the curve")
+    return point
+
+
+def _json_scalar(value) -> int:
+    scalar = _json_int(value)
+    if not 0 <= scalar < curve.CURVE_ORDER:
+        raise ValueError(f"Scalar {value!r} is not reduced modulo the curve order")
+    return scalar
+
+
+def parse_json_record(line) -> tuple:
+    """
+    Parses a JSONL input record into (kind, message, public key, signature), raising ValueError if it is malformed.
+    """
+    try:
+        data = json.loads(line)
+        kind = _KINDS[data["kind"]]
+        message = _json_int(data["message"])
+        if not 0 <= message < 1 << 8 * _MESSAGE_SIZE:
+            raise ValueError(f"Message {data['message']!r} does not fit in uint256")
+        if kind == encoding.SCHNORR_SIGNATURE:
+            public_ephemeral_val, small_s = data["signature"]
+            record = kind, message, _json_point(data["public_key"]), (
+                _json_point(public_ephemeral_val), _json_scalar(small_s))
+        else:
+            new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = data["signature"]
+            record = kind, message, None, (
+                _json_point(new_public_key),
+                [_json_point(randomness) for randomness in ephemeral_randomness],
+                [(_json_point(public_ephemeral_val), _json_scalar(small_s))
+                 for public_ephemeral_val, small_s in sigmas],
+                _json_scalar(master_sum),
+                [_json_point(ext_public_key) for ext_public_key in ext_public_keys]
+            )
+        check_structure(*record)
+        return record
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Malformed record: {exc}") from exc
+
+
+def iter_json_records(stream):
+    """
+    Streams JSONL records from a binary or text file object, skipping blank lines.
+
+    Yields:
+        tuple: (record, error) as `iter_binary_records`.
+    """
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield parse_json_record(line), None
+        except ValueError as exc:
+            yield None, str(exc)
+
+
+def verify_records(records) -> list:
+    """
+    Verifies a batch of records (kind, message, public key, signature) with one batch verification per kind.
+    Records referencing a registered ring must be resolved first (see `check_records`), otherwise they are False.
+
+    Returns:
+        list: bool verdict per record.
+    """
+    verdicts = [False] * len(records)
+    schnorr = [i for i, record in enumerate(records) if record[0] == encoding.SCHNORR_SIGNATURE]
+    ring = [i for i, record in enumerate(records) if record[0] == encoding.RING_SIGNATURE]
+    schnorr_verdicts = SchnorrSignature.verify_batch([
+        (records[i][2], records[i][1], records[i][3]) for i in schnorr
+    ])
+    ring_verdicts = _RING_SCHEME.nr_verify_batch([(records[i][1], records[i][3]) for i in ring])
+    for i, verdict in zip(schnorr + ring, schnorr_verdicts + ring_verdicts):
+        verdicts[i] = verdict
+    return verdicts
+
+
+def check_records(records, registry: RingRegistry = None) -> list:
+    """
+    Verifies a batch of records like `verify_records`, keeping failures to the records causing them:
+    if the batch verification raises, the records are verified one at a time. Records referencing
+    a ring are resolved against `registry` first and then batched with the other ring signatures.
+
+    Returns:
+        list: (verdict, error) per record, with the error message if the record references an
+            unknown ring or its verification raised, else None.
+
+    Raises:
+        ValueError: If records reference a ring but no registry is given.
+    """
+    results = [(False, None)] * len(records)
+    batched = []
+    resolved = []
+    for i, record in enumerate(records):
+        if record[0] == encoding.RING_REFERENCE_SIGNATURE:
+            try:
+                record = resolve_ring(record, registry)
+            except UnknownRingError as exc:
+                results[i] = (False, str(exc))
+                continue
+        batched.append(i)
+        resolved.append(record)
+    for i, result in zip(batched, _check_batch(resolved)):
+        results[i] = result
+    return results
+
+
+def resolve_ring(record, registry: RingRegistry) -> tuple:
+    """
+    Turns a record referencing a ring into a ring signature record over the registered Ring.
+
+    Raises:
+        UnknownRingError: If the ring is not registered.
+        ValueError: If there is no registry.
+    """
+    if registry is None:
+        raise ValueError("Records referencing a ring need a ring registry")
+    _, message, _, (ring_id, new_public_key, ephemeral_randomness, sigmas, master_sum) = record
+    return (encoding.RING_SIGNATURE, message, None,
+            (new_public_key, ephemeral_randomness, sigmas, master_sum, registry.get(ring_id)))
+
+
+def _check_batch(records) -> list:
+    try:
+        return [(verdict, None) for verdict in verify_records(records)]
+    except Exception as exc:  # pylint: disable=W0718
+        if len(records) == 1:
+            return [(False, f"Verification failed: {exc}")]
+    return [_check_batch([record])[0] for record in records]
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies in logarithmic buckets, giving percentiles over any number of
+    records in constant memory, to within the bucket width of about 9%.
+    """
+    BUCKETS_PER_OCTAVE = 8
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.maximum = 0.0
+
+    def add(self, seconds: float):
+        """
+        Records a latency.
+        """
+        bucket = math.ceil(math.log2(max(seconds, 1e-9)) * self.BUCKETS_PER_OCTAVE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.maximum = max(self.maximum, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Returns an upper bound of the latency below which `fraction` of the records fall.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** (bucket / self.BUCKETS_PER_OCTAVE), self.maximum)
+        return self.maximum
+
+
+def _batches(entries, batch_size: int):
+    # Groups (record, error) entries into lists of (record, error, read time)
+    entries = iter(entries)
+    while True:
+        batch = [(record, error, time.perf_counter()) for record, error in islice(entries, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def _verify_batch(batch, registry: RingRegistry = None, executor=None):
+    # Starts verification of the readable records of a batch, returning a callable for the verdicts
+    records = [record for record, _, _ in batch if record is not None]
+    if executor is None:
+        verdicts = check_records(records, registry)
+        return lambda: verdicts
+    return executor.submit(check_records, records, registry).result
+
+
+def _verified_batches(batches, workers: int = None, registry: RingRegistry = None):
+    # Yields (batch, verdicts) in input order, keeping at most two batches per worker in flight
+    if not workers:
+        for batch in batches:
+            yield batch, _verify_batch(batch, registry)()
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append((batch, _verify_batch(batch, registry, executor)))
+            if len(pending) >= 2 * workers:
+                batch, verdicts = pending.popleft()
+                yield batch, verdicts()
+        while pending:
+            batch, verdicts = pending.popleft()
+            yield batch, verdicts()
+
+
+def run(entries, output, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = None,
+        registry: RingRegistry = None) -> dict:
+    # pylint: disable=R0914
+    """
+    Verifies a stream of (record, error) entries and writes a verdict line per entry to `output`;
+    records referencing a ring are verified against `registry`.
+
+    Returns:
+        dict: Statistics (records, valid, invalid, errors, seconds, throughput and latency percentiles).
+    """
+    stats = {"records": 0, "valid": 0, "invalid": 0, "errors": 0}
+    latencies = LatencyHistogram()
+    start = time.perf_counter()
+    for batch, verdicts in _verified_batches(_batches(entries, batch_size), workers, registry):
+        verdicts = iter(verdicts)
+        done = time.perf_counter()
+        for _, error, read_time in batch:
+            verdict = {"record": stats["records"], "valid": False}
+            if error is None:
+                verdict["valid"], error = next(verdicts)
+            if error is not None:
+                verdict["error"] = error
+                stats["errors"] += 1
+            stats["valid" if verdict["valid"] else "invalid"] += 1
+            stats["records"] += 1
+            latencies.add(done - read_time)
+            output.write(json.dumps(verdict) + "\n")
+        output.flush()
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["records_per_second"] = stats["records"] / stats["seconds"] if stats["seconds"] else 0.0
+    for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+        stats[f"latency_{name}_ms"] = 1000 * latencies.percentile(fraction)
+    stats["latency_max_ms"] = 1000 * latencies.maximum
+    return stats
+
+
+def open_records(stream, input_format: str = "auto"):
+    """
+    Returns the (record, error) entries of a binary file object in the given format (auto, binary or jsonl).
+    """
+    if input_format == "auto":
+        input_format = "binary" if stream.peek(len(encoding.MAGIC))[:len(encoding.MAGIC)] == encoding.MAGIC \
+            else "jsonl"
+    if input_format == "binary":
+        return iter_binary_records(stream)
+    if input_format == "jsonl":
+        return iter_json_records(stream)
+    raise ValueError(f"Unknown input format {input_format!r}")
+
+
+def main(argv=None) -> int:
+    """
+    Run the command line tool.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", default="-", help="signature file, - for stdin")
+    parser.add_argument("--format", choices=["auto", "binary", "jsonl"], default="auto")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, serial when omitted")
+    parser.add_argument("--output", default="-", help="verdict file, - for stdout")
+    parser.add_argument("--ring", action="append", default=[], help="key store file of a referenced ring")
+    args = parser.parse_args(argv)
+
+    registry = RingRegistry()
+    for path in args.ring:
+        with KeyStore(path) as keys:
+            registry.register(keys)
+
+    # pylint: disable=R1732
+    stream = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run(open_records(stream, args.format), output, args.batch_size, args.workers, registry)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+        if output is not sys.stdout:
+            output.close()
+
+    print(
+        f"{stats['records']} records ({stats['valid']} valid, {stats['invalid']} invalid, "
+        f"{stats['errors']} errors) in {stats['seconds']:.3f} s, {stats['records_per_second']:.1f} records/s\n"
+        f"latency p50 {stats['latency_p50_ms']:.2f} ms, p90 {stats['latency_p90_ms']:.2f} ms, "
+        f"p99 {stats['latency_p99_ms']:.2f} ms, max {stats['latency_max_ms']:.2f} ms",
+        file=sys.stderr
+    )
+    return 1 if stats["invalid"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
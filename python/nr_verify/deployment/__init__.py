@@ -1,5 +1,22 @@
 """
 Module with part connected to deployment to blockchain
+
+The exports below are imported on first access (PEP 562): web3, solcx and dotenv are only
+loaded by the parts that use them.
 """
-from .client import run_client
-from .deploy import deploy_contract
+from typing import TYPE_CHECKING
+
+from ..lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .async_client import ContractVerifier
+    from .client import run_client
+    from .deployment import deploy_contract
+
+__all__ = ["ContractVerifier", "run_client", "deploy_contract"]
+
+__getattr__ = lazy_exports(__name__, {
+    "ContractVerifier": ".async_client",
+    "run_client": ".client",
+    "deploy_contract": ".deployment",
+})
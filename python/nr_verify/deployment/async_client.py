@@ -0,0 +1,235 @@
+"""
+Module: async_client
+Asynchronous client verifying signatures with the deployed SchnorrSignature and
+SchnorrSignatureNodeRing contracts.
+
+`ContractVerifier` runs on `AsyncWeb3` and keeps one HTTP connection pool (an aiohttp session
+with at most `pool_size` connections) for its lifetime. Verifications are `eth_call`s encoded
+with eth_abi; `verify_many` / `nr_verify_many` send them as JSON-RPC batches of `batch_size`
+calls, with at most `concurrency` batches in flight. Providers without batch support (e.g.
+`AsyncEthereumTesterProvider`, detected when the verifier is built) get one request per call
+instead, with at most `concurrency` calls in flight.
+
+A call the contract reverts (the `require`s of SchnorrSignatureNodeRing.verify) counts as an
+invalid signature; any other JSON-RPC error is raised as Web3RPCError. The instrumentation
+counters "rpc.requests" and "rpc.calls" count round trips and calls.
+
+Usage:
+    async with await ContractVerifier.connect(uri, schnorr_address, ring_address) as verifier:
+        verdicts = await verifier.verify_many([(public_key, message, signature), ...])
+"""
+import asyncio
+from typing import Iterable, List, Optional, Tuple
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from eth_abi import decode, encode
+from web3 import AsyncHTTPProvider, AsyncWeb3
+from web3.exceptions import Web3RPCError
+from web3.providers import AsyncBaseProvider
+
+from ..schemas import curve, instrumentation
+from ..schemas.hashing import keccak256
+
+SCHNORR_VERIFY = "verify(uint256[2],uint256,uint256[2],uint256)"
+RING_VERIFY = "verify(uint256,uint256[2],uint256[2][],uint256[2][],uint256[],uint256,uint256[2][])"
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CONCURRENCY = 8
+DEFAULT_POOL_SIZE = 8
+DEFAULT_TIMEOUT = 60.0
+
+# JSON-RPC error code of reverted calls (EIP-1474 / geth)
+_REVERTED = 3
+
+
+def _selector(signature: str) -> bytes:
+    return keccak256(signature.encode())[:4]
+
+
+def _point(value) -> Tuple[int, int]:
+    point = curve.from_py_ecc(value)
+    return (0, 0) if point is None else point
+
+
+def schnorr_call_data(public_key, message: int, signature) -> bytes:
+    """
+    Returns the call data of `SchnorrSignature.verify(pubkey, message, X, s)`.
+    """
+    public_ephemeral_val, small_s = signature
+    return _selector(SCHNORR_VERIFY) + encode(
+        ["uint256[2]", "uint256", "uint256[2]", "uint256"],
+        [_point(public_key), message, _point(public_ephemeral_val), small_s]
+    )
+
+
+def ring_call_data(message: int, signature) -> bytes:
+    """
+    Returns the call data of `SchnorrSignatureNodeRing.verify` for an `nr_sign` signature.
+    """
+    new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = signature
+    return _selector(RING_VERIFY) + encode(
+        ["uint256", "uint256[2]", "uint256[2][]", "uint256[2][]", "uint256[]", "uint256", "uint256[2][]"],
+        [
+            message,
+            _point(new_public_key),
+            [_point(randomness) for randomness in ephemeral_randomness],
+            [_point(public_ephemeral_val) for public_ephemeral_val, _ in sigmas],
+            [small_s for _, small_s in sigmas],
+            master_sum,
+            [_point(ext_public_key) for ext_public_key in ext_public_keys]
+        ]
+    )
+
+
+def supports_batching(provider) -> bool:
+    """
+    Returns whether a provider implements JSON-RPC batches, i.e. overrides `make_batch_request`.
+    """
+    return type(provider).make_batch_request is not AsyncBaseProvider.make_batch_request
+
+
+def _is_revert(message: str) -> bool:
+    return "execution reverted" in message.lower()
+
+
+def _verdict(response) -> bool:
+    # Decodes the bool returned by an eth_call response, False for reverted calls
+    if not isinstance(response, dict):
+        raise Web3RPCError(f"Malformed JSON-RPC response {response!r}")
+    error = response.get("error")
+    if error is not None:
+        message = str(error.get("message", "")) if isinstance(error, dict) else str(error)
+        if isinstance(error, dict) and error.get("code") == _REVERTED or _is_revert(message):
+            return False
+        raise Web3RPCError(f"eth_call failed: {message}")
+    result = response.get("result")
+    data = bytes.fromhex(result[2:]) if isinstance(result, str) else bytes(result)
+    return bool(decode(["bool"], data)[0]) if data else False
+
+
+class ContractVerifier:  # pylint: disable=R0902
+    """
+    Verifies signatures with the deployed contracts over a pooled AsyncWeb3 connection.
+    """
+
+    def __init__(self, w3: AsyncWeb3, schnorr_address: Optional[str] = None, ring_address: Optional[str] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, concurrency: int = DEFAULT_CONCURRENCY, sender: str = None,
+                 batching: bool = None):
+        # pylint: disable=R0913,R0917
+        """
+        Args:
+            w3 (AsyncWeb3): Connected instance; `connect` builds one with a connection pool.
+            schnorr_address (str): Address of the SchnorrSignature contract.
+            ring_address (str): Address of the SchnorrSignatureNodeRing contract.
+            batch_size (int): Maximal number of calls per JSON-RPC batch.
+            concurrency (int): Maximal number of batches in flight.
+            sender (str): `from` address of the calls, for nodes requiring one (e.g. eth-tester).
+            batching (bool): Whether to send JSON-RPC batches, None to send them if the provider
+                supports them (see `supports_batching`).
+        """
+        if batch_size < 1 or concurrency < 1:
+            raise ValueError("Batch size and concurrency must be positive")
+        self.w3 = w3
+        self.schnorr_address = schnorr_address
+        self.ring_address = ring_address
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.sender = sender
+        self.batching = supports_batching(w3.provider) if batching is None else batching
+        self._session = None
+
+    @classmethod
+    async def connect(cls, uri: str, schnorr_address: Optional[str] = None, ring_address: Optional[str] = None,
+                      pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT, **kwargs):
+        # pylint: disable=R0913,R0917
+        """
+        Returns a verifier talking to the HTTP JSON-RPC endpoint `uri` over a pool of at most
+        `pool_size` connections; further keyword arguments go to the constructor.
+        """
+        provider = AsyncHTTPProvider(uri, request_kwargs={"timeout": ClientTimeout(total=timeout)})
+        session = ClientSession(connector=TCPConnector(limit=pool_size))
+        await provider.cache_async_session(session)
+        verifier = cls(AsyncWeb3(provider), schnorr_address, ring_address, **kwargs)
+        verifier._session = session  # pylint: disable=W0212
+        return verifier
+
+    async def close(self):
+        """
+        Closes the connection pool opened by `connect`.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def verify(self, public_key, message: int, signature) -> bool:
+        """
+        Verifies a SchnorrSignature signature with the contract.
+        """
+        return (await self.verify_many([(public_key, message, signature)]))[0]
+
+    async def nr_verify(self, message: int, signature) -> bool:
+        """
+        Verifies a NodeRingSchnorr signature with the contract.
+        """
+        return (await self.nr_verify_many([(message, signature)]))[0]
+
+    async def verify_many(self, items: Iterable[Tuple]) -> List[bool]:
+        """
+        Verifies (public_key, message, signature) items with the SchnorrSignature contract.
+        """
+        return await self._call_many(self._address(self.schnorr_address, "SchnorrSignature"),
+                                     [schnorr_call_data(*item) for item in items])
+
+    async def nr_verify_many(self, items: Iterable[Tuple]) -> List[bool]:
+        """
+        Verifies (message, signature) items with the SchnorrSignatureNodeRing contract.
+        """
+        return await self._call_many(self._address(self.ring_address, "SchnorrSignatureNodeRing"),
+                                     [ring_call_data(*item) for item in items])
+
+    @staticmethod
+    def _address(address: Optional[str], contract: str) -> str:
+        if address is None:
+            raise ValueError(f"No address of the {contract} contract given")
+        return address
+
+    async def _call_many(self, address: str, calls: List[bytes]) -> List[bool]:
+        # Runs the calls in batches (of one call without batching), at most `concurrency` of them at once
+        size = self.batch_size if self.batching else 1
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch):
+            async with slots:
+                return await self._call_batch(batch)
+
+        transaction = {"to": address} if self.sender is None else {"from": self.sender, "to": address}
+        requests = [("eth_call", [dict(transaction, data="0x" + data.hex()), "latest"]) for data in calls]
+        batches = await asyncio.gather(*[
+            run(requests[start:start + size]) for start in range(0, len(requests), size)
+        ])
+        return [verdict for batch in batches for verdict in batch]
+
+    async def _call_batch(self, requests) -> List[bool]:
+        instrumentation.count("rpc.calls", len(requests))
+        instrumentation.count("rpc.requests")
+        if len(requests) == 1:
+            return [await self._call(*requests[0])]
+        responses = await self.w3.provider.make_batch_request(requests)
+        if not isinstance(responses, list):
+            raise Web3RPCError(f"Batch request failed: {responses!r}")
+        return [_verdict(response) for response in responses]
+
+    async def _call(self, method, params) -> bool:
+        try:
+            return _verdict(await self.w3.provider.make_request(method, params))
+        except Exception as exc:  # pylint: disable=W0718
+            # In-process providers (eth-tester) raise on reverted calls instead of returning an error
+            if _is_revert(str(exc)):
+                return False
+            raise
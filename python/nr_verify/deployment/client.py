@@ -3,13 +3,13 @@ Client to connect to blockchain
 """
 
 import os
-import pickle
 
 from dotenv import load_dotenv
 from web3 import Web3
 
-from python.nr_verify.schemas.schnorr_signature import SchnorrSignature
-from python.nr_verify.schemas.util import bn128_point_to_list
+from ..schemas.schnorr_signature import SchnorrSignature
+from ..schemas.util import bn128_point_to_list
+from .compiler import load_artifact
 
 
 def initialize_web3_instance(uri: str):
@@ -19,12 +19,14 @@ def initialize_web3_instance(uri: str):
     return Web3(Web3.HTTPProvider(uri))
 
 
-def load_compiled_contracts(filename='contracts.bin'):
+def load_compiled_contracts(filename='contracts.json'):
     """
-    Load compiled contracts from a binary file.
+    Load compiled contracts from the JSON build artifact.
     """
-    with open(filename, 'rb') as file:
-        return pickle.load(file)
+    artifact = load_artifact(filename)
+    if artifact is None:
+        raise FileNotFoundError(f"No build artifact {filename}, run the deployment first")
+    return artifact['contracts']
 
 
 def get_contract_instance(w3, contract_address, contract_abi):
@@ -0,0 +1,108 @@
+"""
+Module: compiler
+Compilation of the Solidity contracts with solc (py-solc-x), cached by content.
+
+`compile_contracts` with an `artifact_path` keeps the compiler output in a JSON artifact together
+with a SHA-256 key of the solc version and the complete standard JSON input (source names,
+contents and settings). As long as the key matches, the artifact is returned as is and neither
+`install_solc` nor `compile_standard` runs.
+
+Artifact format:
+    {"key": hex digest, "solc_version": "0.8.18", "contracts": {name: {"bytecode": hex, "abi": [...]}}}
+"""
+import hashlib
+import json
+import os
+
+from solcx import compile_standard, install_solc
+
+
+def read_file_content(file_name):
+    """ Read and return the content of a file. """
+    with open(file_name, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def standard_input(contract_paths) -> dict:
+    """
+    Returns the solc standard JSON input compiling the given contract files.
+
+    Source units are named after the file names, so the relative imports between the contracts
+    ("./EllipticCurve.sol") resolve within the input.
+    """
+    return {
+        "language": "Solidity",
+        "sources": {
+            os.path.basename(contract_path): {"content": read_file_content(contract_path)}
+            for contract_path in contract_paths
+        },
+        "settings": {
+            "outputSelection": {
+                "*": {
+                    "*": ["metadata", "evm.bytecode", "evm.bytecode.sourceMap", "abi"]
+                }
+            }
+        }
+    }
+
+
+def build_key(compiler_input: dict, solidity_version: str) -> str:
+    """
+    Returns the content address of a compilation: SHA-256 of the solc version and the canonical
+    JSON of the standard input.
+    """
+    canonical = json.dumps(compiler_input, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{solidity_version}\n{canonical}".encode()).hexdigest()
+
+
+def load_artifact(artifact_path: str) -> dict:
+    """
+    Reads a JSON artifact, returning None if it does not exist or cannot be parsed.
+    """
+    try:
+        with open(artifact_path, 'r', encoding='utf-8') as file:
+            artifact = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return artifact if isinstance(artifact, dict) and "contracts" in artifact else None
+
+
+def write_artifact(artifact_path: str, artifact: dict):
+    """
+    Writes a JSON artifact atomically, so concurrent builds never read a partial file.
+    """
+    temporary_path = f"{artifact_path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as file:
+        json.dump(artifact, file, indent=1, sort_keys=True)
+    os.replace(temporary_path, artifact_path)
+
+
+def compile_contracts(contract_paths, solidity_version: str, artifact_path: str = None) -> dict:
+    """
+    Compiles contract files, installing the solc version if needed. With `artifact_path`, the
+    output of an earlier compilation of the same sources and version is reused, and a new one
+    is stored.
+
+    Returns:
+        dict: {contract name: {'bytecode': hex string, 'abi': list}} for every contract of the files.
+    """
+    compiler_input = standard_input(contract_paths)
+    key = build_key(compiler_input, solidity_version)
+    if artifact_path is not None:
+        artifact = load_artifact(artifact_path)
+        if artifact is not None and artifact.get("key") == key:
+            return artifact["contracts"]
+
+    install_solc(solidity_version)
+    compiled_sol = compile_standard(compiler_input, solc_version=solidity_version)
+    contracts = {
+        contract_name: {
+            'bytecode': contract['evm']['bytecode']['object'],
+            'abi': contract['abi']
+        }
+        for source in compiled_sol['contracts'].values()
+        for contract_name, contract in source.items()
+    }
+    if artifact_path is not None:
+        write_artifact(artifact_path, {"key": key, "solc_version": solidity_version, "contracts": contracts})
+    return contracts
@@ -1,99 +1,98 @@
+"""
+Compile the contracts and deploy them to the blockchain configured in .env
+
+Compilation is cached in contracts.json (see the compiler module). All deployment transactions
+are signed up front with consecutive, locally assigned nonces, sent back to back and their
+receipts awaited concurrently, so deploying takes about one block instead of one per contract.
+
+Usage:
+    python -m nr_verify.deployment.deployment
+"""
+import asyncio
 import os
-import pickle
 
 from dotenv import load_dotenv
-from solcx import compile_standard, install_solc
-from web3 import Web3
+from web3 import AsyncHTTPProvider, AsyncWeb3
 
+from .compiler import compile_contracts
 
-def read_file_content(file_name):
-    """ Read and return the content of a file. """
-    with open(file_name, 'r', encoding='utf-8') as file:
-        return file.read()
+ARTIFACT_FILE = "contracts.json"
+DEPLOYMENT_FILE = "deployment.txt"
 
 
-if __name__ == "__main__":
+async def deploy_contracts(w3: AsyncWeb3, compiled_contracts: dict, private_key: str, chain_id: int = None,
+                           timeout: float = 120) -> dict:
+    # pylint: disable=R0913,R0917
+    """
+    Deploys compiled contracts from the account of `private_key`.
+
+    The nonce and gas price are queried once; every transaction gets the next nonce locally.
+
+    Returns:
+        dict: {contract name: deployed address}, in the order of `compiled_contracts`.
+    """
+    # Load account from private key
+    account = w3.eth.account.from_key(private_key)
+    chain_id = chain_id if chain_id is not None else await w3.eth.chain_id
+    nonce, gas_price = await asyncio.gather(w3.eth.get_transaction_count(account.address, "pending"),
+                                            w3.eth.gas_price)
+
+    # Sign and send every transaction without waiting for the previous one to be mined
+    transaction_hashes = {}
+    for offset, (contract_name, compiled) in enumerate(compiled_contracts.items()):
+        contract = w3.eth.contract(abi=compiled['abi'], bytecode=compiled['bytecode'])
+        transaction = await contract.constructor().build_transaction({
+            'from': account.address,
+            'nonce': nonce + offset,
+            'chainId': chain_id,
+            'gasPrice': gas_price
+        })
+        signed_txn = account.sign_transaction(transaction)
+        transaction_hashes[contract_name] = await w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+    return await _wait_for_deployments(w3, transaction_hashes, timeout)
+
+
+async def _wait_for_deployments(w3: AsyncWeb3, transaction_hashes: dict, timeout: float) -> dict:
+    receipts = await asyncio.gather(*[
+        w3.eth.wait_for_transaction_receipt(transaction_hash, timeout=timeout)
+        for transaction_hash in transaction_hashes.values()
+    ])
+    for contract_name, receipt in zip(transaction_hashes, receipts):
+        if not receipt.status:
+            raise RuntimeError(f"Deployment of contract {contract_name} failed")
+    return {contract_name: receipt.contractAddress for contract_name, receipt in zip(transaction_hashes, receipts)}
+
+
+def deploy_contract():
+    """
+    Compile (or reuse the cached build of) the contracts listed in .env and deploy them.
+    """
     # Load environment variables
     load_dotenv()
     # Get the list of contract paths and Solidity version from the .env file
     contract_dir = os.getenv('CONTRACT_DIR')
     contract_names = os.getenv('CONTRACT_NAMES').split(',')
     solidity_version = os.getenv('SOLIDITY_VERSION')
+    output_dir = os.path.dirname(os.path.abspath(__file__))
 
-    if os.path.exists(contract_dir):
-        os.chdir(os.getenv('CONTRACT_DIR'))
-
-    # Install and set the Solidity compiler version
-    install_solc(solidity_version)
-    # Compile the Solidity code
-    compiled_sol = compile_standard({
-        "language": "Solidity",
-        "sources": {
-            os.path.basename(contract_name).split('.')[0]: {
-                "content": read_file_content(contract_name)
-            } for contract_name in contract_names
-        },
-        "settings": {
-            "outputSelection": {
-                "*": {
-                    "*": ["metadata", "evm.bytecode", "evm.bytecode.sourceMap", "abi"]
-                }
-            }
-        }
-    }, solc_version=solidity_version)
-
-    compiled_contracts = {
-        contract_name: {
-            'bytecode': compiled_sol['contracts'][contract_name][contract_name]['evm']['bytecode']['object'],
-            'abi': compiled_sol['contracts'][contract_name][contract_name]['abi']
-        }
-        for contract_filename in contract_names
-        for contract_name in [os.path.basename(contract_filename).split('.')[0]]
-    }
-    os.chdir(os.path.dirname(__file__))
-    with open('contracts.bin', 'wb') as f:
-        f.write(pickle.dumps(compiled_contracts))
+    contract_paths = [os.path.join(contract_dir, contract_name) for contract_name in contract_names]
+    compiled_contracts = compile_contracts(contract_paths, solidity_version, os.path.join(output_dir, ARTIFACT_FILE))
 
     # Connect to an Ethereum node
-    web3 = Web3(Web3.HTTPProvider(f"HTTP://{os.getenv('IP')}:{os.getenv('PORT')}"))
-    # Check connection
-    assert web3.is_connected(), "Web3 is not connected to Ethereum node."
-
-    # Remove file deployment.txt if it exists
-    if os.path.exists("deployment.txt"):
-        os.remove("deployment.txt")
-
-    # Deploy each compiled contract
-    for contract_name in compiled_contracts.keys():
-        contract = web3.eth.contract(
-            abi=compiled_contracts[contract_name]['abi'],
-            bytecode=compiled_contracts[contract_name]['bytecode']
-        )
-
-        # Load account from private key
-        private_key = os.getenv('PRIVATE_KEY')
-        account = web3.eth.account.from_key(private_key)
-
-        # Set up transaction
-        nonce = web3.eth.get_transaction_count(account.address)
-        transaction = contract.constructor().build_transaction({
-            'from': account.address,
-            'nonce': nonce,
-            'chainId': int(os.getenv('CHAIN_ID')),
-            'gasPrice': web3.eth.gas_price
-        })
-
-        # Sign the transaction
-        signed_txn = web3.eth.account.sign_transaction(transaction, private_key)
+    w3 = AsyncWeb3(AsyncHTTPProvider(f"HTTP://{os.getenv('IP')}:{os.getenv('PORT')}"))
 
-        # Send the transaction
-        tx_hash = web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    async def deploy():
+        # Check connection
+        assert await w3.is_connected(), "Web3 is not connected to Ethereum node."
+        return await deploy_contracts(w3, compiled_contracts, os.getenv('PRIVATE_KEY'), int(os.getenv('CHAIN_ID')))
 
-        # Wait for the transaction to be mined
-        tx_receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
+    addresses = asyncio.run(deploy())
+    with open(os.path.join(output_dir, DEPLOYMENT_FILE), "w", encoding="UTF-8") as f:
+        for contract_name, address in addresses.items():
+            # Output the address of the deployed contract
+            print(f"Contract {contract_name} deployed at address: {address}")
+            f.write(f"{contract_name}: {address}\n")
 
-        # Output the address of the deployed contract
-        print(f"Contract {contract_name} deployed at address: {tx_receipt.contractAddress}")
 
-        with open("deployment.txt", "a", encoding="UTF-8") as f:
-            f.write(f"{contract_name}: {tx_receipt.contractAddress}\n")
+if __name__ == "__main__":
+    deploy_contract()
@@ -0,0 +1,24 @@
+"""
+Module: lazy
+Lazy package exports (PEP 562).
+"""
+import importlib
+import sys
+
+
+def lazy_exports(package: str, exports: dict):
+    """
+    Returns a module `__getattr__` for `package` importing each export from its submodule on first
+    access and caching it in the package namespace.
+
+    Args:
+        package (str): `__name__` of the package.
+        exports (dict): {exported name: relative module name, e.g. ".msm"}.
+    """
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name], package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+    return __getattr__
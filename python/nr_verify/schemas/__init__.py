@@ -1,4 +1,20 @@
 """
 Module for cryptographic part
+
+The exports below are imported on first access (PEP 562), so importing one submodule does not
+load the others.
 """
-from .schnorr_signature import SchnorrSignature
+from typing import TYPE_CHECKING
+
+from ..lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .msm import multi_scalar_multiply
+    from .schnorr_signature import SchnorrSignature
+
+__all__ = ["SchnorrSignature", "multi_scalar_multiply"]
+
+__getattr__ = lazy_exports(__name__, {
+    "SchnorrSignature": ".schnorr_signature",
+    "multi_scalar_multiply": ".msm",
+})
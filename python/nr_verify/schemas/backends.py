@@ -0,0 +1,228 @@
+"""
+Module: backends
+This module provides interchangeable implementations of the G1 arithmetic used by
+SchnorrSignature and NodeRingSchnorr.
+
+Every backend takes and returns compact affine points (int pairs, None for the point at
+infinity, see the curve module), so signatures produced or verified with different backends
+are identical. Backends only differ in how they compute internally:
+    Bn128Backend: reference implementation on plain py_ecc.bn128 affine arithmetic, which pays
+        a field inversion on every addition.
+    JacobianBackend: integer jacobian arithmetic from the curve module with a single inversion
+        per result, GLV/wNAF variable-base multiplication, precomputed G1 tables,
+        multi-scalar multiplication, cached GLV tables of public keys (see the key_cache module)
+        and precomputed tables of fixed rings (see `msm.FixedPointsTable`).
+
+Both count their operations when instrumentation is enabled (see the instrumentation module).
+py_ecc.bn128 is only imported once the Bn128Backend is used.
+"""
+import abc
+import functools
+import importlib
+
+from . import curve, glv, instrumentation
+from .fixed_base import multiply_g1
+from .key_cache import KeyTableCache
+from .msm import FixedPointsTable, multi_scalar_multiply
+
+# Up to this many terms, a GLV linear combination beats Straus/Pippenger multi-scalar multiplication
+KEY_COMBINATION_LIMIT = 16
+
+
+class CurveBackend(abc.ABC):
+    """
+    Interface of the G1 arithmetic used by the signature schemes.
+
+    Subclasses must implement the abstract `multiply`, `add`, `neg` and `eq`, otherwise they
+    cannot be instantiated; `multiply_g1`, `multiply_two` and `msm` fall back to those and can
+    be overridden with faster algorithms.
+    """
+    name = None
+    G1 = curve.G1
+
+    @abc.abstractmethod
+    def multiply(self, point, scalar: int):
+        """
+        Computes `scalar * point`.
+        """
+
+    @abc.abstractmethod
+    def add(self, point_1, point_2):
+        """
+        Computes `point_1 + point_2`.
+        """
+
+    @abc.abstractmethod
+    def neg(self, point):
+        """
+        Computes `-point`.
+        """
+
+    @abc.abstractmethod
+    def eq(self, point_1, point_2) -> bool:
+        """
+        Checks whether two points are equal.
+        """
+
+    def multiply_g1(self, scalar: int):
+        """
+        Computes `scalar * G1`.
+        """
+        return self.multiply(self.G1, scalar)
+
+    def multiply_two(self, point_1, scalar_1: int, point_2, scalar_2: int):
+        """
+        Computes `scalar_1 * point_1 + scalar_2 * point_2`.
+        """
+        return self.add(
+            self.multiply(point_1, scalar_1 % curve.CURVE_ORDER),
+            self.multiply(point_2, scalar_2 % curve.CURVE_ORDER)
+        )
+
+    def msm(self, points, scalars):
+        """
+        Computes `sum(scalar * point)` over the given points and scalars.
+        """
+        result = None
+        for point, scalar in zip(points, scalars):
+            result = self.add(result, self.multiply(point, scalar % curve.CURVE_ORDER))
+        return result
+
+    def key_msm(self, keys, key_scalars, points=(), scalars=()):
+        """
+        Computes `sum(key_scalar * key) + sum(scalar * point)`, where `keys` are long-lived public
+        keys whose precomputation may be reused across calls.
+        """
+        return self.msm(list(keys) + list(points), list(key_scalars) + list(scalars))
+
+    def precompute_keys(self, keys):
+        """
+        Prepares many multiplications of the same keys by changing scalars.
+
+        Returns:
+            callable: Function of a list of scalars, one per key, computing `sum(scalar * key)`.
+        """
+        return functools.partial(self.key_msm, list(keys))
+
+
+class Bn128Backend(CurveBackend):
+    """
+    Reference backend on py_ecc.bn128 affine arithmetic.
+    """
+    name = "bn128"
+
+    @functools.cached_property
+    def bn128(self):
+        """
+        The py_ecc.bn128 module, imported on first use.
+        """
+        return importlib.import_module("py_ecc.bn128")
+
+    def multiply(self, point, scalar: int):
+        instrumentation.count("curve.multiply")
+        return curve.from_py_ecc(self.bn128.multiply(curve.to_py_ecc(point), scalar))
+
+    def add(self, point_1, point_2):
+        instrumentation.count("curve.add")
+        return curve.from_py_ecc(self.bn128.add(curve.to_py_ecc(point_1), curve.to_py_ecc(point_2)))
+
+    def neg(self, point):
+        instrumentation.count("curve.neg")
+        return curve.from_py_ecc(self.bn128.neg(curve.to_py_ecc(point)))
+
+    def eq(self, point_1, point_2) -> bool:
+        instrumentation.count("curve.eq")
+        return self.bn128.eq(curve.to_py_ecc(point_1), curve.to_py_ecc(point_2))
+
+
+class JacobianBackend(CurveBackend):
+    """
+    Backend on integer jacobian arithmetic, converting to affine once per result.
+
+    With a `key_cache`, `multiply_two` and small `key_msm` calls reuse cached GLV tables of the
+    points; larger multi-scalar multiplications run Pippenger, which does not need them.
+    """
+    name = "jacobian"
+
+    def __init__(self, key_cache: KeyTableCache = None):
+        """
+        Args:
+            key_cache (KeyTableCache): Cache of GLV tables of public keys, None to disable caching.
+        """
+        self.key_cache = key_cache
+
+    def _table(self, point):
+        # The GLV table of a point (or the point itself if it is not cached) for linear_combination
+        if point == curve.G1:
+            return glv.g1_glv_table()
+        if self.key_cache is None or point is None:
+            return point
+        return self.key_cache.table(point)
+
+    def multiply(self, point, scalar: int):
+        instrumentation.count("curve.multiply")
+        return glv.multiply(point, scalar)
+
+    def add(self, point_1, point_2):
+        instrumentation.count("curve.add")
+        return curve.add(point_1, point_2)
+
+    def neg(self, point):
+        instrumentation.count("curve.neg")
+        return curve.neg(point)
+
+    def eq(self, point_1, point_2) -> bool:
+        instrumentation.count("curve.eq")
+        return point_1 == point_2
+
+    def multiply_g1(self, scalar: int):
+        instrumentation.count("curve.multiply_g1")
+        return multiply_g1(scalar)
+
+    def multiply_two(self, point_1, scalar_1: int, point_2, scalar_2: int):
+        instrumentation.count("curve.multiply_two")
+        return glv.linear_combination([(self._table(point_1), scalar_1), (self._table(point_2), scalar_2)])
+
+    def msm(self, points, scalars):
+        instrumentation.count("curve.msm")
+        instrumentation.count("curve.msm_points", len(points))
+        return multi_scalar_multiply(points, scalars)
+
+    def key_msm(self, keys, key_scalars, points=(), scalars=()):
+        if self.key_cache is None or len(keys) + len(points) > KEY_COMBINATION_LIMIT:
+            return super().key_msm(keys, key_scalars, points, scalars)
+        instrumentation.count("curve.key_msm")
+        terms = [(self._table(key), scalar) for key, scalar in zip(keys, key_scalars) if key is not None]
+        return glv.linear_combination(terms + list(zip(points, scalars)))
+
+    def precompute_keys(self, keys):
+        table = FixedPointsTable(keys)
+
+        def key_product(scalars):
+            instrumentation.count("curve.fixed_msm")
+            instrumentation.count("curve.msm_points", len(scalars))
+            return table.multiply(scalars)
+        return key_product
+
+
+BACKENDS = {backend.name: backend for backend in (Bn128Backend(), JacobianBackend(KeyTableCache()))}
+DEFAULT_BACKEND = BACKENDS["jacobian"]
+
+
+def get_backend(backend=None) -> CurveBackend:
+    """
+    Resolves a backend given by name or instance.
+
+    Args:
+        backend (str | CurveBackend): Backend name from BACKENDS, a backend instance, or None for the default.
+
+    Returns:
+        CurveBackend: The backend instance.
+    """
+    if backend is None:
+        return DEFAULT_BACKEND
+    if isinstance(backend, CurveBackend):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown curve backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[backend]
@@ -0,0 +1,264 @@
+"""
+Module: curve
+This module provides the BN254 (alt_bn128) G1 arithmetic on plain integers.
+
+Points are represented as:
+    affine: tuple (x, y) of ints, None for the point at infinity. This is the compact point type
+        used internally by the signature schemes.
+    jacobian: tuple (X, Y, Z) of field elements with x = X / Z^2 and y = Y / Z^3, Z = 0 for
+        the point at infinity. Used inside multiplications, so only the final conversion back to
+        affine coordinates pays a field inversion.
+
+When gmpy2 is installed, field elements are gmpy2.mpz values, which makes modular multiplication
+faster and inversion an order of magnitude faster. Setting NR_VERIFY_NO_GMPY2 disables it.
+Affine points returned by this module always hold plain ints.
+
+Conversion from and to py_ecc points (`from_py_ecc`, `to_py_ecc`) is meant to happen only at
+the API boundary of the signature schemes. py_ecc is imported on the first `to_py_ecc`, so
+verifying compact points never loads it.
+"""
+import os
+from typing import Optional, Tuple
+
+NO_GMPY2_ENV = "NR_VERIFY_NO_GMPY2"
+
+if os.getenv(NO_GMPY2_ENV):
+    gmpy2 = None  # pylint: disable=C0103
+else:
+    try:
+        import gmpy2
+    except ImportError:
+        gmpy2 = None  # pylint: disable=C0103
+
+Point = Optional[Tuple[int, int]]
+
+FIELD_MODULUS = 0x30644E72E131A029B85045B68181585D97816A916871CA8D3C208C16D87CFD47
+CURVE_ORDER = 0x30644E72E131A029B85045B68181585D2833E84879B9709143E1F593F0000001
+CURVE_B = 3
+G1 = (1, 2)
+
+_P = gmpy2.mpz(FIELD_MODULUS) if gmpy2 else FIELD_MODULUS
+_SQRT_EXPONENT = (FIELD_MODULUS + 1) // 4
+
+
+def field(value: int):
+    """
+    Converts an int to the field element type used for internal computations.
+    """
+    return gmpy2.mpz(value) if gmpy2 else value
+
+
+def inverse(value):
+    """
+    Computes the modular inverse of a non-zero field element.
+    """
+    if gmpy2:
+        return gmpy2.invert(value, _P)
+    return pow(value, -1, FIELD_MODULUS)
+
+
+def sqrt(value: int) -> Optional[int]:
+    """
+    Computes a square root of a field element, None if it is not a quadratic residue.
+    """
+    # The field modulus is 3 mod 4, so a square root is a single exponentiation
+    if gmpy2:
+        root = int(gmpy2.powmod(value, _SQRT_EXPONENT, _P))
+    else:
+        root = pow(value, _SQRT_EXPONENT, FIELD_MODULUS)
+    return root if root * root % FIELD_MODULUS == value % FIELD_MODULUS else None
+
+
+JACOBIAN_ZERO = (field(1), field(1), field(0))
+
+
+def is_on_curve(point: Point) -> bool:
+    """
+    Checks that an affine point is the point at infinity or a canonical point on the curve y^2 = x^3 + 3.
+    """
+    if point is None:
+        return True
+    x_coord, y_coord = point
+    if not (0 <= x_coord < FIELD_MODULUS and 0 <= y_coord < FIELD_MODULUS):
+        return False
+    return (y_coord * y_coord - x_coord * x_coord * x_coord - CURVE_B) % FIELD_MODULUS == 0
+
+
+def to_jacobian(point: Point):
+    """
+    Converts an affine point to jacobian coordinates.
+    """
+    if point is None:
+        return JACOBIAN_ZERO
+    return field(point[0]), field(point[1]), field(1)
+
+
+def to_affine(point) -> Point:
+    """
+    Converts a jacobian point to affine coordinates, paying one field inversion.
+    """
+    x_coord, y_coord, z_coord = point
+    if not z_coord:
+        return None
+    z_inv = inverse(z_coord)
+    z_inv_squared = z_inv * z_inv % _P
+    return int(x_coord * z_inv_squared % _P), int(y_coord * z_inv_squared * z_inv % _P)
+
+
+def batch_to_affine(points):
+    """
+    Converts many jacobian points to affine coordinates with a single field inversion (Montgomery's trick).
+    """
+    prefix = []
+    accumulator = field(1)
+    for _, _, z_coord in points:
+        prefix.append(accumulator)
+        if z_coord:
+            accumulator = accumulator * z_coord % _P
+    accumulator_inv = inverse(accumulator)
+
+    result = [None] * len(points)
+    for i in range(len(points) - 1, -1, -1):
+        x_coord, y_coord, z_coord = points[i]
+        if not z_coord:
+            continue
+        z_inv = accumulator_inv * prefix[i] % _P
+        accumulator_inv = accumulator_inv * z_coord % _P
+        z_inv_squared = z_inv * z_inv % _P
+        result[i] = int(x_coord * z_inv_squared % _P), int(y_coord * z_inv_squared * z_inv % _P)
+    return result
+
+
+def jacobian_double(point):
+    """
+    Doubles a jacobian point.
+    """
+    x_coord, y_coord, z_coord = point
+    if not z_coord or not y_coord:
+        return JACOBIAN_ZERO
+    x_squared = x_coord * x_coord % _P
+    y_squared = y_coord * y_coord % _P
+    y_fourth = y_squared * y_squared % _P
+    double_s = 2 * ((x_coord + y_squared) ** 2 - x_squared - y_fourth) % _P
+    slope = 3 * x_squared % _P
+    new_x = (slope * slope - 2 * double_s) % _P
+    new_y = (slope * (double_s - new_x) - 8 * y_fourth) % _P
+    new_z = 2 * y_coord * z_coord % _P
+    return new_x, new_y, new_z
+
+
+def jacobian_add(point_1, point_2):
+    # pylint: disable=R0914
+    """
+    Adds two jacobian points.
+    """
+    x_1, y_1, z_1 = point_1
+    x_2, y_2, z_2 = point_2
+    if not z_1:
+        return point_2
+    if not z_2:
+        return point_1
+    z_1_squared = z_1 * z_1 % _P
+    z_2_squared = z_2 * z_2 % _P
+    u_1 = x_1 * z_2_squared % _P
+    u_2 = x_2 * z_1_squared % _P
+    s_1 = y_1 * z_2 * z_2_squared % _P
+    s_2 = y_2 * z_1 * z_1_squared % _P
+    if u_1 == u_2:
+        return jacobian_double(point_1) if s_1 == s_2 else JACOBIAN_ZERO
+    h_diff = u_2 - u_1
+    r_diff = s_2 - s_1
+    h_squared = h_diff * h_diff % _P
+    h_cubed = h_diff * h_squared % _P
+    u_1_h_squared = u_1 * h_squared % _P
+    new_x = (r_diff * r_diff - h_cubed - 2 * u_1_h_squared) % _P
+    new_y = (r_diff * (u_1_h_squared - new_x) - s_1 * h_cubed) % _P
+    new_z = h_diff * z_1 * z_2 % _P
+    return new_x, new_y, new_z
+
+
+def jacobian_add_affine(point_1, point_2):
+    # pylint: disable=R0914
+    """
+    Adds a jacobian point and a finite affine point given as field elements (mixed addition).
+    """
+    x_1, y_1, z_1 = point_1
+    x_2, y_2 = point_2
+    if not z_1:
+        return x_2, y_2, field(1)
+    z_1_squared = z_1 * z_1 % _P
+    u_2 = x_2 * z_1_squared % _P
+    s_2 = y_2 * z_1 * z_1_squared % _P
+    if x_1 == u_2:
+        return jacobian_double(point_1) if y_1 == s_2 else JACOBIAN_ZERO
+    h_diff = u_2 - x_1
+    r_diff = s_2 - y_1
+    h_squared = h_diff * h_diff % _P
+    h_cubed = h_diff * h_squared % _P
+    x_1_h_squared = x_1 * h_squared % _P
+    new_x = (r_diff * r_diff - h_cubed - 2 * x_1_h_squared) % _P
+    new_y = (r_diff * (x_1_h_squared - new_x) - y_1 * h_cubed) % _P
+    new_z = z_1 * h_diff % _P
+    return new_x, new_y, new_z
+
+
+def jacobian_multiply(point: Point, scalar: int):
+    """
+    Multiplies an affine point by a scalar with left-to-right double-and-add, returning a jacobian point.
+    """
+    scalar %= CURVE_ORDER
+    if point is None or not scalar:
+        return JACOBIAN_ZERO
+    affine = (field(point[0]), field(point[1]))
+    result = JACOBIAN_ZERO
+    for bit in bin(scalar)[2:]:
+        result = jacobian_double(result)
+        if bit == "1":
+            result = jacobian_add_affine(result, affine)
+    return result
+
+
+def multiply(point: Point, scalar: int) -> Point:
+    """
+    Computes `scalar * point`.
+    """
+    return to_affine(jacobian_multiply(point, scalar))
+
+
+def add(point_1: Point, point_2: Point) -> Point:
+    """
+    Computes `point_1 + point_2`.
+    """
+    if point_1 is None:
+        return point_2
+    if point_2 is None:
+        return point_1
+    return to_affine(jacobian_add_affine(to_jacobian(point_1), (field(point_2[0]), field(point_2[1]))))
+
+
+def neg(point: Point) -> Point:
+    """
+    Computes `-point`.
+    """
+    if point is None:
+        return None
+    return point[0], (-point[1]) % FIELD_MODULUS
+
+
+def from_py_ecc(point) -> Point:
+    """
+    Converts a py_ecc affine point (or any pair of int-convertible coordinates) to the compact point type.
+    """
+    if point is None:
+        return None
+    return int(point[0]), int(point[1])
+
+
+def to_py_ecc(point: Point):
+    """
+    Converts a compact point to a py_ecc.bn128 affine point.
+    """
+    if point is None:
+        return None
+    from py_ecc.fields import bn128_FQ  # pylint: disable=C0415
+    return bn128_FQ(point[0]), bn128_FQ(point[1])
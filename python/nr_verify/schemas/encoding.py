@@ -0,0 +1,317 @@
+"""
+Module: encoding
+This module provides a versioned binary wire format for SchnorrSignature and NodeRingSchnorr signatures.
+
+Every encoded signature (a frame) starts with a header:
+    magic b"NRSG" | version (1 byte) | kind (1 byte) | flags (1 byte)
+followed by a fixed layout body; all integers are big-endian:
+    SCHNORR_SIGNATURE: X | s
+    RING_SIGNATURE: member count (4 bytes) | new_public_key | master_sum |
+        member count times: R_i | X_i | s_i | P_i
+    RING_REFERENCE_SIGNATURE: member count (4 bytes) | ring_id (32 bytes) | new_public_key | master_sum |
+        member count times: R_i | X_i | s_i
+    (the ring keys of the latter are looked up by identifier, see the ring_registry module)
+Scalars take 32 bytes. Points take 64 bytes (x | y, all zeros for the point at infinity) or,
+with FLAG_COMPRESSED, 32 bytes: x with the parity of y in the top bit and the point at infinity
+marked by the second bit (both are free since the field modulus has 254 bits).
+
+Decoders accept any bytes-like object and read it through a memoryview, so frames can be
+parsed straight out of a large buffer (see `iter_signatures`) without copying it. Decoding is
+strict: coordinates and scalars must be canonical and points must lie on the curve, otherwise
+ValueError is raised. Decoded signatures hold compact (x, y) int points (see the curve module),
+which `SchnorrSignature.verify` and `NodeRingSchnorr.nr_verify` accept like py_ecc points.
+"""
+import struct
+from typing import Iterator, Tuple
+
+from . import curve
+
+MAGIC = b"NRSG"
+VERSION = 1
+SCHNORR_SIGNATURE = 1
+RING_SIGNATURE = 2
+RING_REFERENCE_SIGNATURE = 3
+FLAG_COMPRESSED = 0x01
+
+_HEADER = struct.Struct(">4sBBB")
+_COUNT = struct.Struct(">I")
+MAX_HEADER_SIZE = _HEADER.size + _COUNT.size
+_WORD_SIZE = 32
+_RING_ID_SIZE = 32
+_ODD_Y = 1 << 255
+_INFINITY = 1 << 254
+
+
+def point_size(compressed: bool = False) -> int:
+    """
+    Returns the number of bytes of an encoded point.
+    """
+    return _WORD_SIZE if compressed else 2 * _WORD_SIZE
+
+
+def encode_point(point, compressed: bool = False) -> bytes:
+    """
+    Encodes a py_ecc or compact affine point.
+    """
+    point = curve.from_py_ecc(point)
+    if compressed:
+        if point is None:
+            return _INFINITY.to_bytes(_WORD_SIZE, "big")
+        return (point[0] | (_ODD_Y if point[1] & 1 else 0)).to_bytes(_WORD_SIZE, "big")
+    if point is None:
+        return bytes(2 * _WORD_SIZE)
+    return (point[0] << 8 * _WORD_SIZE | point[1]).to_bytes(2 * _WORD_SIZE, "big")
+
+
+def _decompress(value: int) -> curve.Point:
+    if value == _INFINITY:
+        return None
+    x_coord = value & ~_ODD_Y
+    if x_coord >= curve.FIELD_MODULUS:
+        raise ValueError("Invalid compressed point")
+    y_coord = curve.sqrt(x_coord * x_coord * x_coord + curve.CURVE_B)
+    if y_coord is None:
+        raise ValueError("Compressed point is not on the curve")
+    if (y_coord & 1) != bool(value & _ODD_Y):
+        if not y_coord:
+            raise ValueError("Invalid compressed point")
+        y_coord = curve.FIELD_MODULUS - y_coord
+    return x_coord, y_coord
+
+
+def decode_point(buffer, offset: int = 0, compressed: bool = False) -> Tuple[curve.Point, int]:
+    """
+    Decodes a point written by `encode_point`.
+
+    Args:
+        buffer (bytes-like): Buffer holding the point.
+        offset (int): Position of the point in the buffer.
+        compressed (bool): Whether the point is compressed.
+
+    Returns:
+        tuple: The compact point and the offset just past it.
+    """
+    view = memoryview(buffer)
+    end = offset + point_size(compressed)
+    if len(view) < end:
+        raise ValueError("Truncated point")
+    if compressed:
+        return _decompress(int.from_bytes(view[offset:end], "big")), end
+    x_coord = int.from_bytes(view[offset:offset + _WORD_SIZE], "big")
+    y_coord = int.from_bytes(view[offset + _WORD_SIZE:end], "big")
+    if not x_coord and not y_coord:
+        return None, end
+    if not curve.is_on_curve((x_coord, y_coord)):
+        raise ValueError("Point is not on the curve")
+    return (x_coord, y_coord), end
+
+
+def _encode_scalar(scalar: int) -> bytes:
+    if not 0 <= scalar < curve.CURVE_ORDER:
+        raise ValueError(f"Scalar {scalar} is not reduced modulo the curve order")
+    return scalar.to_bytes(_WORD_SIZE, "big")
+
+
+def _decode_scalar(view: memoryview, offset: int) -> Tuple[int, int]:
+    scalar = int.from_bytes(view[offset:offset + _WORD_SIZE], "big")
+    if scalar >= curve.CURVE_ORDER:
+        raise ValueError("Scalar is not reduced modulo the curve order")
+    return scalar, offset + _WORD_SIZE
+
+
+def _header(kind: int, compressed: bool) -> bytes:
+    return _HEADER.pack(MAGIC, VERSION, kind, FLAG_COMPRESSED if compressed else 0)
+
+
+def encode_schnorr_signature(signature, compressed: bool = False) -> bytes:
+    """
+    Encodes a signature (X, s) as returned by `SchnorrSignature.sign`.
+    """
+    public_ephemeral_val, small_s = signature
+    return b"".join((
+        _header(SCHNORR_SIGNATURE, compressed),
+        encode_point(public_ephemeral_val, compressed),
+        _encode_scalar(small_s)
+    ))
+
+
+def encode_ring_signature(signature, compressed: bool = False) -> bytes:
+    """
+    Encodes a signature as returned by `NodeRingSchnorr.nr_sign`.
+    """
+    new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = signature
+    count = len(ext_public_keys)
+    if len(ephemeral_randomness) != count or len(sigmas) != count:
+        raise ValueError("Signature must have one randomness and one sigma per public key")
+    parts = [
+        _header(RING_SIGNATURE, compressed),
+        _COUNT.pack(count),
+        encode_point(new_public_key, compressed),
+        _encode_scalar(master_sum)
+    ]
+    for randomness, (public_ephemeral_val, small_s), ext_public_key in zip(ephemeral_randomness, sigmas,
+                                                                           ext_public_keys):
+        parts.append(encode_point(randomness, compressed))
+        parts.append(encode_point(public_ephemeral_val, compressed))
+        parts.append(_encode_scalar(small_s))
+        parts.append(encode_point(ext_public_key, compressed))
+    return b"".join(parts)
+
+
+def encode_ring_reference_signature(signature, compressed: bool = False) -> bytes:
+    """
+    Encodes a signature as returned by `NodeRingSchnorr.nr_sign_ring`.
+    """
+    ring_id, new_public_key, ephemeral_randomness, sigmas, master_sum = signature
+    if len(ring_id) != _RING_ID_SIZE:
+        raise ValueError(f"Ring identifier must have {_RING_ID_SIZE} bytes")
+    if len(sigmas) != len(ephemeral_randomness):
+        raise ValueError("Signature must have one sigma per randomness")
+    parts = [
+        _header(RING_REFERENCE_SIGNATURE, compressed),
+        _COUNT.pack(len(sigmas)),
+        bytes(ring_id),
+        encode_point(new_public_key, compressed),
+        _encode_scalar(master_sum)
+    ]
+    for randomness, (public_ephemeral_val, small_s) in zip(ephemeral_randomness, sigmas):
+        parts.append(encode_point(randomness, compressed))
+        parts.append(encode_point(public_ephemeral_val, compressed))
+        parts.append(_encode_scalar(small_s))
+    return b"".join(parts)
+
+
+def _read_header(view: memoryview, offset: int):
+    # Returns (kind, compressed, body offset, frame end) after validating the header
+    if len(view) < offset + _HEADER.size:
+        raise ValueError("Truncated signature header")
+    magic, version, kind, flags = _HEADER.unpack_from(view, offset)
+    if magic != MAGIC:
+        raise ValueError("Not an encoded signature")
+    if version != VERSION:
+        raise ValueError(f"Unsupported signature format version {version}")
+    if flags & ~FLAG_COMPRESSED:
+        raise ValueError(f"Unknown signature flags {flags:#x}")
+    compressed = bool(flags & FLAG_COMPRESSED)
+    position = offset + _HEADER.size
+    if kind == SCHNORR_SIGNATURE:
+        return kind, compressed, position, position + point_size(compressed) + _WORD_SIZE
+    if kind in (RING_SIGNATURE, RING_REFERENCE_SIGNATURE):
+        if len(view) < position + _COUNT.size:
+            raise ValueError("Truncated signature header")
+        (count,) = _COUNT.unpack_from(view, position)
+        position += _COUNT.size
+        if kind == RING_SIGNATURE:
+            member_size = 3 * point_size(compressed) + _WORD_SIZE
+            body_size = point_size(compressed) + _WORD_SIZE
+        else:
+            member_size = 2 * point_size(compressed) + _WORD_SIZE
+            body_size = _RING_ID_SIZE + point_size(compressed) + _WORD_SIZE
+        return kind, compressed, position, position + body_size + count * member_size
+    raise ValueError(f"Unknown signature kind {kind}")
+
+
+def frame_info(buffer, offset: int = 0) -> Tuple[int, bool, int]:
+    """
+    Reads the header of the encoded signature starting at `offset`.
+
+    Returns:
+        tuple: (kind, compressed, size) of the signature, size in bytes including the header.
+    """
+    kind, compressed, _, end = _read_header(memoryview(buffer), offset)
+    return kind, compressed, end - offset
+
+
+def frame_size(buffer, offset: int = 0) -> int:
+    """
+    Returns the size of the encoded signature starting at `offset`, read from its header alone.
+    """
+    return frame_info(buffer, offset)[2]
+
+
+def decode(buffer, offset: int = 0):
+    # pylint: disable=R0914
+    """
+    Decodes the signature starting at `offset`.
+
+    Args:
+        buffer (bytes-like): Buffer holding one or more encoded signatures.
+        offset (int): Position of the signature in the buffer.
+
+    Returns:
+        tuple: (kind, signature, end) with the signature kind (SCHNORR_SIGNATURE, RING_SIGNATURE or
+            RING_REFERENCE_SIGNATURE), the signature in the shape returned by `sign` / `nr_sign` /
+            `nr_sign_ring` and the offset just past it.
+    """
+    view = memoryview(buffer)
+    kind, compressed, position, end = _read_header(view, offset)
+    if len(view) < end:
+        raise ValueError("Truncated signature")
+
+    if kind == SCHNORR_SIGNATURE:
+        public_ephemeral_val, position = decode_point(view, position, compressed)
+        small_s, position = _decode_scalar(view, position)
+        return kind, (public_ephemeral_val, small_s), end
+
+    ring_id = None
+    if kind == RING_REFERENCE_SIGNATURE:
+        ring_id = bytes(view[position:position + _RING_ID_SIZE])
+        position += _RING_ID_SIZE
+    new_public_key, position = decode_point(view, position, compressed)
+    master_sum, position = _decode_scalar(view, position)
+    ephemeral_randomness = []
+    sigmas = []
+    ext_public_keys = []
+    while position < end:
+        randomness, position = decode_point(view, position, compressed)
+        public_ephemeral_val, position = decode_point(view, position, compressed)
+        small_s, position = _decode_scalar(view, position)
+        ephemeral_randomness.append(randomness)
+        sigmas.append((public_ephemeral_val, small_s))
+        if ring_id is None:
+            ext_public_key, position = decode_point(view, position, compressed)
+            ext_public_keys.append(ext_public_key)
+    if ring_id is not None:
+        return kind, (ring_id, new_public_key, ephemeral_randomness, sigmas, master_sum), end
+    return kind, (new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys), end
+
+
+def _decode_single(buffer, expected_kind: int):
+    kind, signature, end = decode(buffer)
+    if kind != expected_kind:
+        raise ValueError(f"Expected signature kind {expected_kind}, got {kind}")
+    if end != len(memoryview(buffer)):
+        raise ValueError("Trailing bytes after signature")
+    return signature
+
+
+def decode_schnorr_signature(buffer):
+    """
+    Decodes a buffer holding exactly one signature written by `encode_schnorr_signature`.
+    """
+    return _decode_single(buffer, SCHNORR_SIGNATURE)
+
+
+def decode_ring_signature(buffer):
+    """
+    Decodes a buffer holding exactly one signature written by `encode_ring_signature`.
+    """
+    return _decode_single(buffer, RING_SIGNATURE)
+
+
+def decode_ring_reference_signature(buffer):
+    """
+    Decodes a buffer holding exactly one signature written by `encode_ring_reference_signature`.
+    """
+    return _decode_single(buffer, RING_REFERENCE_SIGNATURE)
+
+
+def iter_signatures(buffer) -> Iterator[Tuple[int, tuple]]:
+    """
+    Decodes consecutive encoded signatures of a buffer, yielding (kind, signature) pairs.
+    """
+    view = memoryview(buffer)
+    offset = 0
+    while offset < len(view):
+        kind, signature, offset = decode(view, offset)
+        yield kind, signature
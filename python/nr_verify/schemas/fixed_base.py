@@ -0,0 +1,171 @@
+"""
+Module: fixed_base
+This module provides fixed-base scalar multiplication for the G1 generator.
+
+Every multiplication of a point that is known in advance (in practice the
+generator G1) can be answered from a table of precomputed multiples instead of
+running double-and-add from scratch. The scalar is split into `window`-bit
+digits and the result is the sum of one table entry per digit, so a 254-bit
+scalar costs ceil(254 / window) point additions and no doublings.
+
+Table entries are stored as affine points, so every lookup is a cheap mixed
+jacobian + affine addition (see the curve module).
+
+The process-wide G1 table is built lazily on first use. When the environment
+variable NR_VERIFY_G1_TABLE names a file, the table is loaded from it (or built
+and written there if the file does not exist yet).
+"""
+import os
+
+from . import curve
+
+G1_TABLE_ENV = "NR_VERIFY_G1_TABLE"
+
+_MAGIC = b"NRFB"
+_COORDINATE_SIZE = 32
+
+
+class FixedBaseTable:
+    """
+    Precomputed window table for multiplying one fixed point by arbitrary scalars.
+
+    Row `i` holds `j * 2^(window * i) * base` for every non-zero window digit `j`.
+    """
+
+    def __init__(self, base=curve.G1, window: int = 6, rows=None):
+        """
+        Args:
+            base (tuple): Affine point to be multiplied.
+            window (int): Number of scalar bits consumed per table row.
+            rows (list): Already computed rows, used when loading a persisted table.
+        """
+        if not 1 <= window <= 16:
+            raise ValueError("Window size must be between 1 and 16 bits")
+        self.base = curve.from_py_ecc(base)
+        self.window = window
+        self.windows = -(-curve.CURVE_ORDER.bit_length() // window)
+        self.rows = rows if rows is not None else self._build()
+
+    def _build(self):
+        points = []
+        row_base = curve.to_jacobian(self.base)
+        for _ in range(self.windows):
+            row_start = len(points)
+            points.append(row_base)
+            for _ in range(2, 1 << self.window):
+                points.append(curve.jacobian_add(points[-1], row_base))
+            # The next row starts at 2^window times the current base, i.e. one past the last entry
+            row_base = curve.jacobian_add(points[-1], points[row_start])
+
+        affine = [(curve.field(x), curve.field(y)) for x, y in curve.batch_to_affine(points)]
+        row_length = (1 << self.window) - 1
+        return [affine[i:i + row_length] for i in range(0, len(affine), row_length)]
+
+    def multiply(self, scalar: int):
+        """
+        Multiplies the base point by a scalar.
+
+        Args:
+            scalar (int): Non-negative scalar.
+
+        Returns:
+            tuple: Affine point equal to `multiply(base, scalar)`, None for the point at infinity.
+        """
+        scalar %= curve.CURVE_ORDER
+        mask = (1 << self.window) - 1
+        result = curve.JACOBIAN_ZERO
+        for row in self.rows:
+            if not scalar:
+                break
+            digit = scalar & mask
+            if digit:
+                result = curve.jacobian_add_affine(result, row[digit - 1])
+            scalar >>= self.window
+        return curve.to_affine(result)
+
+    def save(self, path: str):
+        """
+        Stores the table as a flat binary file of 32-byte big-endian affine coordinates.
+
+        Args:
+            path (str): Destination file.
+        """
+        with open(path, "wb") as file:
+            file.write(_MAGIC + bytes([self.window]))
+            for row in self.rows:
+                for x_coord, y_coord in row:
+                    file.write(int(x_coord).to_bytes(_COORDINATE_SIZE, "big"))
+                    file.write(int(y_coord).to_bytes(_COORDINATE_SIZE, "big"))
+
+    @classmethod
+    def load(cls, path: str, base=curve.G1):
+        """
+        Loads a table written by `save`.
+
+        Args:
+            path (str): Source file.
+            base (tuple): Affine point the table was built for.
+
+        Returns:
+            FixedBaseTable: The loaded table.
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a fixed-base table")
+        if len(data) <= len(_MAGIC):
+            raise ValueError(f"{path} has a truncated header")
+        window = data[len(_MAGIC)]
+        if not 1 <= window <= 16:
+            raise ValueError(f"{path} has invalid window size {window}")
+        offset = len(_MAGIC) + 1
+        row_length = (1 << window) - 1
+        windows = -(-curve.CURVE_ORDER.bit_length() // window)
+        if len(data) - offset != windows * row_length * 2 * _COORDINATE_SIZE:
+            raise ValueError(f"{path} has unexpected size for window {window}")
+
+        rows = []
+        for _ in range(windows):
+            row = []
+            for _ in range(row_length):
+                x_coord = int.from_bytes(data[offset:offset + _COORDINATE_SIZE], "big")
+                y_coord = int.from_bytes(data[offset + _COORDINATE_SIZE:offset + 2 * _COORDINATE_SIZE], "big")
+                row.append((curve.field(x_coord), curve.field(y_coord)))
+                offset += 2 * _COORDINATE_SIZE
+            rows.append(row)
+        table = cls(base, window, rows)
+        if table.multiply(1) != curve.from_py_ecc(base):
+            raise ValueError(f"{path} was not built for the requested base point")
+        return table
+
+
+_G1_TABLE = None
+
+
+def g1_table() -> FixedBaseTable:
+    """
+    Returns the process-wide G1 table, building or loading it on first use.
+    """
+    global _G1_TABLE  # pylint: disable=W0603
+    if _G1_TABLE is None:
+        path = os.getenv(G1_TABLE_ENV)
+        if path and os.path.exists(path):
+            _G1_TABLE = FixedBaseTable.load(path)
+        else:
+            _G1_TABLE = FixedBaseTable()
+            if path:
+                _G1_TABLE.save(path)
+    return _G1_TABLE
+
+
+def multiply_g1(scalar: int):
+    """
+    Computes `scalar * G1` using the precomputed G1 table.
+
+    Args:
+        scalar (int): Non-negative scalar.
+
+    Returns:
+        tuple: Affine point, equal to `py_ecc.bn128.multiply(G1, scalar)`.
+    """
+    return g1_table().multiply(scalar)
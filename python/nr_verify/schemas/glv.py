@@ -0,0 +1,173 @@
+"""
+Module: glv
+This module provides variable-base scalar multiplication with the GLV method.
+
+BN254 has the efficient endomorphism phi(x, y) = (BETA * x, y), which acts on G1 as
+multiplication by LAMBDA. A 254-bit scalar k is decomposed as k = k1 + k2 * LAMBDA (mod n)
+with |k1|, |k2| of about 127 bits, so k * P = k1 * P + k2 * phi(P) needs only half the
+doublings. Both halves are recoded in width-w NAF, which keeps the precomputed tables
+small (odd multiples only) and the additions sparse; the table for phi(P) is obtained
+from the table for P by multiplying x coordinates with BETA.
+
+`linear_combination` interleaves any number of such multiplications in one doubling chain
+(Shamir's trick), which is what the Schnorr check X = s * G - h * A needs.
+Points are affine (x, y) int tuples, None for the point at infinity (see the curve module).
+"""
+from . import curve
+
+BETA = 0x59E26BCEA0D48BACD4F263F1ACDB5C4F5763473177FFFFFE
+LAMBDA = 0xB3C4D79D41A917585BFC41088D8DAAA78B17EA66B99C90DD
+
+# Short basis (a1, b1), (a2, b2) of the lattice {(a, b): a + b * LAMBDA = 0 mod n},
+# obtained from the extended Euclidean algorithm on (n, LAMBDA)
+_A1 = 0x89D3256894D213E3
+_B1 = -0x6F4D8248EEB859FC8211BBEB7D4F1128
+_A2 = 0x6F4D8248EEB859FD0BE4E1541221250B
+_B2 = 0x89D3256894D213E3
+
+WINDOW = 5
+G1_WINDOW = 8
+
+
+def decompose(scalar: int):
+    """
+    Splits a scalar into (k1, k2) with k1 + k2 * LAMBDA = scalar (mod n) and |k1|, |k2| < 2^128.
+    """
+    scalar %= curve.CURVE_ORDER
+    order = curve.CURVE_ORDER
+    c_1 = (2 * _B2 * scalar + order) // (2 * order)
+    c_2 = (-2 * _B1 * scalar + order) // (2 * order)
+    return scalar - c_1 * _A1 - c_2 * _A2, -c_1 * _B1 - c_2 * _B2
+
+
+def wnaf(scalar: int, window: int):
+    """
+    Recodes a non-negative scalar in width-`window` NAF, least significant digit first.
+
+    Every digit is zero or odd with absolute value below 2^(window - 1), and of any
+    `window` consecutive digits at most one is non-zero.
+    """
+    digits = []
+    modulus = 1 << window
+    half = modulus >> 1
+    while scalar:
+        if scalar & 1:
+            digit = scalar & (modulus - 1)
+            if digit >= half:
+                digit -= modulus
+            scalar -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        scalar >>= 1
+    return digits
+
+
+def odd_multiples(point: curve.Point, window: int):
+    """
+    Computes the affine odd multiples P, 3P, ..., (2^(window - 1) - 1)P used by wNAF digits.
+    """
+    base = curve.to_jacobian(point)
+    double = curve.jacobian_double(base)
+    multiples = [base]
+    for _ in range(1, 1 << (window - 2)):
+        multiples.append(curve.jacobian_add(multiples[-1], double))
+    return curve.batch_to_affine(multiples)
+
+
+def endomorphism_table(table):
+    """
+    Maps a table of multiples of P to the same multiples of phi(P).
+    """
+    return [(BETA * x_coord % curve.FIELD_MODULUS, y_coord) for x_coord, y_coord in table]
+
+
+def _signed_entries(table):
+    # Every entry holds the field elements of the point and of its negation
+    return [
+        ((curve.field(x_coord), curve.field(y_coord)),
+         (curve.field(x_coord), curve.field(curve.FIELD_MODULUS - y_coord)))
+        for x_coord, y_coord in table
+    ]
+
+
+class GlvTable:  # pylint: disable=R0903
+    """
+    Precomputed wNAF tables of a point P and of phi(P), reusable across multiplications of P.
+    """
+
+    def __init__(self, point: curve.Point, window: int = WINDOW):
+        self.point = point
+        self.window = window
+        table = odd_multiples(point, window)
+        self.entries = _signed_entries(table)
+        self.phi_entries = _signed_entries(endomorphism_table(table))
+
+    def multiply(self, scalar: int) -> curve.Point:
+        """
+        Computes `scalar * point` from the precomputed tables.
+        """
+        return linear_combination([(self, scalar)])
+
+
+_G1_TABLE = None
+
+
+def g1_glv_table() -> GlvTable:
+    """
+    Returns the process-wide GLV table of the generator, built with a wider window on first use.
+    """
+    global _G1_TABLE  # pylint: disable=W0603
+    if _G1_TABLE is None:
+        _G1_TABLE = GlvTable(curve.G1, G1_WINDOW)
+    return _G1_TABLE
+
+
+def linear_combination(terms):
+    """
+    Computes `sum(scalar * point)` for a few (point, scalar) terms with GLV, wNAF and Shamir's trick.
+
+    Args:
+        terms (list): Pairs (point, scalar); point may also be a GlvTable built in advance.
+
+    Returns:
+        tuple: Affine point, None for the point at infinity.
+    """
+    expansions = []
+    for point, scalar in terms:
+        table = point if isinstance(point, GlvTable) else None
+        if table is None:
+            if point is None or not scalar % curve.CURVE_ORDER:
+                continue
+            table = GlvTable(point)
+        k_1, k_2 = decompose(scalar)
+        for half, entries in ((k_1, table.entries), (k_2, table.phi_entries)):
+            if half:
+                expansions.append((wnaf(abs(half), table.window), entries, half < 0))
+
+    result = curve.JACOBIAN_ZERO
+    for i in range(max((len(digits) for digits, _, _ in expansions), default=0) - 1, -1, -1):
+        result = curve.jacobian_double(result)
+        for digits, entries, negated in expansions:
+            if i < len(digits) and digits[i]:
+                digit = digits[i]
+                result = curve.jacobian_add_affine(result, entries[abs(digit) >> 1][(digit < 0) != negated])
+    return curve.to_affine(result)
+
+
+def multiply(point: curve.Point, scalar: int) -> curve.Point:
+    """
+    Computes `scalar * point` with GLV decomposition and wNAF recoding.
+    """
+    return linear_combination([(point, scalar)])
+
+
+def multiply_two(point_1: curve.Point, scalar_1: int, point_2: curve.Point, scalar_2: int) -> curve.Point:
+    """
+    Computes `scalar_1 * point_1 + scalar_2 * point_2` in one doubling chain (Shamir's trick).
+    The generator G1 uses its cached wide-window table.
+    """
+    terms = []
+    for point, scalar in ((point_1, scalar_1), (point_2, scalar_2)):
+        terms.append((g1_glv_table() if point == curve.G1 else point, scalar))
+    return linear_combination(terms)
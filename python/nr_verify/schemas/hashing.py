@@ -0,0 +1,99 @@
+"""
+Module: hashing
+This module provides the hash-to-scalar pipeline used by the signature schemes.
+
+Every value hashed by SchnorrSignature and NodeRingSchnorr (and by the contracts in
+`contracts/`) is a uint256, for which Solidity's `abi.encodePacked` is simply the
+concatenation of 32-byte big-endian words. `pack_uint256` produces exactly those bytes
+by joining one fixed-width int-to-bytes conversion per value instead of dispatching through eth_abi.
+
+`PrefixedHasher` packs leading values that repeat across many hashes (e.g. the message
+in the ring hashes) once and reuses the bytes for every hash.
+"""
+from Crypto.Hash import keccak
+
+from . import instrumentation
+from .curve import CURVE_ORDER
+
+WORD_SIZE = 32
+_UINT256_LIMIT = 1 << 8 * WORD_SIZE
+
+
+def pack_uint256(*values) -> bytes:
+    """
+    Packs uint256 values like Solidity's `abi.encodePacked`.
+
+    Args:
+        values (int): Integers in range [0, 2^256).
+
+    Returns:
+        bytes: 32-byte big-endian words, one per value.
+    """
+    instrumentation.count("encode")
+    for value in values:
+        if not 0 <= value < _UINT256_LIMIT:
+            raise ValueError(f"Value {value} does not fit in uint256")
+    return b"".join(value.to_bytes(WORD_SIZE, "big") for value in values)
+
+
+def keccak256(data: bytes) -> bytes:
+    """
+    Computes the keccak256 hash of a byte string in a single call.
+    """
+    instrumentation.count("hash")
+    instrumentation.count("hash_bytes", len(data))
+    return keccak.new(digest_bits=256, data=data).digest()
+
+
+def bytes_to_scalar(data: bytes) -> int:
+    """
+    Computes `uint256(keccak256(data)) % GEN_ORDER` for already packed data.
+    """
+    return int.from_bytes(keccak256(data), "big") % CURVE_ORDER
+
+
+def chunks_to_scalar(chunks) -> int:
+    """
+    Computes `bytes_to_scalar` of the concatenation of byte chunks, hashing them incrementally
+    instead of joining them first.
+    """
+    hasher = keccak.new(digest_bits=256)
+    instrumentation.count("hash")
+    for chunk in chunks:
+        instrumentation.count("hash_bytes", len(chunk))
+        hasher.update(chunk)
+    return int.from_bytes(hasher.digest(), "big") % CURVE_ORDER
+
+
+def hash_to_scalar(*values) -> int:
+    """
+    Computes `uint256(keccak256(abi.encodePacked(values))) % GEN_ORDER`.
+
+    Args:
+        values (int): Integers in range [0, 2^256).
+
+    Returns:
+        int: The hash reduced modulo the curve order.
+    """
+    return bytes_to_scalar(pack_uint256(*values))
+
+
+class PrefixedHasher:  # pylint: disable=R0903
+    """
+    Hash-to-scalar for inputs sharing the same leading values.
+
+    `PrefixedHasher(message).hash_to_scalar(*values)` equals `hash_to_scalar(message, *values)`.
+    """
+
+    def __init__(self, *prefix):
+        """
+        Args:
+            prefix (int): Leading uint256 values of every hashed input.
+        """
+        self.prefix = pack_uint256(*prefix)
+
+    def hash_to_scalar(self, *values) -> int:
+        """
+        Computes `hash_to_scalar(*prefix, *values)`.
+        """
+        return bytes_to_scalar(self.prefix + pack_uint256(*values))
@@ -0,0 +1,162 @@
+"""
+Module: instrumentation
+This module provides optional operation counters and phase timers for the signature schemes.
+
+When enabled, the curve backends count their operations ("curve.multiply", "curve.add",
+"curve.msm_points", ...), the hashing helpers count hashes and hashed bytes ("hash",
+"hash_bytes", "encode") and NodeRingSchnorr records the wall time of the numbered steps of
+`nr_sign` and of the phases of `nr_verify`. Everything is collected into the active `Metrics`,
+which can be exported as a dict or in the Prometheus text format.
+
+Instrumentation is disabled by default, in which case every hook is a single None check.
+It is enabled with `enable()`, or at import time by setting NR_VERIFY_INSTRUMENT.
+`collect()` gathers the metrics of a single block, e.g. of one slow verification.
+Work done in worker processes (see the parallel module) is not counted.
+"""
+import contextlib
+import os
+import time
+from typing import Optional
+
+INSTRUMENT_ENV = "NR_VERIFY_INSTRUMENT"
+
+
+class Metrics:
+    """
+    Operation counters and per-phase call counts and wall times.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.phases = {}
+
+    def count(self, name: str, amount: int = 1):
+        """
+        Adds `amount` to the counter `name`.
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Context manager adding the wall time of its block to the phase `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_phase(name, 1, time.perf_counter() - start)
+
+    def _add_phase(self, name: str, calls: int, seconds: float):
+        entry = self.phases.setdefault(name, [0, 0.0])
+        entry[0] += calls
+        entry[1] += seconds
+
+    def merge(self, other: "Metrics"):
+        """
+        Adds the counters and phases of another Metrics instance.
+        """
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+        for name, (calls, seconds) in other.phases.items():
+            self._add_phase(name, calls, seconds)
+
+    def reset(self):
+        """
+        Clears all counters and phases.
+        """
+        self.counters.clear()
+        self.phases.clear()
+
+    def as_dict(self) -> dict:
+        """
+        Returns {"counters": {name: count}, "phases": {name: {"calls": int, "seconds": float}}}.
+        """
+        return {
+            "counters": dict(sorted(self.counters.items())),
+            "phases": {
+                name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in sorted(self.phases.items())
+            }
+        }
+
+    def to_prometheus(self, prefix: str = "nr_verify") -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = [f"# TYPE {prefix}_operations_total counter"]
+        lines += [f'{prefix}_operations_total{{operation="{name}"}} {amount}'
+                  for name, amount in sorted(self.counters.items())]
+        lines.append(f"# TYPE {prefix}_phase_calls_total counter")
+        lines += [f'{prefix}_phase_calls_total{{phase="{name}"}} {calls}'
+                  for name, (calls, _) in sorted(self.phases.items())]
+        lines.append(f"# TYPE {prefix}_phase_seconds_total counter")
+        lines += [f'{prefix}_phase_seconds_total{{phase="{name}"}} {seconds!r}'
+                  for name, (_, seconds) in sorted(self.phases.items())]
+        return "\n".join(lines) + "\n"
+
+
+_ACTIVE: Optional[Metrics] = None
+_DISABLED_PHASE = contextlib.nullcontext()
+
+
+def enable(metrics: Metrics = None) -> Metrics:
+    """
+    Enables instrumentation, collecting into `metrics` (a new instance when omitted).
+    """
+    global _ACTIVE  # pylint: disable=W0603
+    _ACTIVE = metrics if metrics is not None else Metrics()
+    return _ACTIVE
+
+
+def disable() -> Optional[Metrics]:
+    """
+    Disables instrumentation, returning the metrics collected so far.
+    """
+    global _ACTIVE  # pylint: disable=W0603
+    metrics, _ACTIVE = _ACTIVE, None
+    return metrics
+
+
+def active() -> Optional[Metrics]:
+    """
+    Returns the metrics being collected, None when instrumentation is disabled.
+    """
+    return _ACTIVE
+
+
+def count(name: str, amount: int = 1):
+    """
+    Adds `amount` to the counter `name` if instrumentation is enabled.
+    """
+    if _ACTIVE is not None:
+        _ACTIVE.count(name, amount)
+
+
+def phase(name: str):
+    """
+    Returns a context manager timing its block as phase `name` if instrumentation is enabled.
+    """
+    if _ACTIVE is None:
+        return _DISABLED_PHASE
+    return _ACTIVE.phase(name)
+
+
+@contextlib.contextmanager
+def collect():
+    """
+    Collects the metrics of a block into a fresh Metrics instance, which is added to the
+    enclosing metrics (if instrumentation was enabled) when the block ends.
+    """
+    global _ACTIVE  # pylint: disable=W0603
+    outer = _ACTIVE
+    metrics = _ACTIVE = Metrics()
+    try:
+        yield metrics
+    finally:
+        _ACTIVE = outer
+        if outer is not None:
+            outer.merge(metrics)
+
+
+if os.getenv(INSTRUMENT_ENV):
+    enable()
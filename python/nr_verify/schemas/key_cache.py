@@ -0,0 +1,118 @@
+"""
+Module: key_cache
+This module provides a bounded cache of GLV precomputation tables for long-lived public keys.
+
+Ring members are a fairly stable set of node keys, so the same points are multiplied over and
+over during signing and verification. `KeyTableCache` keeps the wNAF tables of P and phi(P)
+(see the glv module) for the most recently used keys, so a multiplication of a cached key skips
+building them. Tables are evicted in least recently used order once their estimated memory
+exceeds the cap.
+
+The cache is shared between threads. A pickled cache (e.g. a backend sent to a worker process)
+keeps its settings but not its tables.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+from . import glv, instrumentation
+
+DEFAULT_MAX_BYTES = 32 << 20
+
+
+def table_bytes(table: glv.GlvTable) -> int:
+    """
+    Estimates the memory held by a GLV table.
+    """
+    size = sys.getsizeof(table.entries) + sys.getsizeof(table.phi_entries)
+    for entries in (table.entries, table.phi_entries):
+        for pair in entries:
+            size += sys.getsizeof(pair)
+            for x_coord, y_coord in pair:
+                size += sys.getsizeof(x_coord) + sys.getsizeof(y_coord) + sys.getsizeof((x_coord, y_coord))
+    return size
+
+
+class KeyTableCache:  # pylint: disable=R0902
+    """
+    LRU cache of GLV tables keyed by affine point, bounded by estimated memory.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, window: int = glv.WINDOW):
+        """
+        Args:
+            max_bytes (int): Memory cap of the cached tables.
+            window (int): wNAF window of the tables.
+        """
+        if max_bytes < 0:
+            raise ValueError("Memory cap must not be negative")
+        self.max_bytes = max_bytes
+        self.window = window
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def table(self, point) -> glv.GlvTable:
+        """
+        Returns the table of a point, building and caching it on a miss.
+        """
+        with self._lock:
+            entry = self._tables.get(point)
+            if entry is not None:
+                self._tables.move_to_end(point)
+                self.hits += 1
+                instrumentation.count("key_cache.hit")
+                return entry[0]
+            self.misses += 1
+        instrumentation.count("key_cache.miss")
+
+        table = glv.GlvTable(point, self.window)
+        size = table_bytes(table)
+        with self._lock:
+            if point not in self._tables and size <= self.max_bytes:
+                self._tables[point] = (table, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted_size) = self._tables.popitem(last=False)
+                    self.bytes -= evicted_size
+                    self.evictions += 1
+        return table
+
+    def stats(self) -> dict:
+        """
+        Returns hits, misses, evictions, hit rate, number of cached tables and their estimated memory.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._tables),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        """
+        Drops every cached table and resets the statistics.
+        """
+        with self._lock:
+            self._tables.clear()
+            self.bytes = self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._tables)
+
+    def __contains__(self, point):
+        return point in self._tables
+
+    def __getstate__(self):
+        return {"max_bytes": self.max_bytes, "window": self.window}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_bytes"], state["window"])  # pylint: disable=C2801
@@ -0,0 +1,188 @@
+"""
+Module: key_store
+This module provides a file-backed store of public keys for very large rings.
+
+A key store file is a plain array of fixed-width records, one per key: the 32-byte big-endian
+x coordinate followed by the 32-byte y coordinate, i.e. `abi.encodePacked(x, y)`. `KeyStore`
+maps the file with mmap and reads keys lazily, so a ring costs a few pages of page cache instead
+of a Python tuple per key. Slicing a store, or leaving out one key with `without`, returns a view
+sharing the same mapping.
+
+NodeRingSchnorr accepts a store (containing the signer's key) in place of the list of external
+public keys and then reads the keys in chunks of `chunk_size` keys. Stores are picklable; an
+unpickled store (e.g. in a worker process) maps the file again.
+
+Keys are validated by `write_key_store`, not when they are read.
+"""
+import mmap
+import os
+from typing import Iterator, List, Tuple
+
+from . import curve
+from .hashing import WORD_SIZE
+
+RECORD_SIZE = 2 * WORD_SIZE
+DEFAULT_CHUNK_SIZE = 4096
+
+
+def _encode_key(point) -> bytes:
+    return point[0].to_bytes(WORD_SIZE, "big") + point[1].to_bytes(WORD_SIZE, "big")
+
+
+def write_key_store(path, keys) -> int:
+    """
+    Writes public keys (py_ecc or compact points) to a key store file.
+
+    Returns:
+        int: The number of keys written.
+    """
+    count = 0
+    with open(path, "wb") as file:
+        for key in keys:
+            point = curve.from_py_ecc(key)
+            if point is None or not curve.is_on_curve(point):
+                raise ValueError(f"Key {point} is not a valid curve point")
+            file.write(_encode_key(point))
+            count += 1
+    return count
+
+
+class KeyStore:
+    """
+    Read-only sequence of compact public keys backed by a memory-mapped key store file.
+    """
+
+    def __init__(self, path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            path (str): Key store file, see `write_key_store`.
+            chunk_size (int): Number of keys read at once by `iter_chunks`.
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive")
+        self.path = os.fspath(path)
+        self.chunk_size = chunk_size
+        with open(self.path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size % RECORD_SIZE:
+                raise ValueError(f"Key store size {size} is not a multiple of {RECORD_SIZE} bytes")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._set_ranges([(0, size // RECORD_SIZE)] if size else [])
+
+    def _set_ranges(self, ranges: List[Tuple[int, int]]):
+        # The keys of a store are the records of its (start, stop) ranges, in order
+        self._ranges = [(start, stop) for start, stop in ranges if start < stop]
+        self._length = sum(stop - start for start, stop in self._ranges)
+
+    def _view(self, ranges: List[Tuple[int, int]]) -> "KeyStore":
+        view = object.__new__(KeyStore)
+        view.path = self.path
+        view.chunk_size = self.chunk_size
+        view._map = self._map  # pylint: disable=W0212
+        view._set_ranges(ranges)  # pylint: disable=W0212
+        return view
+
+    def _slice_ranges(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        ranges = []
+        offset = 0
+        for range_start, range_stop in self._ranges:
+            length = range_stop - range_start
+            low = max(start - offset, 0)
+            high = min(stop - offset, length)
+            if low < high:
+                ranges.append((range_start + low, range_start + high))
+            offset += length
+        return ranges
+
+    def _read(self, start: int, stop: int) -> List[curve.Point]:
+        view = memoryview(self._map)
+        return [
+            (int.from_bytes(view[offset:offset + WORD_SIZE], "big"),
+             int.from_bytes(view[offset + WORD_SIZE:offset + RECORD_SIZE], "big"))
+            for offset in range(start * RECORD_SIZE, stop * RECORD_SIZE, RECORD_SIZE)
+        ]
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                raise ValueError("Key store slices must be contiguous")
+            return self._view(self._slice_ranges(start, stop))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Key store index out of range")
+        start = self._slice_ranges(index, index + 1)[0][0]
+        return self._read(start, start + 1)[0]
+
+    def __iter__(self):
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+    def without(self, position: int) -> "KeyStore":
+        """
+        Returns a view of the store leaving out the key at `position`.
+        """
+        if not 0 <= position < self._length:
+            raise IndexError("Key store index out of range")
+        return self._view(self._slice_ranges(0, position) + self._slice_ranges(position + 1, self._length))
+
+    def iter_chunks(self) -> Iterator[List[curve.Point]]:
+        """
+        Yields the keys in order, as lists of at most `chunk_size` compact points.
+        """
+        for start, stop in self._ranges:
+            for chunk_start in range(start, stop, self.chunk_size):
+                yield self._read(chunk_start, min(chunk_start + self.chunk_size, stop))
+
+    def coordinate_words(self) -> Iterator[bytes]:
+        """
+        Yields `abi.encodePacked` of all x coordinates followed by all y coordinates, in chunks.
+        """
+        view = memoryview(self._map)
+        for word_offset in (0, WORD_SIZE):
+            for start, stop in self._ranges:
+                for chunk_start in range(start, stop, self.chunk_size):
+                    chunk_stop = min(chunk_start + self.chunk_size, stop)
+                    yield b"".join(view[offset:offset + WORD_SIZE] for offset in range(
+                        chunk_start * RECORD_SIZE + word_offset, chunk_stop * RECORD_SIZE, RECORD_SIZE))
+
+    def position(self, key) -> int:
+        """
+        Returns the position of a public key in the store, raising ValueError if it is not stored.
+        """
+        point = curve.from_py_ecc(key)
+        if point is not None:
+            record = _encode_key(point)
+            offset = 0
+            for start, stop in self._ranges:
+                found = self._map.find(record, start * RECORD_SIZE, stop * RECORD_SIZE)
+                while found != -1 and found % RECORD_SIZE:
+                    found = self._map.find(record, found + 1, stop * RECORD_SIZE)
+                if found != -1:
+                    return offset + found // RECORD_SIZE - start
+                offset += stop - start
+        raise ValueError("Public key is not in the key store")
+
+    def close(self):
+        """
+        Unmaps the file, invalidating every view of it.
+        """
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        return {"path": self.path, "chunk_size": self.chunk_size, "ranges": self._ranges}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["chunk_size"])  # pylint: disable=C2801
+        self._set_ranges(state["ranges"])
@@ -0,0 +1,201 @@
+"""
+Module: msm
+This module provides multi-scalar multiplication, i.e. computing
+`scalars[0] * points[0] + ... + scalars[n - 1] * points[n - 1]` at once.
+
+Two algorithms are implemented on jacobian coordinates (see the curve module):
+    straus(points, scalars): interleaved window method, best for a handful of points.
+    pippenger(points, scalars): bucket method, best for large inputs.
+
+`multi_scalar_multiply` picks between them based on the number of points.
+`FixedPointsTable` precomputes a fixed set of points for many multiplications by changing scalars.
+Inputs and output are affine points, i.e. (x, y) pairs with None for the point at infinity.
+"""
+from . import curve
+
+STRAUS_WINDOW = 4
+PIPPENGER_THRESHOLD = 64
+
+_SCALAR_BITS = curve.CURVE_ORDER.bit_length()
+
+
+def _prepare(points, scalars):
+    if len(points) != len(scalars):
+        raise ValueError("Number of points and scalars must be equal")
+    pairs = []
+    for point, scalar in zip(points, scalars):
+        scalar %= curve.CURVE_ORDER
+        if point is not None and scalar:
+            pairs.append(((curve.field(int(point[0])), curve.field(int(point[1]))), scalar))
+    return pairs
+
+
+def _double_times(point, count):
+    for _ in range(count):
+        point = curve.jacobian_double(point)
+    return point
+
+
+def straus(points, scalars, window: int = STRAUS_WINDOW):
+    """
+    Computes the multi-scalar multiplication with Straus' interleaved window method.
+
+    Args:
+        points (list): Affine points (None stands for the point at infinity).
+        scalars (list): Integer scalars, reduced modulo the curve order.
+        window (int): Number of scalar bits processed per step.
+
+    Returns:
+        tuple: Affine point, None for the point at infinity.
+    """
+    pairs = _prepare(points, scalars)
+    mask = (1 << window) - 1
+    multiples = []
+    for point, _ in pairs:
+        multiples.append(curve.to_jacobian(point))
+        for _ in range(2, 1 << window):
+            multiples.append(curve.jacobian_add_affine(multiples[-1], point))
+    # Normalizing all precomputed multiples at once lets the main loop use mixed additions
+    multiples = [(curve.field(x), curve.field(y)) for x, y in curve.batch_to_affine(multiples)]
+    tables = [multiples[i:i + mask] for i in range(0, len(multiples), mask)]
+
+    result = curve.JACOBIAN_ZERO
+    for shift in range(-(-_SCALAR_BITS // window) * window - window, -1, -window):
+        result = _double_times(result, window)
+        for table, (_, scalar) in zip(tables, pairs):
+            digit = (scalar >> shift) & mask
+            if digit:
+                result = curve.jacobian_add_affine(result, table[digit - 1])
+    return curve.to_affine(result)
+
+
+def pippenger_window(count: int) -> int:
+    """
+    Returns the bucket window size used by `pippenger` for the given number of points.
+    """
+    return max(2, min(16, count.bit_length() - 2))
+
+
+def pippenger(points, scalars, window: int = None):
+    """
+    Computes the multi-scalar multiplication with Pippenger's bucket method.
+
+    Args:
+        points (list): Affine points (None stands for the point at infinity).
+        scalars (list): Integer scalars, reduced modulo the curve order.
+        window (int): Bucket window size, chosen from the number of points when omitted.
+
+    Returns:
+        tuple: Affine point, None for the point at infinity.
+    """
+    pairs = _prepare(points, scalars)
+    if window is None:
+        window = pippenger_window(len(pairs))
+    mask = (1 << window) - 1
+
+    result = curve.JACOBIAN_ZERO
+    for shift in range(-(-_SCALAR_BITS // window) * window - window, -1, -window):
+        result = _double_times(result, window)
+        buckets = [curve.JACOBIAN_ZERO] * mask
+        for point, scalar in pairs:
+            digit = (scalar >> shift) & mask
+            if digit:
+                buckets[digit - 1] = curve.jacobian_add_affine(buckets[digit - 1], point)
+        # sum_j j * bucket_j computed as a sum of running suffix sums
+        running = curve.JACOBIAN_ZERO
+        window_sum = curve.JACOBIAN_ZERO
+        for bucket in reversed(buckets):
+            running = curve.jacobian_add(running, bucket)
+            window_sum = curve.jacobian_add(window_sum, running)
+        result = curve.jacobian_add(result, window_sum)
+    return curve.to_affine(result)
+
+
+def fixed_points_window(count: int) -> int:
+    """
+    Returns the bucket window size used by `FixedPointsTable` for the given number of points,
+    i.e. the one minimizing the number of additions of `FixedPointsTable.multiply`.
+    """
+    return min(range(2, 17), key=lambda window: count * -(-_SCALAR_BITS // window) + (2 << window))
+
+
+class FixedPointsTable:
+    """
+    Precomputed multi-scalar multiplication of a fixed list of points by changing scalars.
+
+    Every point is stored shifted to every bucket window, `2^(window * j) * point`, so `multiply`
+    sorts the digits of all windows into one set of buckets: unlike `pippenger`, it does no
+    doublings and a single bucket reduction. The table holds ceil(254 / window) affine points
+    per point.
+    """
+
+    def __init__(self, points, window: int = None):
+        """
+        Args:
+            points (list): Affine points (None stands for the point at infinity).
+            window (int): Bucket window size, chosen from the number of points when omitted.
+        """
+        points = list(points)
+        self.window = fixed_points_window(len(points)) if window is None else window
+        windows = -(-_SCALAR_BITS // self.window)
+        shifted = []
+        for point in points:
+            current = curve.to_jacobian(point)
+            for _ in range(windows):
+                shifted.append(current)
+                current = _double_times(current, self.window)
+        affine = [None if point is None else (curve.field(point[0]), curve.field(point[1]))
+                  for point in curve.batch_to_affine(shifted)]
+        self.rows = [affine[i:i + windows] if point is not None else None
+                     for i, point in zip(range(0, len(affine), windows), points)]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def multiply(self, scalars):
+        """
+        Computes `sum(scalar * point)` over the points of the table and the given scalars.
+
+        Args:
+            scalars (list): Integer scalars, one per point, reduced modulo the curve order.
+
+        Returns:
+            tuple: Affine point, None for the point at infinity.
+        """
+        if len(scalars) != len(self.rows):
+            raise ValueError("Number of points and scalars must be equal")
+        mask = (1 << self.window) - 1
+        buckets = [curve.JACOBIAN_ZERO] * mask
+        for row, scalar in zip(self.rows, scalars):
+            if row is None:
+                continue
+            scalar %= curve.CURVE_ORDER
+            for shifted in row:
+                if not scalar:
+                    break
+                digit = scalar & mask
+                if digit:
+                    buckets[digit - 1] = curve.jacobian_add_affine(buckets[digit - 1], shifted)
+                scalar >>= self.window
+        running = curve.JACOBIAN_ZERO
+        result = curve.JACOBIAN_ZERO
+        for bucket in reversed(buckets):
+            running = curve.jacobian_add(running, bucket)
+            result = curve.jacobian_add(result, running)
+        return curve.to_affine(result)
+
+
+def multi_scalar_multiply(points, scalars):
+    """
+    Computes `sum(scalar * point)` over the given points and scalars.
+
+    Args:
+        points (list): Affine points (None stands for the point at infinity).
+        scalars (list): Integer scalars, reduced modulo the curve order.
+
+    Returns:
+        tuple: Affine point, equal to adding up `py_ecc.bn128.multiply` results.
+    """
+    if len(points) < PIPPENGER_THRESHOLD:
+        return straus(points, scalars)
+    return pippenger(points, scalars)
@@ -3,51 +3,229 @@ Module: node_ring_schnorr
 This module provides implementation for NodeRingSchnorr signature algorithm.
 """
 
-import random
-
-from py_ecc.bn128 import multiply, add, G1, neg, eq
+import itertools
+import secrets
+from typing import Iterable, List, Tuple
 
+from . import instrumentation, prechecks
+from .backends import get_backend
+from .curve import from_py_ecc, to_py_ecc
+from .hashing import PrefixedHasher, chunks_to_scalar, pack_uint256
+from .key_store import KeyStore
+from .nonces import nonce_source
+from .parallel import DEFAULT_MIN_CHUNK_SIZE, MemberPool
+from .prechecks import EQUATION, STRUCTURE, SignatureRejected, Verdict
+from .ring_registry import Ring, RingRegistry
 from .schnorr_signature import SchnorrSignature
-from .util import keccak256, encode_packed, randsn, addmodn, curve_order
+from .util import addmodn, curve_order
+from .verify_cache import VerificationCache, ring_key
+
+
+def _member_hash(message_hasher: PrefixedHasher, randomness, sigma) -> int:
+    # h_i = Hash(message, R_i, X_i, s_i), with the message already packed into the hasher
+    public_ephemeral_val, small_s = sigma
+    return message_hasher.hash_to_scalar(
+        randomness[0],
+        randomness[1],
+        public_ephemeral_val[0],
+        public_ephemeral_val[1],
+        small_s
+    )
+
+
+def _sign_member_values(backend, new_private_key, message_hasher, random_values, nonces):
+    """
+    Computes R_i = r_i * G, the inner signature (X_i, s_i) over R_i and the hash h_i for a chunk of ring members.
+    """
+    schnorr = SchnorrSignature(backend)
+    ephemeral_randomness = []
+    sigmas = []
+    hashes = []
+    for random_value, nonce in zip(random_values, nonces):
+        randomness = backend.multiply_g1(random_value)
+        _, sigma = schnorr.sign_native(new_private_key, randomness[0] + randomness[1], nonce)
+        ephemeral_randomness.append(randomness)
+        sigmas.append(sigma)
+        hashes.append(_member_hash(message_hasher, randomness, sigma))
+    return ephemeral_randomness, sigmas, hashes
+
+
+def _sign_members(backend, new_private_key, message_hasher, ext_public_keys, random_values, nonces):
+    # pylint: disable=R0913,R0917
+    """
+    Computes the values of `_sign_member_values` and the partial product sum(-h_i * P_i) for a chunk of ring members.
+    """
+    ephemeral_randomness, sigmas, hashes = _sign_member_values(
+        backend, new_private_key, message_hasher, random_values, nonces)
+    # product = sum(-h_i * P_i), computed as one multi-scalar multiplication over the ring keys
+    product = _keys_msm(backend, ext_public_keys, [-hash_ for hash_ in hashes])
+    return ephemeral_randomness, sigmas, product
+
+
+def _keys_msm(backend, keys, scalars):
+    """
+    Computes `backend.key_msm(keys, scalars)`, reading the keys of a KeyStore chunk by chunk.
+    """
+    if not isinstance(keys, KeyStore):
+        return backend.key_msm(keys, scalars)
+    result = None
+    offset = 0
+    for chunk in keys.iter_chunks():
+        result = backend.add(result, backend.key_msm(chunk, scalars[offset:offset + len(chunk)]))
+        offset += len(chunk)
+    return result
+
+
+def _member_terms(message_hasher, ephemeral_randomness, sigmas):
+    """
+    Computes the verification terms (see `NodeRingSchnorr._verification_terms`) of a chunk of ring members.
+    """
+    members = []
+    for randomness, sigma in zip(ephemeral_randomness, sigmas):
+        public_ephemeral_val, small_s = sigma
+        challenge = SchnorrSignature.challenge(public_ephemeral_val, randomness[0] + randomness[1])
+        hash_ = _member_hash(message_hasher, randomness, sigma)
+        members.append((randomness, hash_, public_ephemeral_val, small_s, challenge))
+    return members
+
+
+def _py_ecc_values(new_public_key, ephemeral_randomness, sigmas, master_sum):
+    # The leading values of a signature, converted from compact to py_ecc points
+    return (
+        to_py_ecc(new_public_key),
+        [to_py_ecc(randomness) for randomness in ephemeral_randomness],
+        [(to_py_ecc(public_ephemeral_val), small_s) for public_ephemeral_val, small_s in sigmas],
+        master_sum
+    )
 
 
 class NodeRingSchnorr:
     """
     Implements a variant of the Schnorr signature scheme for a ring of nodes.
+
+    Signatures are accepted and returned with py_ecc points; internally every point is kept as
+    a compact (x, y) int tuple (see the curve module) and converted only at this boundary.
+
+    With `workers` set, the per-member work of signing and verification runs on a process pool
+    (see the parallel module) in chunks of members whose partial results are reduced in order,
+    so signatures and verdicts are identical to the serial ones. Call `close` (or use the scheme
+    as a context manager) to stop the worker processes.
+
+    The ring keys may also be given as a KeyStore (see the key_store module), which is read in
+    chunks instead of being loaded into memory. When verifying, they may be a Ring of the
+    ring_registry module, whose keys are not validated again.
+
+    All secret values of a signature are drawn from one nonce source (see the nonces module):
+    the CSPRNG by default, or, with `deterministic` set, a DRBG seeded with the private key and
+    the hash of the message and ring, so the same inputs always give the same signature.
+
+    With a `verify_cache`, `nr_verify`, `nr_verify_batch` and `nr_verify_ring` answer repeated
+    verifications from it (see the verify_cache module).
     """
     GEN_ORDER = 0x30644E72E131A029B85045B68181585D2833E84879B9709143E1F593F0000001
 
+    def __init__(self, backend=None, workers: int = None, min_chunk_size: int = DEFAULT_MIN_CHUNK_SIZE,
+                 deterministic: bool = False, verify_cache: VerificationCache = None):
+        # pylint: disable=R0913,R0917
+        """
+        :param backend: Curve backend name or instance (see `backends.BACKENDS`), None for the default.
+        :param workers: Number of worker processes for large rings, None to run serially.
+        :param min_chunk_size: Minimal number of ring members handed to a worker at once.
+        :param deterministic: Derive all secret values from the signed data (RFC 6979 style).
+        :param verify_cache: Cache of verification results, None to disable caching.
+        """
+        self.backend = get_backend(backend)
+        self.deterministic = deterministic
+        self.verify_cache = verify_cache
+        self.schnorr = SchnorrSignature(self.backend, deterministic)
+        self.pool = None if workers is None else MemberPool(workers, min_chunk_size)
+
+    def close(self):
+        """
+        Stops the worker processes of the parallel mode, if any were started.
+        """
+        if self.pool is not None:
+            self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     @staticmethod
-    def _generate_random_values(count):
-        random_values = []
-        while len(random_values) < count:
-            value = randsn()
-            if value not in random_values:
-                random_values.append(value)
-        return random_values
+    def native_signature(signature):
+        """
+        Converts a signature with py_ecc points to one with (x, y) int tuples.
+        :param signature: Signature as returned by `nr_sign`.
+        :return: The same signature tuple with compact points (a KeyStore of keys is kept as is).
+        """
+        new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = signature
+        return (
+            from_py_ecc(new_public_key),
+            [from_py_ecc(randomness) for randomness in ephemeral_randomness],
+            [(from_py_ecc(public_ephemeral_val), small_s) for public_ephemeral_val, small_s in sigmas],
+            master_sum,
+            ext_public_keys if isinstance(ext_public_keys, KeyStore) else
+            [from_py_ecc(ext_public_key) for ext_public_key in ext_public_keys]
+        )
 
     @staticmethod
-    def _calculate_partial_signatures(new_private_key, message, ext_public_keys, random_values):
+    def py_ecc_signature(signature):
+        """
+        Converts a signature with (x, y) int tuples to one with py_ecc points, as returned by `nr_sign`.
+        :param signature: Signature with compact points.
+        :return: The same signature tuple with py_ecc points.
+        """
+        new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = signature
+        return (
+            to_py_ecc(new_public_key),
+            [to_py_ecc(randomness) for randomness in ephemeral_randomness],
+            [(to_py_ecc(public_ephemeral_val), small_s) for public_ephemeral_val, small_s in sigmas],
+            master_sum,
+            ext_public_keys if isinstance(ext_public_keys, KeyStore) else
+            [to_py_ecc(ext_public_key) for ext_public_key in ext_public_keys]
+        )
+
+    def _map_members(self, function, count: int, args, sequences) -> list:
+        # Runs function over chunks of the members on the pool, or over all of them at once when serial
+        if self.pool is None:
+            return [function(*args, *sequences)]
+        return self.pool.map_chunks(function, count, args, sequences)
+
+    def _key_msm(self, keys, key_scalars, points, scalars):
+        if self.pool is None:
+            return self.backend.key_msm(keys, key_scalars, points, scalars)
+        return self.pool.msm(self.backend, keys + points, key_scalars + scalars)
+
+    def _calculate_partial_signatures(self, new_private_key, message_hasher, ext_public_keys, random_values, nonces,
+                                      key_product=None):
+        # pylint: disable=R0913,R0917
         ephemeral_randomness = []
         sigmas = []
+        if key_product is not None:
+            # The product over precomputed keys is one multiplication after all hashes are known
+            hashes = []
+            for chunk_randomness, chunk_sigmas, chunk_hashes in self._map_members(
+                    _sign_member_values,
+                    len(random_values),
+                    (self.backend, new_private_key, message_hasher),
+                    (random_values, nonces)
+            ):
+                ephemeral_randomness.extend(chunk_randomness)
+                sigmas.extend(chunk_sigmas)
+                hashes.extend(chunk_hashes)
+            return ephemeral_randomness, sigmas, key_product([-hash_ for hash_ in hashes])
         product = None
-        for i, ext_public_key in enumerate(ext_public_keys):
-            ephemeral_randomness.append(multiply(G1, random_values[i]))
-            _, sigma = SchnorrSignature.sign(
-                new_private_key,
-                int(ephemeral_randomness[i][0]) + int(ephemeral_randomness[i][1])
-            )
-            sigmas.append(sigma)
-            hash_input = encode_packed(
-                message,
-                ephemeral_randomness[i][0],
-                ephemeral_randomness[i][1],
-                sigma[0][0],
-                sigma[0][1],
-                sigma[1]
-            )
-            hash_ = int.from_bytes(keccak256(hash_input), byteorder="big") % curve_order
-            product = add(product, multiply(neg(ext_public_key), hash_))
+        for chunk_randomness, chunk_sigmas, partial_product in self._map_members(
+                _sign_members,
+                len(ext_public_keys),
+                (self.backend, new_private_key, message_hasher),
+                (ext_public_keys, random_values, nonces)
+        ):
+            ephemeral_randomness.extend(chunk_randomness)
+            sigmas.extend(chunk_sigmas)
+            product = self.backend.add(product, partial_product)
         return ephemeral_randomness, sigmas, product
 
     def nr_sign(self, private_key: int, message: int, ext_public_keys):
@@ -58,7 +236,8 @@ class NodeRingSchnorr:
         :param private_key: The private key of the signer.
         :param message: The message to be signed.
         :param ext_public_keys: A list of external public keys, each represented as a pair of integers
-            (elliptic curve points).
+            (elliptic curve points). Alternatively a KeyStore holding the whole ring including the
+            signer's public key, which is then used as is in place of the updated list.
         :return: A tuple consisting of:
                  - new_public_key: The newly generated public key.
                  - ephemeral_randomness: A list of ephemeral randomness values, one for each external public key, plus
@@ -69,74 +248,116 @@ class NodeRingSchnorr:
                  - ext_public_keys: An updated list of external public keys with the signer's public key inserted
                     at a random position.
         """
+        # A one-off signature does not pay for the precomputation of the keys
+        session = SigningSession(self, private_key, ext_public_keys, precompute=False)
+        if isinstance(ext_public_keys, KeyStore):
+            return session.sign(message)
+        new_public_key, ephemeral_randomness, sigmas, master_sum, index = session.sign_native(message)
+        ext_public_keys.insert(index, to_py_ecc(session.public_key))
+        return (*_py_ecc_values(new_public_key, ephemeral_randomness, sigmas, master_sum), ext_public_keys)
+
+    def nr_sign_ring(self, private_key: int, message: int, ring: Ring):
+        """
+        Generates a signature like `nr_sign` over a registered ring (see the ring_registry module)
+        that contains the signer's public key. The signature references the ring by identifier
+        and lists the values of every member in ring order.
+
+        :param private_key: The private key of the signer.
+        :param message: The message to be signed.
+        :param ring: The ring of public keys, including the signer's one.
+        :return: A tuple (ring_id, new_public_key, ephemeral_randomness, sigmas, master_sum), the
+            values being as returned by `nr_sign`.
+        """
+        return SigningSession(self, private_key, ring, precompute=False).sign(message)
+
+    def signing_session(self, private_key: int, ring) -> "SigningSession":
+        """
+        Binds a private key and a ring for signing many messages, see `SigningSession`.
+        :param private_key: The private key of the signer.
+        :param ring: External public keys as passed to `nr_sign`, a KeyStore or a Ring.
+        """
+        return SigningSession(self, private_key, ring)
+
+    def nr_sign_many(self, private_key: int, messages: Iterable[int], ring) -> list:
+        """
+        Signs every message with the same private key over the same ring, doing the per-key and
+        per-ring setup once.
+        :param private_key: The private key of the signer.
+        :param messages: The messages to be signed.
+        :param ring: External public keys as passed to `nr_sign`, a KeyStore or a Ring.
+        :return: One signature per message, shaped like those of `nr_sign` (or `nr_sign_ring` for a Ring).
+        """
+        return self.signing_session(private_key, ring).sign_many(messages)
+
+    def _sign_native(self, private_key: int, message: int, keys, packed_keys, index: int = None, key_product=None):
+        # pylint: disable=R0913,R0914,R0917
+        """
+        Runs the steps of `nr_sign` on compact points.
+        :param keys: The external public keys, a list or a KeyStore.
+        :param packed_keys: `abi.encodePacked` of the x coordinates of the keys followed by their y coordinates,
+            as an iterable of byte chunks.
+        :param index: Position of the signer's values in the result, drawn at random when omitted.
+        :param key_product: Precomputed product over the keys (see `CurveBackend.precompute_keys`), if any.
+        :return: A tuple (new_public_key, ephemeral_randomness, sigmas, master_sum, index).
+        """
+        message_hasher = PrefixedHasher(message)
+
         # Step 1: Generate an ephemeral key pair
-        new_private_key = int.from_bytes(
-            keccak256(
-                encode_packed(
-                    message,
-                    private_key,
-                    *[y[0] for y in ext_public_keys],
-                    *[y[1] for y in ext_public_keys]
-                )
-            ), byteorder="big"
-        ) % self.GEN_ORDER
-        new_public_key = multiply(G1, new_private_key)
+        with instrumentation.phase("nr_sign.step1_ephemeral_key"):
+            new_private_key = chunks_to_scalar(itertools.chain([pack_uint256(message, private_key)], packed_keys))
+            new_public_key = self.backend.multiply_g1(new_private_key)
+            # new_private_key hashes the message and ring, so it seeds deterministic nonces
+            nonce_values = nonce_source(private_key, pack_uint256(new_private_key), self.deterministic)
 
         # Step 2: Generate a list of unique random values
-        random_values = self._generate_random_values(len(ext_public_keys))
+        with instrumentation.phase("nr_sign.step2_random_values"):
+            random_values = nonce_values.scalars(len(keys), distinct=True)
+            # Nonces of the partial signatures, drawn upfront so chunks signed in parallel match serial signing
+            nonces = nonce_values.scalars(len(keys))
 
         # Step 3: Calculate partial signatures and hashes for each external public key
-        ephemeral_randomness, sigmas, product = self._calculate_partial_signatures(
-            new_private_key,
-            message,
-            ext_public_keys,
-            random_values
-        )
+        with instrumentation.phase("nr_sign.step3_partial_signatures"):
+            ephemeral_randomness, sigmas, product = self._calculate_partial_signatures(
+                new_private_key,
+                message_hasher,
+                keys,
+                random_values,
+                nonces,
+                key_product
+            )
 
         # Step 4: Loop until a valid master random value is found
-        while True:
-            master_random_value = randsn()
-            master_randomness = add(multiply(G1, master_random_value), product)
+        with instrumentation.phase("nr_sign.step4_master_randomness"):
+            while True:
+                master_random_value = nonce_values.scalar()
+                master_randomness = self.backend.add(self.backend.multiply_g1(master_random_value), product)
 
-            if master_randomness is not None and all(master_randomness != r for r in ephemeral_randomness):
-                break
+                if master_randomness is not None and all(master_randomness != r for r in ephemeral_randomness):
+                    break
 
         # Step 5: Generate the master signature
-        _, master_sigma = SchnorrSignature.sign(
-            new_private_key,
-            int(master_randomness[0]) + int(master_randomness[1])
-        )
-        master_hash = int.from_bytes(
-            keccak256(
-                encode_packed(
-                    message,
-                    master_randomness[0],
-                    master_randomness[1],
-                    master_sigma[0][0],
-                    master_sigma[0][1],
-                    master_sigma[1]
-                )
-            ), byteorder="big"
-        ) % self.GEN_ORDER
-        master_sum = (master_random_value + private_key * master_hash) % curve_order
+        with instrumentation.phase("nr_sign.step5_master_signature"):
+            _, master_sigma = self.schnorr.sign_native(
+                new_private_key,
+                master_randomness[0] + master_randomness[1],
+                nonce_values.scalar()
+            )
+            master_hash = _member_hash(message_hasher, master_randomness, master_sigma)
+            master_sum = (master_random_value + private_key * master_hash) % curve_order
 
         # Step 6: Add all random values to the master sum
-        for random_value in random_values:
-            master_sum = addmodn(master_sum, random_value)
+        with instrumentation.phase("nr_sign.step6_master_sum"):
+            for random_value in random_values:
+                master_sum = addmodn(master_sum, random_value)
 
-        # Step 7: Insert the master randomness, signature, and public key at a random position
-        index = random.randint(0, len(ext_public_keys))
-        ephemeral_randomness.insert(index, master_randomness)
-        sigmas.insert(index, master_sigma)
-        ext_public_keys.insert(index, multiply(G1, private_key))
+        # Step 7: Insert the master randomness and signature at a random position
+        with instrumentation.phase("nr_sign.step7_insert"):
+            if index is None:
+                index = nonce_values.below(len(keys) + 1)
+            ephemeral_randomness.insert(index, master_randomness)
+            sigmas.insert(index, master_sigma)
 
-        return (
-            new_public_key,
-            ephemeral_randomness,
-            sigmas,
-            master_sum,
-            ext_public_keys
-        )
+        return new_public_key, ephemeral_randomness, sigmas, master_sum, index
 
     def nr_verify(self, message: int, signature):
         """
@@ -153,22 +374,293 @@ class NodeRingSchnorr:
                     at a random position.
         :return: bool
         """
-        new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = signature
+        if self.verify_cache is None:
+            return self.nr_verify_staged(message, signature).valid
+        return self.verify_cache.verify(
+            ring_key(message, signature),
+            lambda: self.nr_verify_staged(message, signature).valid
+        )
+
+    def nr_verify_staged(self, message: int, signature) -> Verdict:
+        """
+        Verifies like `nr_verify`, running the cheap structural and curve membership checks of the
+        prechecks module before the curve arithmetic and stopping at the first failing stage.
+        :param message: The message to be verified.
+        :param signature: A signature as passed to `nr_verify`.
+        :return: Verdict, true for a valid signature, otherwise carrying the rejecting stage
+            (STRUCTURE, CURVE or EQUATION) and the reason.
+        """
+        try:
+            native = self._checked_signature(message, signature)
+        except SignatureRejected as rejection:
+            return self._rejected(rejection)
+        with instrumentation.phase("nr_verify.terms"):
+            terms = self._native_terms(message, *native)
+        return self._equation_verdict(terms)
+
+    def nr_verify_batch(self, items: Iterable[Tuple]) -> List[bool]:
+        """
+        Verifies many NodeRingSchnorr signatures at once, possibly over different rings.
+        Signatures failing the checks of the prechecks module are rejected on their own. All ring
+        equations and inner Schnorr checks of the others are combined into one randomized aggregate
+        check. If it fails, the batch is split in halves and re-checked until every invalid
+        signature is located.
+        :param items: Pairs (message, signature) as passed to `nr_verify`.
+        :return: list of bool, one for every item
+        """
+        if self.verify_cache is None:
+            return self._verify_batch(items)
+        items = list(items)
+        return self.verify_cache.verify_batch(
+            [ring_key(message, signature) for message, signature in items],
+            lambda positions: self._verify_batch([items[position] for position in positions])
+        )
+
+    def _verify_batch(self, items) -> List[bool]:
+        results = []
+        terms = []
+        positions = []
+        for message, signature in items:
+            try:
+                terms.append(self._verification_terms(message, signature))
+            except SignatureRejected as rejection:
+                self._rejected(rejection)
+                results.append(False)
+                continue
+            positions.append(len(results))
+            results.append(True)
+
+        pending = [list(range(len(terms)))] if terms else []
+        while pending:
+            indices = pending.pop()
+            if not self._equation_holds([terms[i] for i in indices]):
+                if len(indices) == 1:
+                    results[positions[indices[0]]] = False
+                else:
+                    middle = len(indices) // 2
+                    pending.extend((indices[:middle], indices[middle:]))
+        return results
+
+    def nr_verify_ring(self, message: int, signature, registry: RingRegistry) -> bool:
+        """
+        Verifies a signature produced by `nr_sign_ring`, taking the ring keys from the registry.
+        :param message: The message to be verified.
+        :param signature: A tuple (ring_id, new_public_key, ephemeral_randomness, sigmas, master_sum).
+        :param registry: Registry holding the referenced ring; UnknownRingError is raised if it is unknown.
+        :return: bool
+        """
+        if self.verify_cache is None:
+            return self._verify_ring(message, signature, registry)
+        return self.verify_cache.verify(
+            ring_key(message, signature),
+            lambda: self._verify_ring(message, signature, registry)
+        )
+
+    def _verify_ring(self, message: int, signature, registry: RingRegistry) -> bool:
+        ring_id, new_public_key, ephemeral_randomness, sigmas, master_sum = signature
+        ring = registry.get(ring_id)
+        try:
+            with instrumentation.phase("nr_verify.prechecks"):
+                # The keys of a ring were validated when it was built
+                values = prechecks.parse_values(message, new_public_key, ephemeral_randomness, sigmas, master_sum,
+                                                len(ring))
+                prechecks.check_curve(*values[:3])
+        except SignatureRejected as rejection:
+            return self._rejected(rejection).valid
+        with instrumentation.phase("nr_verify.terms"):
+            terms = self._native_terms(message, *values, ring.keys)
+        return self._equation_verdict(terms).valid
+
+    def _checked_signature(self, message: int, signature):
+        """
+        Runs the STRUCTURE and CURVE stages (see the prechecks module) on a signature as passed to `nr_verify`.
+        :return: The signature with compact points, as returned by `native_signature`.
+        :raises SignatureRejected: If a check fails.
+        """
+        with instrumentation.phase("nr_verify.prechecks"):
+            try:
+                new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = signature
+                ring_size = len(ext_public_keys)
+            except (TypeError, ValueError):
+                raise SignatureRejected(STRUCTURE, "signature must have five fields and a list of keys") from None
+            values = prechecks.parse_values(message, new_public_key, ephemeral_randomness, sigmas, master_sum,
+                                            ring_size)
+            if isinstance(ext_public_keys, KeyStore):
+                # The keys of a store were validated when it was written
+                prechecks.check_curve(*values[:3])
+                return (*values, ext_public_keys)
+            if isinstance(ext_public_keys, Ring):
+                # The keys of a ring were validated when it was built
+                prechecks.check_curve(*values[:3])
+                return (*values, ext_public_keys.keys)
+            keys = prechecks.parse_keys(ext_public_keys)
+            prechecks.check_curve(*values[:3], keys)
+            return (*values, keys)
+
+    @staticmethod
+    def _rejected(rejection: SignatureRejected) -> Verdict:
+        instrumentation.count(f"nr_verify.rejected.{rejection.stage}")
+        return rejection.verdict()
+
+    def _equation_verdict(self, terms) -> Verdict:
+        if self._equation_holds([terms]):
+            return Verdict(True)
+        return self._rejected(SignatureRejected(EQUATION, "ring equation or an inner Schnorr signature does not hold"))
+
+    def _verification_terms(self, message: int, signature):
+        """
+        Checks a signature (see `_checked_signature`) and computes every hash needed to verify it,
+        so the signature can be re-checked (e.g. while bisecting a failed batch) without hashing again.
+        :return: A tuple (master_sum, new_public_key, members, ext_public_keys) with one tuple
+            (randomness, hash_, public_ephemeral_val, small_s, challenge) per ring member.
+        :raises SignatureRejected: If a check fails.
+        """
+        native = self._checked_signature(message, signature)
+        with instrumentation.phase("nr_verify.terms"):
+            return self._native_terms(message, *native)
+
+    def _native_terms(self, message: int, new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys):
+        # pylint: disable=R0913,R0917
+        members = []
+        for chunk in self._map_members(
+                _member_terms,
+                min(len(ephemeral_randomness), len(sigmas)),
+                (PrefixedHasher(message),),
+                (ephemeral_randomness, sigmas)
+        ):
+            members.extend(chunk)
+        return master_sum, new_public_key, members, ext_public_keys
+
+    def _equation_holds(self, terms) -> bool:
+        """
+        Folds the ring equation `master_sum * G = sum(R_i + h_i * P_i)` and every inner Schnorr check
+        `s_i * G = X_i + e_i * N` of every signature into a single equation
+        `generator_scalar * G = sum(scalar * point)` and checks it with one multi-scalar multiplication.
+
+        Each signature and each inner check is weighted with fresh random 128-bit scalars, so the folded
+        equation holds (except with negligible probability) only if all of the original equations hold.
+        Points shared between signatures (e.g. keys of a common ring) are merged into a single MSM term.
+        Keys of a KeyStore are not loaded here; their scalars are summed per position and multiplied
+        with the keys chunk by chunk.
+        """
+        with instrumentation.phase("nr_verify.equation"):
+            return self._fold_and_check(terms)
+
+    def _fold_and_check(self, terms) -> bool:
+        # pylint: disable=R0914
+        generator_scalar = 0
+        merged = {}
+        merged_keys = {}
+        store_scalars = {}
+        for master_sum, new_public_key, members, ext_public_keys in terms:
+            weight = secrets.randbits(128) | 1
+            generator_scalar += weight * master_sum
+            new_public_key_scalar = 0
+            key_scalars = None
+            if isinstance(ext_public_keys, KeyStore):
+                key_scalars = store_scalars.setdefault(ext_public_keys, [0] * len(ext_public_keys))
+                ext_public_keys = range(len(ext_public_keys))
+            for ext_public_key, (randomness, hash_, public_ephemeral_val, small_s, challenge) in zip(
+                    ext_public_keys, members):
+                inner_weight = weight * (secrets.randbits(128) | 1)
+                generator_scalar += inner_weight * small_s
+                new_public_key_scalar += inner_weight * challenge
+                self._merge_term(merged, randomness, weight)
+                if key_scalars is None:
+                    self._merge_term(merged_keys, ext_public_key, weight * hash_)
+                else:
+                    key_scalars[ext_public_key] += weight * hash_
+                self._merge_term(merged, public_ephemeral_val, inner_weight)
+            self._merge_term(merged, new_public_key, new_public_key_scalar)
+
+        total = self._key_msm(list(merged_keys), list(merged_keys.values()), list(merged), list(merged.values()))
+        for store, key_scalars in store_scalars.items():
+            for partial in self._map_members(_keys_msm, len(store), (self.backend,), (store, key_scalars)):
+                total = self.backend.add(total, partial)
+        return self.backend.eq(self.backend.multiply_g1(generator_scalar % self.GEN_ORDER), total)
+
+    @staticmethod
+    def _merge_term(merged, point, scalar):
+        merged[point] = merged.get(point, 0) + scalar
+
+
+class SigningSession:  # pylint: disable=R0902
+    """
+    A private key bound to a ring, for signing a stream of messages.
+
+    Everything that does not depend on the message is done once when the session is created:
+    the signer's public key and its position in the ring, the conversion of the ring keys to
+    compact points, the packed key coordinates hashed into the ephemeral key of every signature
+    and the backend's precomputation of the keys for the product sum(-h_i * P_i) (see
+    `CurveBackend.precompute_keys`). Signing a message then only does the per-message work of
+    `nr_sign`. The keys of a KeyStore are not precomputed, so its memory use stays flat.
+    Building the precomputation costs about as much as a few signatures.
 
-        sum_ = None
-        prod = True
-        for i, ext_public_key in enumerate(ext_public_keys):
-            prod = prod and SchnorrSignature.verify(new_public_key,
-                                                    int(ephemeral_randomness[i][0]) + int(ephemeral_randomness[i][1]),
-                                                    sigmas[i]
-                                                    )
-            hash_ = int.from_bytes(keccak256(encode_packed(
-                message,
-                ephemeral_randomness[i][0],
-                ephemeral_randomness[i][1],
-                sigmas[i][0][0],
-                sigmas[i][0][1],
-                sigmas[i][1]
-            )), byteorder="big") % self.GEN_ORDER
-            sum_ = add(sum_, add(ephemeral_randomness[i], multiply(ext_public_key, hash_)))
-        return prod and eq(multiply(G1, master_sum), sum_)
+    The ring is given like to `nr_sign` (a list of external public keys without the signer's one,
+    or a KeyStore including it) or as a Ring of the ring_registry module, in which case the
+    signatures are shaped like those of `nr_sign_ring`. Unlike `nr_sign`, a session never
+    modifies the given list; every signature gets its own list of keys.
+    """
+
+    def __init__(self, scheme: NodeRingSchnorr, private_key: int, ring, precompute: bool = True):
+        """
+        :param scheme: The scheme whose backend, pool and nonce mode are used.
+        :param private_key: The private key of the signer.
+        :param ring: External public keys, a KeyStore or a Ring.
+        :param precompute: Precompute the keys for the product of every signature.
+        """
+        self.scheme = scheme
+        self.private_key = private_key
+        self.public_key = scheme.backend.multiply_g1(private_key)
+        self.ring = ring
+        self.position = None
+        self._packed_keys = None
+        self._py_ecc_keys = None
+        self._key_product = None
+        if isinstance(ring, Ring):
+            self.position = ring.position(self.public_key)
+            self.keys = list(ring.keys[:self.position] + ring.keys[self.position + 1:])
+            self._packed_keys = ring.packed_coordinates(self.position)
+        elif isinstance(ring, KeyStore):
+            self.position = ring.position(self.public_key)
+            # The coordinates of a store are streamed for every message instead of being kept in memory
+            self.keys = ring.without(self.position)
+        else:
+            self.keys = [from_py_ecc(ext_public_key) for ext_public_key in ring]
+            self._packed_keys = pack_uint256(*[key[0] for key in self.keys], *[key[1] for key in self.keys])
+        if precompute and not isinstance(ring, KeyStore):
+            self._key_product = scheme.backend.precompute_keys(self.keys)
+
+    def sign_native(self, message: int):
+        """
+        Signs a message, returning compact points.
+        :return: A tuple (new_public_key, ephemeral_randomness, sigmas, master_sum, index), index
+            being the position of the signer's values.
+        """
+        packed_keys = self.keys.coordinate_words() if self._packed_keys is None else [self._packed_keys]
+        return self.scheme._sign_native(  # pylint: disable=W0212
+            self.private_key, message, self.keys, packed_keys, self.position, self._key_product
+        )
+
+    def sign(self, message: int):
+        """
+        Signs a message.
+        :return: The signature with py_ecc points, see the class description for its shape.
+        """
+        new_public_key, ephemeral_randomness, sigmas, master_sum, index = self.sign_native(message)
+        values = _py_ecc_values(new_public_key, ephemeral_randomness, sigmas, master_sum)
+        if isinstance(self.ring, Ring):
+            return (self.ring.ring_id, *values)
+        if isinstance(self.ring, KeyStore):
+            return (*values, self.ring)
+        if self._py_ecc_keys is None:
+            self._py_ecc_keys = [to_py_ecc(key) for key in self.keys]
+        ext_public_keys = list(self._py_ecc_keys)
+        ext_public_keys.insert(index, to_py_ecc(self.public_key))
+        return (*values, ext_public_keys)
+
+    def sign_many(self, messages: Iterable[int]) -> list:
+        """
+        Signs every message, see `sign`.
+        """
+        return [self.sign(message) for message in messages]
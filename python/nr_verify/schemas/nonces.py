@@ -0,0 +1,151 @@
+"""
+Module: nonces
+This module provides the secret scalars (nonces) drawn by the signature schemes.
+
+`RandomNonces` draws scalars in bulk from the operating system CSPRNG: a whole batch comes from
+a single `os.urandom` buffer, 40 bytes per scalar, so the modular bias is below 2^-64.
+Distinctness is enforced with a set.
+
+`DeterministicNonces` derives scalars with the HMAC_DRBG of RFC 6979 (section 3.2, HMAC-SHA256)
+from the private key and a digest of everything being signed. Signing then needs no randomness
+at all and the same inputs always produce the same signature, which makes signatures
+reproducible in tests. Successive scalars continue the DRBG as the RFC does after a rejected
+candidate.
+
+Both sources share the interface `scalar()`, `scalars(count, distinct)` and `below(bound)`;
+`nonce_source` picks one.
+"""
+import hashlib
+import hmac
+import os
+import secrets
+from typing import List
+
+from .curve import CURVE_ORDER
+
+_SCALAR_BYTES = 40
+
+
+def _distinct(draw, count: int) -> List[int]:
+    # Collects `count` distinct values, drawing replacements for duplicates in bulk
+    values = []
+    seen = set()
+    while len(values) < count:
+        for value in draw(count - len(values)):
+            if value not in seen:
+                seen.add(value)
+                values.append(value)
+    return values
+
+
+class RandomNonces:
+    """
+    Scalars in [1, order) from the operating system CSPRNG.
+    """
+
+    def __init__(self, order: int = CURVE_ORDER):
+        self.order = order
+
+    def _draw(self, count: int) -> List[int]:
+        buffer = memoryview(os.urandom(_SCALAR_BYTES * count))
+        return [
+            int.from_bytes(buffer[offset:offset + _SCALAR_BYTES], "big") % (self.order - 1) + 1
+            for offset in range(0, len(buffer), _SCALAR_BYTES)
+        ]
+
+    def scalar(self) -> int:
+        """
+        Returns one scalar.
+        """
+        return self._draw(1)[0]
+
+    def scalars(self, count: int, distinct: bool = False) -> List[int]:
+        """
+        Returns `count` scalars, all different from each other if `distinct` is set.
+        """
+        return _distinct(self._draw, count) if distinct else self._draw(count)
+
+    @staticmethod
+    def below(bound: int) -> int:
+        """
+        Returns an integer in [0, bound).
+        """
+        return secrets.randbelow(bound)
+
+
+class DeterministicNonces:
+    """
+    Scalars in [1, order) from the HMAC_DRBG of RFC 6979, for orders of at most 256 bits.
+    """
+
+    def __init__(self, private_key: int, digest: bytes, order: int = CURVE_ORDER):
+        """
+        Args:
+            private_key (int): Private key of the signer, in [1, order).
+            digest (bytes): Hash of the signed data (h1 of the RFC).
+            order (int): Group order q.
+        """
+        if order.bit_length() > 256:
+            raise ValueError("Order must have at most 256 bits")
+        self.order = order
+        self._qlen = order.bit_length()
+        size = (self._qlen + 7) // 8
+        seed = (private_key % order).to_bytes(size, "big") + (self._bits2int(digest) % order).to_bytes(size, "big")
+        self._key = b"\0" * 32
+        self._value = b"\1" * 32
+        self._key = self._hmac(self._value + b"\0" + seed)
+        self._value = self._hmac(self._value)
+        self._key = self._hmac(self._value + b"\1" + seed)
+        self._value = self._hmac(self._value)
+        self._started = False
+
+    def _hmac(self, data: bytes) -> bytes:
+        return hmac.digest(self._key, data, hashlib.sha256)
+
+    def _bits2int(self, data: bytes) -> int:
+        value = int.from_bytes(data, "big")
+        excess = 8 * len(data) - self._qlen
+        return value >> excess if excess > 0 else value
+
+    def _reseed(self):
+        self._key = self._hmac(self._value + b"\0")
+        self._value = self._hmac(self._value)
+
+    def scalar(self) -> int:
+        """
+        Returns the next scalar of the DRBG.
+        """
+        if self._started:
+            self._reseed()
+        self._started = True
+        while True:
+            self._value = self._hmac(self._value)
+            candidate = self._bits2int(self._value)
+            if 1 <= candidate < self.order:
+                return candidate
+            self._reseed()
+
+    def _draw(self, count: int) -> List[int]:
+        return [self.scalar() for _ in range(count)]
+
+    def scalars(self, count: int, distinct: bool = False) -> List[int]:
+        """
+        Returns the next `count` scalars, skipping repeated ones if `distinct` is set.
+        """
+        return _distinct(self._draw, count) if distinct else self._draw(count)
+
+    def below(self, bound: int) -> int:
+        """
+        Returns an integer in [0, bound) derived from the next scalar, for bounds far below the order.
+        """
+        return self.scalar() % bound
+
+
+def nonce_source(private_key: int, digest: bytes, deterministic: bool = False):
+    """
+    Returns the nonce source of one signature: a `DeterministicNonces` seeded with the private
+    key and digest if `deterministic` is set, a `RandomNonces` otherwise.
+    """
+    if deterministic:
+        return DeterministicNonces(private_key, digest)
+    return RandomNonces()
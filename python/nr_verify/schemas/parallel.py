@@ -0,0 +1,96 @@
+"""
+Module: parallel
+This module provides a process pool for the per-member work of NodeRingSchnorr.
+
+Signing and verifying a ring signature does independent work for every ring member
+(an inner Schnorr signature, hashes, scalar multiplications). `MemberPool` splits the
+members into contiguous chunks, runs a function on every chunk in a worker process and
+returns the chunk results in order, so callers can reduce them exactly like the serial
+result (concatenating lists, adding partial sums of points).
+
+Rings too small to fill more than one chunk are processed in the calling process, so
+enabling the pool never slows down small rings. Functions and arguments passed to the
+pool must be picklable; the backends in `backends.BACKENDS` are.
+"""
+import concurrent.futures
+import os
+from typing import List, Tuple
+
+DEFAULT_MIN_CHUNK_SIZE = 32
+
+
+class MemberPool:
+    """
+    Process pool running functions over chunks of ring members.
+    """
+
+    def __init__(self, workers: int = None, min_chunk_size: int = DEFAULT_MIN_CHUNK_SIZE):
+        """
+        Args:
+            workers (int): Number of worker processes, `os.cpu_count()` when omitted.
+            min_chunk_size (int): Minimal number of members handed to a worker at once.
+        """
+        if workers is not None and workers < 1:
+            raise ValueError("Number of workers must be positive")
+        if min_chunk_size < 1:
+            raise ValueError("Minimal chunk size must be positive")
+        self.workers = workers or os.cpu_count() or 1
+        self.min_chunk_size = min_chunk_size
+        self._executor = None
+
+    def chunk_ranges(self, count: int) -> List[Tuple[int, int]]:
+        """
+        Splits `count` members into contiguous (start, stop) ranges, at most one per worker.
+        """
+        size = max(self.min_chunk_size, -(-count // self.workers))
+        return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+    def map_chunks(self, function, count: int, args: Tuple, sequences: Tuple) -> list:
+        """
+        Calls `function(*args, *chunks)` for every member range, where `chunks` are the
+        slices of `sequences` for that range.
+
+        Args:
+            function (callable): Picklable function processing one chunk of members.
+            count (int): Number of members, i.e. length of every sequence.
+            args (tuple): Arguments shared by all chunks.
+            sequences (tuple): Per-member sequences to be sliced.
+
+        Returns:
+            list: Results of `function`, one per chunk in member order.
+        """
+        ranges = self.chunk_ranges(count)
+        if len(ranges) <= 1:
+            return [function(*args, *sequences)]
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        futures = [
+            self._executor.submit(function, *args, *[sequence[start:stop] for sequence in sequences])
+            for start, stop in ranges
+        ]
+        return [future.result() for future in futures]
+
+    def msm(self, backend, points, scalars):
+        """
+        Computes `backend.msm(points, scalars)` as a sum of per-chunk multi-scalar multiplications.
+        """
+        if len(points) != len(scalars):
+            raise ValueError("Number of points and scalars must be equal")
+        result = None
+        for partial in self.map_chunks(backend.msm, len(points), (), (points, scalars)):
+            result = backend.add(result, partial)
+        return result
+
+    def close(self):
+        """
+        Shuts down the worker processes, if any were started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
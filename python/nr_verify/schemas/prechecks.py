@@ -0,0 +1,176 @@
+"""
+Module: prechecks
+This module provides the cheap checks run before the curve arithmetic of ring signature verification.
+
+NodeRingSchnorr verifies a signature in three stages and stops at the first one that rejects it:
+    STRUCTURE: field count, matching non-empty list lengths, int scalars and coordinates in range
+        (message < 2^256, master_sum and s_i < GEN_ORDER, coordinates < field modulus, no point
+        at infinity). Constant cost per field, mirroring the `require`s of
+        SchnorrSignatureNodeRing.sol.
+    CURVE: every point lies on the curve, as the precompiles used by the contract require.
+    EQUATION: the ring equation and inner Schnorr checks (the expensive multi-scalar multiplication).
+
+`parse_schnorr` runs the STRUCTURE and CURVE checks of a SchnorrSignature item, so batch
+verification can reject malformed items on their own.
+
+`Verdict` reports the outcome together with the rejecting stage and reason, so floods of
+malformed input can be told apart from signatures that are merely wrong.
+"""
+from typing import NamedTuple, Optional
+
+from . import curve
+
+STRUCTURE = "structure"
+CURVE = "curve"
+EQUATION = "equation"
+
+_UINT256_LIMIT = 1 << 256
+
+
+class Verdict(NamedTuple):
+    """
+    Outcome of a staged verification; true if and only if the signature is valid.
+    """
+    valid: bool
+    stage: Optional[str] = None
+    reason: str = ""
+
+    def __bool__(self):
+        return self.valid
+
+
+class SignatureRejected(ValueError):
+    """
+    Raised by the checks of this module; `stage` and `reason` tell which check failed.
+    """
+
+    def __init__(self, stage: str, reason: str):
+        super().__init__(f"{stage}: {reason}")
+        self.stage = stage
+        self.reason = reason
+
+    def verdict(self) -> Verdict:
+        """
+        Returns the negative verdict of this rejection.
+        """
+        return Verdict(False, self.stage, self.reason)
+
+
+def _scalar(value, name: str, limit: int) -> int:
+    if not isinstance(value, int) or not 0 <= value < limit:
+        raise SignatureRejected(STRUCTURE, f"{name} is not an integer in range")
+    return value
+
+
+def _point(value, name: str) -> curve.Point:
+    if value is None:
+        raise SignatureRejected(STRUCTURE, f"{name} is the point at infinity")
+    try:
+        point = curve.from_py_ecc(value)
+        if len(value) != 2:
+            raise ValueError
+    except (TypeError, ValueError, LookupError):
+        raise SignatureRejected(STRUCTURE, f"{name} is not a pair of coordinates") from None
+    if not (0 <= point[0] < curve.FIELD_MODULUS and 0 <= point[1] < curve.FIELD_MODULUS):
+        raise SignatureRejected(STRUCTURE, f"{name} has a coordinate out of range")
+    return point
+
+
+def _sigma(value, index: int):
+    try:
+        public_ephemeral_val, small_s = value
+    except (TypeError, ValueError):
+        raise SignatureRejected(STRUCTURE, f"sigma {index} is not a pair (X, s)") from None
+    return (_point(public_ephemeral_val, f"X of sigma {index}"),
+            _scalar(small_s, f"s of sigma {index}", curve.CURVE_ORDER))
+
+
+def parse_values(message: int, new_public_key, ephemeral_randomness, sigmas, master_sum, ring_size: int):
+    # pylint: disable=R0913,R0917
+    """
+    Runs the STRUCTURE checks of every signature field but the ring keys.
+
+    Args:
+        ring_size (int): Number of ring keys, which must match the number of members.
+
+    Returns:
+        tuple: (new_public_key, ephemeral_randomness, sigmas, master_sum) with compact points.
+
+    Raises:
+        SignatureRejected: If a check fails.
+    """
+    _scalar(message, "message", _UINT256_LIMIT)
+    try:
+        count = len(ephemeral_randomness)
+        if count != len(sigmas):
+            raise SignatureRejected(STRUCTURE, "ephemeral randomness and sigmas are of different lengths")
+    except TypeError:
+        raise SignatureRejected(STRUCTURE, "ephemeral randomness and sigmas must be lists") from None
+    if not count:
+        raise SignatureRejected(STRUCTURE, "ephemeral randomness is empty")
+    if count != ring_size:
+        raise SignatureRejected(STRUCTURE, "ephemeral randomness and public keys are of different lengths")
+    _scalar(master_sum, "master sum", curve.CURVE_ORDER)
+    return (
+        _point(new_public_key, "new public key"),
+        [_point(randomness, f"randomness {i}") for i, randomness in enumerate(ephemeral_randomness)],
+        [_sigma(sigma, i) for i, sigma in enumerate(sigmas)],
+        master_sum
+    )
+
+
+def parse_keys(ext_public_keys) -> list:
+    """
+    Runs the STRUCTURE checks of a list of ring keys.
+
+    Returns:
+        list: The keys as compact points.
+
+    Raises:
+        SignatureRejected: If a check fails.
+    """
+    return [_point(key, f"public key {i}") for i, key in enumerate(ext_public_keys)]
+
+
+def parse_schnorr(pubkey, message: int, signature) -> tuple:
+    """
+    Runs the STRUCTURE and CURVE checks of a SchnorrSignature item (pubkey, message, (X, s)).
+
+    Returns:
+        tuple: (pubkey, X, s) with compact points.
+
+    Raises:
+        SignatureRejected: If a check fails.
+    """
+    _scalar(message, "message", _UINT256_LIMIT)
+    try:
+        public_ephemeral_val, small_s = signature
+    except (TypeError, ValueError):
+        raise SignatureRejected(STRUCTURE, "signature is not a pair (X, s)") from None
+    pubkey = _point(pubkey, "public key")
+    public_ephemeral_val = _point(public_ephemeral_val, "X")
+    _scalar(small_s, "s", curve.CURVE_ORDER)
+    _on_curve(pubkey, "public key")
+    _on_curve(public_ephemeral_val, "X")
+    return pubkey, public_ephemeral_val, small_s
+
+
+def check_curve(new_public_key, ephemeral_randomness, sigmas, ext_public_keys=()):
+    """
+    Runs the CURVE checks of the compact points returned by `parse_values` and `parse_keys`.
+
+    Raises:
+        SignatureRejected: If a point is not on the curve.
+    """
+    _on_curve(new_public_key, "new public key")
+    for i, randomness in enumerate(ephemeral_randomness):
+        _on_curve(randomness, f"randomness {i}")
+    for i, (public_ephemeral_val, _) in enumerate(sigmas):
+        _on_curve(public_ephemeral_val, f"X of sigma {i}")
+    for i, key in enumerate(ext_public_keys):
+        _on_curve(key, f"public key {i}")
+
+
+def _on_curve(point: curve.Point, name: str):
+    if not curve.is_on_curve(point):
+        raise SignatureRejected(CURVE, f"{name} is not on the curve")
@@ -0,0 +1,120 @@
+"""
+Module: ring_registry
+This module provides a registry of canonical rings, so signatures can reference their ring by
+identifier instead of carrying every public key.
+
+A `Ring` is a set of distinct public keys in canonical order (sorted by coordinates). Its
+identifier is `keccak256(abi.encodePacked(x_0, y_0, x_1, y_1, ...))` over the sorted keys, which
+is cheap to recompute on-chain. Everything derived from the keys alone is computed once when the
+ring is built: the validated compact points, the position of every key and the packed 32-byte
+coordinate words hashed by `nr_sign`.
+
+Signatures over a registered ring (see `NodeRingSchnorr.nr_sign_ring`) list their per-member
+values in ring order and are verified with `NodeRingSchnorr.nr_verify_ring`, which takes the
+keys from the registry instead of parsing them from the signature. Looking up an identifier that
+is not registered raises `UnknownRingError`.
+"""
+import threading
+from typing import Dict
+
+from . import curve
+from .hashing import WORD_SIZE, keccak256, pack_uint256
+
+
+class UnknownRingError(LookupError):
+    """
+    Raised for ring identifiers that are not registered; `ring_id` is the identifier.
+    """
+
+    def __init__(self, ring_id: bytes):
+        super().__init__(f"Unknown ring {bytes(ring_id).hex()}")
+        self.ring_id = bytes(ring_id)
+
+
+class Ring:
+    """
+    Canonical ring of distinct public keys with precomputed per-ring data.
+    """
+
+    def __init__(self, keys):
+        """
+        Args:
+            keys (iterable): Public keys as py_ecc or compact points, in any order.
+        """
+        points = [curve.from_py_ecc(key) for key in keys]
+        for point in points:
+            if point is None or not curve.is_on_curve(point):
+                raise ValueError(f"Ring key {point} is not a valid curve point")
+        self.keys = tuple(sorted(points))
+        self.positions = {point: position for position, point in enumerate(self.keys)}
+        if len(self.positions) != len(self.keys):
+            raise ValueError("Ring keys must be distinct")
+        self.encoded = pack_uint256(*[coordinate for point in self.keys for coordinate in point])
+        self.ring_id = keccak256(self.encoded)
+        self._x_words = [self.encoded[i:i + WORD_SIZE] for i in range(0, len(self.encoded), 2 * WORD_SIZE)]
+        self._y_words = [self.encoded[i:i + WORD_SIZE] for i in range(WORD_SIZE, len(self.encoded), 2 * WORD_SIZE)]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def position(self, key) -> int:
+        """
+        Returns the position of a public key in the ring, raising ValueError if it is not a member.
+        """
+        try:
+            return self.positions[curve.from_py_ecc(key)]
+        except KeyError:
+            raise ValueError("Public key is not a member of the ring") from None
+
+    def packed_coordinates(self, excluded: int = None) -> bytes:
+        """
+        Returns `abi.encodePacked` of all x coordinates followed by all y coordinates, leaving out
+        the key at position `excluded`.
+        """
+        if excluded is None:
+            return b"".join(self._x_words) + b"".join(self._y_words)
+        return b"".join(self._x_words[:excluded] + self._x_words[excluded + 1:] +
+                        self._y_words[:excluded] + self._y_words[excluded + 1:])
+
+
+class RingRegistry:
+    """
+    Thread-safe mapping of ring identifiers to rings; it can be pickled, e.g. for worker processes.
+    """
+
+    def __init__(self):
+        self._rings: Dict[bytes, Ring] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        with self._lock:
+            return dict(self._rings)
+
+    def __setstate__(self, rings):
+        self._rings = rings
+        self._lock = threading.Lock()
+
+    def register(self, keys) -> Ring:
+        """
+        Registers the ring of the given public keys; registering the same set of keys again
+        returns the existing ring.
+        """
+        ring = keys if isinstance(keys, Ring) else Ring(keys)
+        with self._lock:
+            return self._rings.setdefault(ring.ring_id, ring)
+
+    def get(self, ring_id: bytes) -> Ring:
+        """
+        Returns a registered ring, raising UnknownRingError for unknown identifiers.
+        """
+        with self._lock:
+            ring = self._rings.get(bytes(ring_id))
+        if ring is None:
+            raise UnknownRingError(ring_id)
+        return ring
+
+    def __contains__(self, ring_id) -> bool:
+        return bytes(ring_id) in self._rings
+
+    def __len__(self):
+        return len(self._rings)
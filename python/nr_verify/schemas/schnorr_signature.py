@@ -2,19 +2,54 @@
 Module: schnorr_signature
 This module provides implementation for Schnorr signature algorithm.
 """
-from typing import Tuple
+import secrets
+import types
+from typing import Iterable, List, Tuple
 
-from py_ecc.bn128 import multiply, add, curve_order, G1
+from . import prechecks
+from .backends import CurveBackend, get_backend
+from .curve import CURVE_ORDER as curve_order, to_py_ecc
+from .hashing import hash_to_scalar, pack_uint256
+from .nonces import nonce_source
+from .util import keccak256, addmodn, mulmodn
+from .verify_cache import VerificationCache, schnorr_key
 
-from .util import keccak256, encode_packed, randsn, addmodn, mulmodn
+
+class _InstanceOrClassMethod(classmethod):  # pylint: disable=R0903
+    """
+    Method bound to the instance when called on one and to the class otherwise,
+    so `SchnorrSignature.sign(...)` keeps working next to `SchnorrSignature(backend).sign(...)`.
+    """
+
+    def __get__(self, instance, owner=None):
+        return types.MethodType(self.__func__, owner if instance is None else instance)
 
 
-class SchnorrSignature:
+class SchnorrSignature:  # pylint: disable=C0202
     """
     Schnorr Signature implementation.
 
     This class provides methods for signing and verifying Schnorr signatures.
+    The curve arithmetic is done by `backend`; methods called on the class use the default backend.
+    `sign` and `verify` work on py_ecc points, `sign_native` and `verify_native` on the compact
+    int points of the curve module. Nonces come from the nonces module, random unless
+    `deterministic` is set. With a `verify_cache`, `verify` and `verify_batch` answer repeated
+    verifications from it (see the verify_cache module).
     """
+    backend: CurveBackend = get_backend()
+    deterministic: bool = False
+    verify_cache: VerificationCache = None
+
+    def __init__(self, backend=None, deterministic: bool = False, verify_cache: VerificationCache = None):
+        """
+        Args:
+            backend (str | CurveBackend): Curve backend (see `backends.BACKENDS`), None for the default.
+            deterministic (bool): Derive nonces from the private key and message (RFC 6979 style).
+            verify_cache (VerificationCache): Cache of verification results, None to disable caching.
+        """
+        self.backend = get_backend(backend)
+        self.deterministic = deterministic
+        self.verify_cache = verify_cache
 
     @staticmethod
     def hash(in_bytes: bytes) -> int:
@@ -33,7 +68,21 @@ class SchnorrSignature:
         return int.from_bytes(keccak256(in_bytes), byteorder="big") % curve_order
 
     @staticmethod
-    def sign(privkey: int, message: int):
+    def challenge(public_ephemeral_val: Tuple, message: int) -> int:
+        """
+        This function computes the Schnorr challenge h = Hash(X, message)
+
+        Args:
+            public_ephemeral_val (tuple): Public ephemeral point X of the signature.
+            message (int): Message corresponding to signature.
+
+        Returns:
+            int: The challenge reduced modulo the curve order.
+        """
+        return hash_to_scalar(int(public_ephemeral_val[0]), int(public_ephemeral_val[1]), message)
+
+    @_InstanceOrClassMethod
+    def sign(self, privkey: int, message: int):
         """
         This function computes schnorr signature with given private key over the message
 
@@ -44,24 +93,40 @@ class SchnorrSignature:
         Returns:
             tuple: Public key to verify signature, signature over the message
         """
-        pubkey = multiply(G1, privkey)
+        pubkey, (public_ephemeral_val, small_s) = self.sign_native(privkey, message)
+        return to_py_ecc(pubkey), (to_py_ecc(public_ephemeral_val), small_s)
+
+    @_InstanceOrClassMethod
+    def sign_native(self, privkey: int, message: int, priv_ephemeral_val: int = None):
+        """
+        This function computes schnorr signature like `sign`, with points as (x, y) int tuples
+
+        Args:
+            privkey (int): Private key.
+            message (int): Message to be signed.
+            priv_ephemeral_val (int): Private ephemeral value (nonce), drawn from the nonce source when omitted.
+
+        Returns:
+            tuple: Public key to verify signature, signature over the message
+        """
+        pubkey = self.backend.multiply_g1(privkey)
 
         # X = G * x
-        priv_ephemeral_val = randsn()
-        public_ephemeral_val = multiply(G1, priv_ephemeral_val)
+        if priv_ephemeral_val is None:
+            digest = keccak256(pack_uint256(message)) if self.deterministic else b""
+            priv_ephemeral_val = nonce_source(privkey, digest, self.deterministic).scalar()
+        public_ephemeral_val = self.backend.multiply_g1(priv_ephemeral_val)
 
         # h = Hash(X, message)
-        hash_val = int.from_bytes(
-            keccak256(encode_packed(public_ephemeral_val[0].n, public_ephemeral_val[1].n, message)),
-            'big') % curve_order
+        hash_val = SchnorrSignature.challenge(public_ephemeral_val, message)
 
         # s = x + a * h
         small_s = addmodn(priv_ephemeral_val, mulmodn(privkey, hash_val))
 
         return pubkey, (public_ephemeral_val, small_s)
 
-    @staticmethod
-    def verify(pubkey: Tuple, message: int, signature: Tuple[int, int]) -> bool:
+    @_InstanceOrClassMethod
+    def verify(self, pubkey: Tuple, message: int, signature: Tuple[int, int]) -> bool:
         """
         This function verifies schnorr signature with given public key over the message
 
@@ -70,31 +135,111 @@ class SchnorrSignature:
             message (int): Message corresponding to signature.
             signature (tuple): Signature to be verified.
 
+        Returns:
+            bool: True if signature is verified, else False (also for malformed input, see `verify_native`)
+        """
+        if self.verify_cache is None:
+            return self.verify_native(pubkey, message, signature)
+        return self.verify_cache.verify(
+            schnorr_key(pubkey, message, signature),
+            lambda: self.verify_native(pubkey, message, signature)
+        )
+
+    @_InstanceOrClassMethod
+    def verify_native(self, pubkey: Tuple, message: int, signature: Tuple) -> bool:
+        """
+        This function verifies schnorr signature like `verify`, with points as (x, y) int tuples
+
+        Malformed input (see `prechecks.parse_schnorr`) is rejected like in `verify_batch`.
+
+        Args:
+            pubkey (tuple): Public key.
+            message (int): Message corresponding to signature.
+            signature (tuple): Signature to be verified.
+
         Returns:
             bool: True if signature is verified, else False
         """
-        public_ephemeral_val, small_s = signature
+        try:
+            pubkey, public_ephemeral_val, small_s = prechecks.parse_schnorr(pubkey, message, signature)
+        except prechecks.SignatureRejected:
+            return False
 
         # h = Hash(X, message)
-        hash_val = int.from_bytes(
-            keccak256(
-                encode_packed(
-                    public_ephemeral_val[0].n,
-                    public_ephemeral_val[1].n,
-                    message)
-            ), 'big'
-        ) % curve_order
-        # sG = s * G
-        geneator_to_small_s = multiply(G1, small_s)
-
-        # hA = h * A
-        hash_times_pubkey = multiply(pubkey, hash_val)
-
-        # X + hA
-        result = add(public_ephemeral_val, hash_times_pubkey)
-
-        # Verify that s * G = X + h * A
-        return geneator_to_small_s == result
+        hash_val = SchnorrSignature.challenge(public_ephemeral_val, message)
+
+        # Verify that s * G = X + h * A, i.e. X = s * G - h * A in one combined multiplication
+        return self.backend.eq(
+            self.backend.multiply_two(self.backend.G1, small_s, pubkey, -hash_val),
+            public_ephemeral_val
+        )
+
+    @_InstanceOrClassMethod
+    def verify_batch(self, items: Iterable[Tuple]) -> List[bool]:
+        """
+        This function verifies many schnorr signatures at once
+
+        All signatures are checked with a single random linear combination
+        sum(z_i * s_i) * G = sum(z_i * X_i) + sum(z_i * h_i * A_i), which costs one
+        multi-scalar multiplication. If the combined check fails, the batch is split in
+        halves and re-checked until every invalid signature is located. Malformed items
+        (see `prechecks.parse_schnorr`) are False without entering the combination.
+
+        Args:
+            items (iterable): Tuples (pubkey, message, signature) as passed to `verify`.
+
+        Returns:
+            list: For every item, True if its signature is verified, else False
+        """
+        if self.verify_cache is None:
+            return self._verify_batch(items)
+        items = list(items)
+        return self.verify_cache.verify_batch(
+            [schnorr_key(*item) for item in items],
+            lambda positions: self._verify_batch([items[position] for position in positions])
+        )
+
+    @_InstanceOrClassMethod
+    def _verify_batch(self, items) -> List[bool]:
+        # Malformed items (wrong shape, point at infinity or off the curve, s out of range) are
+        # rejected on their own and left out of the linear combination
+        entries = {}
+        results = []
+        for index, (pubkey, message, signature) in enumerate(items):
+            try:
+                pubkey, public_ephemeral_val, small_s = prechecks.parse_schnorr(pubkey, message, signature)
+            except prechecks.SignatureRejected:
+                results.append(False)
+                continue
+            entries[index] = (pubkey, public_ephemeral_val, small_s,
+                              SchnorrSignature.challenge(public_ephemeral_val, message))
+            results.append(True)
+
+        pending = [list(entries)] if entries else []
+        while pending:
+            indices = pending.pop()
+            if len(indices) == 1:
+                pubkey, public_ephemeral_val, small_s, hash_val = entries[indices[0]]
+                results[indices[0]] = self.backend.eq(
+                    self.backend.multiply_two(self.backend.G1, small_s, pubkey, -hash_val),
+                    public_ephemeral_val
+                )
+            elif not self._combination_holds([entries[i] for i in indices]):
+                middle = len(indices) // 2
+                pending.extend((indices[:middle], indices[middle:]))
+        return results
+
+    @_InstanceOrClassMethod
+    def _combination_holds(self, entries) -> bool:
+        generator_scalar = 0
+        points = []
+        scalars = []
+        for pubkey, public_ephemeral_val, small_s, hash_val in entries:
+            weight = secrets.randbits(128) | 1
+            generator_scalar += weight * small_s
+            points.extend((public_ephemeral_val, pubkey))
+            scalars.extend((weight, weight * hash_val))
+        return self.backend.eq(self.backend.multiply_g1(generator_scalar), self.backend.msm(points, scalars))
 
 
 if __name__ == "__main__":
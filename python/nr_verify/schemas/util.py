@@ -12,7 +12,9 @@ Functions:
     padding.
 
 The module uses the `eth_api` library to handle byte-level conversions
-and the `Crypto.Hash` library to compute keccak256 hashes.
+and the `Crypto.Hash` library to compute keccak256 hashes. eth_abi and
+py_ecc are imported on the first `encode_packed` call, as importing them
+costs far more than the hashing itself.
 
 Example:
     The module can be used to encode multiple arguments into a byte string and
@@ -23,13 +25,15 @@ Example:
 
 from random import randint
 
-import py_ecc
-from py_ecc.bn128 import curve_order
 from Crypto.Hash import keccak
-from eth_abi import packed
+
+from . import instrumentation
+from .curve import CURVE_ORDER as curve_order
 
 def keccak256(arg):
     """Compute the keccak256 hash of the given arguments."""
+    instrumentation.count("hash")
+    instrumentation.count("hash_bytes", len(arg))
     hasher = keccak.new(digest_bits=256)
 
     hasher.update(arg)
@@ -41,6 +45,11 @@ def encode_packed(*args):
     Replicates Solidity's `abi.encodePacked`. This function takes any number
     of uint256 arguments and encodes them as a concatenated byte string.
     """
+    # pylint: disable=C0415
+    from eth_abi import packed
+    from py_ecc.fields import bn128_FQ
+
+    instrumentation.count("encode")
     types = []
     values = []
 
@@ -49,10 +58,10 @@ def encode_packed(*args):
             # Handle integers
             types.append('uint256')
             values.append(arg)
-        elif isinstance(arg, py_ecc.fields.bn128_FQ):
-            # Handle strings (you must decide on the encoding)
+        elif isinstance(arg, bn128_FQ):
+            # Handle field elements
             types.append('uint256')
-            values.append(int(str(arg)))
+            values.append(arg.n)
             # Add other data types as needed
     return packed.encode_packed(types, values)
 
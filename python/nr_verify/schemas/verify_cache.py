@@ -0,0 +1,166 @@
+"""
+Module: verify_cache
+This module provides a bounded cache of signature verification results.
+
+Replayed and fanned-out signatures reach a verifier many times. `VerificationCache` remembers
+the verdict of every (message, signature) pair, keyed by a BLAKE2b digest of its canonical
+encoding: the wire format of the encoding module (uncompressed) preceded by the message word and,
+for Schnorr signatures, the public key. Verdicts expire `ttl` seconds after they were stored and
+the least recently used ones are evicted beyond `max_entries`.
+
+SchnorrSignature and NodeRingSchnorr take a cache as `verify_cache`; their results do not
+change, only repeated verifications are answered from the cache. Inputs that cannot be encoded
+(e.g. out of range values) bypass it. The cache is shared between threads.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from . import encoding, instrumentation
+
+DEFAULT_MAX_ENTRIES = 1 << 16
+
+_DIGEST_SIZE = 32
+_WORD_SIZE = 32
+
+
+def _digest(*parts: bytes) -> bytes:
+    return hashlib.blake2b(b"".join(parts), digest_size=_DIGEST_SIZE).digest()
+
+
+def schnorr_key(public_key, message: int, signature) -> Optional[bytes]:
+    """
+    Returns the cache key of a Schnorr signature verification, None if the input cannot be encoded.
+    """
+    try:
+        return _digest(encoding.encode_point(public_key), message.to_bytes(_WORD_SIZE, "big"),
+                       encoding.encode_schnorr_signature(signature))
+    except (TypeError, ValueError, LookupError, AttributeError, OverflowError):
+        return None
+
+
+def ring_key(message: int, signature) -> Optional[bytes]:
+    """
+    Returns the cache key of a ring signature verification (`nr_sign` or, for five-field
+    signatures starting with a ring identifier, `nr_sign_ring` signatures), None if the input
+    cannot be encoded.
+    """
+    try:
+        encode = (encoding.encode_ring_reference_signature if isinstance(signature[0], bytes)
+                  else encoding.encode_ring_signature)
+        return _digest(message.to_bytes(_WORD_SIZE, "big"), encode(signature))
+    except (TypeError, ValueError, LookupError, AttributeError, OverflowError):
+        return None
+
+
+class VerificationCache:  # pylint: disable=R0902
+    """
+    LRU cache of verdicts keyed by digest, bounded by number of entries and age.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = None, clock=time.monotonic):
+        """
+        Args:
+            max_entries (int): Maximal number of cached verdicts.
+            ttl (float): Seconds a verdict stays valid, None to keep it until evicted.
+            clock (callable): Source of the current time in seconds.
+        """
+        if max_entries < 0:
+            raise ValueError("Number of entries must not be negative")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("Time to live must be positive")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._verdicts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Optional[bytes]) -> Optional[bool]:
+        """
+        Returns the cached verdict of a key, None on a miss.
+        """
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._verdicts.get(key)
+            if entry is not None and self.ttl is not None and entry[1] <= self.clock():
+                del self._verdicts[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._verdicts.move_to_end(key)
+                self.hits += 1
+        instrumentation.count("verify_cache.miss" if entry is None else "verify_cache.hit")
+        return None if entry is None else entry[0]
+
+    def put(self, key: Optional[bytes], verdict: bool):
+        """
+        Stores the verdict of a key.
+        """
+        if key is None or not self.max_entries:
+            return
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        with self._lock:
+            self._verdicts[key] = (bool(verdict), expires)
+            self._verdicts.move_to_end(key)
+            while len(self._verdicts) > self.max_entries:
+                self._verdicts.popitem(last=False)
+                self.evictions += 1
+
+    def verify(self, key: Optional[bytes], verify) -> bool:
+        """
+        Returns the cached verdict of a key, calling `verify()` and storing its result on a miss.
+        """
+        verdict = self.get(key)
+        if verdict is None:
+            verdict = bool(verify())
+            self.put(key, verdict)
+        return verdict
+
+    def verify_batch(self, keys, verify_batch) -> list:
+        """
+        Answers the cached keys and calls `verify_batch(positions)` once with the positions of the
+        missing ones, which must return one verdict per position.
+        """
+        verdicts = [self.get(key) for key in keys]
+        missing = [position for position, verdict in enumerate(verdicts) if verdict is None]
+        if missing:
+            for position, verdict in zip(missing, verify_batch(missing)):
+                verdicts[position] = bool(verdict)
+                self.put(keys[position], verdict)
+        return verdicts
+
+    def stats(self) -> dict:
+        """
+        Returns the number of cached verdicts, hits, hit rate, misses, expirations and evictions.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._verdicts),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        """
+        Drops every cached verdict and resets the statistics.
+        """
+        with self._lock:
+            self._verdicts.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self):
+        return len(self._verdicts)
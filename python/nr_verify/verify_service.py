@@ -0,0 +1,433 @@
+"""
+Module: verify_service
+Asyncio TCP service verifying SchnorrSignature and NodeRingSchnorr signatures in micro-batches.
+
+Requests are queued as they arrive and coalesced into micro-batches of at most `batch_size`
+records, each closed at the latest `max_delay` seconds after its first record was taken from
+the queue. A batch is decoded and verified with one `verify_batch` / `nr_verify_batch` call per
+kind on a worker pool (a thread by default, `workers` processes otherwise), so the event loop only
+moves frames; at most two batches per worker are in flight. The queue holds at most `max_queue`
+requests: when it is full, connections stop being read until it drains, so clients are slowed
+down by TCP flow control instead of the service buffering without bound.
+
+Protocol: both directions carry frames `length | payload`, with a 4-byte big-endian length.
+    request payload: a binary record of the bulk_verify module (`frame | message | public key`),
+        or an empty payload asking for the metrics.
+    response payload: one status byte per record (INVALID, VALID, MALFORMED, or ERROR if the
+        verification itself failed), or the metrics as a JSON object. Records that cannot be
+        decoded or fail the STRUCTURE checks of the prechecks module (e.g. a point at infinity or
+        a scalar not below the curve order) are MALFORMED and left out of the verification of
+        their batch. If verifying a batch raises, its records are verified one at a time, so only
+        the failing one is ERROR. Signatures referencing a registered ring (`nr_sign_ring`) are
+        verified against the `registry` of the service (the rings given with `--ring`), and are
+        ERROR if their ring is unknown; without a registry they are MALFORMED.
+Responses follow the order of the requests of a connection, so clients may pipeline requests.
+
+Metrics: requests, valid/invalid/malformed/error counts, batches and mean batch size, current queue
+depth and batches in flight, and latency percentiles from reading a request to its verdict.
+
+Usage:
+    python -m nr_verify.verify_service [--host 127.0.0.1] [--port 8765] [--batch-size 64]
+        [--max-delay-ms 2] [--max-queue 4096] [--workers N] [--ring KEY_STORE ...]
+"""
+import argparse
+import asyncio
+import json
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from . import bulk_verify
+from .schemas import encoding
+from .schemas.key_store import KeyStore
+from .schemas.ring_registry import RingRegistry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_DELAY = 0.002
+DEFAULT_MAX_QUEUE = 4096
+MAX_FRAME_SIZE = 1 << 24
+
+INVALID = 0
+VALID = 1
+MALFORMED = 2
+ERROR = 3
+
+_LENGTH = struct.Struct(">I")
+_STATUS_COUNTERS = {INVALID: "invalid", VALID: "valid", MALFORMED: "malformed", ERROR: "errors"}
+_VERIFIED_KINDS = (encoding.SCHNORR_SIGNATURE, encoding.RING_SIGNATURE)
+
+# Ring registry of the worker thread or process, installed once by the pool initializer
+_worker = threading.local()
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """
+    Reads one length-prefixed frame, raising asyncio.IncompleteReadError at the end of the stream.
+    """
+    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame of {length} bytes exceeds the limit of {MAX_FRAME_SIZE}")
+    return await reader.readexactly(length)
+
+
+def write_frame(writer: asyncio.StreamWriter, payload: bytes):
+    """
+    Writes one length-prefixed frame.
+    """
+    writer.write(_LENGTH.pack(len(payload)) + payload)
+
+
+def check_payloads(payloads, registry: RingRegistry = None) -> list:
+    """
+    Decodes and verifies a batch of request payloads, see `bulk_verify.check_records`. Runs on the
+    worker pool of the service.
+
+    Returns:
+        list: Status per payload, MALFORMED for payloads that cannot be decoded or fail the
+            STRUCTURE checks (see `bulk_verify.check_structure`), and for references to a ring
+            without a registry; ERROR if the referenced ring is not registered.
+    """
+    kinds = _VERIFIED_KINDS if registry is None else (*_VERIFIED_KINDS, encoding.RING_REFERENCE_SIGNATURE)
+    statuses = [MALFORMED] * len(payloads)
+    positions = []
+    records = []
+    for i, payload in enumerate(payloads):
+        try:
+            record = bulk_verify.decode_record(payload)
+        except ValueError:
+            continue
+        if record[0] in kinds:
+            positions.append(i)
+            records.append(record)
+    for i, (verdict, error) in zip(positions, bulk_verify.check_records(records, registry)):
+        statuses[i] = ERROR if error is not None else VALID if verdict else INVALID
+    return statuses
+
+
+def _init_worker(registry: RingRegistry):
+    _worker.registry = registry
+
+
+def _check_on_worker(payloads) -> list:
+    # Only the payloads are sent to the pool; the registry was installed by `_init_worker`
+    return check_payloads(payloads, _worker.registry)
+
+
+class VerificationService:  # pylint: disable=R0902
+    """
+    Micro-batching verification server; start it with `start` or use it as an async context manager.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, max_delay: float = DEFAULT_MAX_DELAY,
+                 max_queue: int = DEFAULT_MAX_QUEUE, workers: int = None, registry: RingRegistry = None):
+        # pylint: disable=R0913,R0917
+        """
+        Args:
+            batch_size (int): Maximal number of records per batch.
+            max_delay (float): Seconds a batch waits for more records after its first one.
+            max_queue (int): Maximal number of queued requests before reading is paused.
+            workers (int): Number of worker processes, None to verify on one thread.
+            registry (RingRegistry): Rings that signatures may reference, None to reject references.
+        """
+        if batch_size < 1 or max_queue < 1:
+            raise ValueError("Batch size and queue size must be positive")
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self.workers = workers
+        self.registry = registry
+        self.stats = {"requests": 0, "valid": 0, "invalid": 0, "malformed": 0, "errors": 0, "batches": 0,
+                      "batched": 0}
+        self.latencies = bulk_verify.LatencyHistogram()
+        self.server = None
+        self._queue = None
+        self._slots = None
+        self._in_flight = 0
+        self._executor = None
+        self._tasks = set()
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """
+        Starts listening; port 0 picks a free port, see `address`.
+        """
+        self._queue = asyncio.Queue(self.max_queue)
+        self._slots = asyncio.Semaphore(2 * (self.workers or 1))
+        executor = ProcessPoolExecutor if self.workers else ThreadPoolExecutor
+        self._executor = executor(self.workers or 1, initializer=_init_worker, initargs=(self.registry,))
+        self._spawn(self._batch_loop())
+        self.server = await asyncio.start_server(self._serve, host, port)
+        return self
+
+    @property
+    def address(self):
+        """
+        The (host, port) the service listens on.
+        """
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """
+        Stops listening, cancels pending work and shuts the worker pool down.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    async def __aenter__(self):
+        return await self.start(DEFAULT_HOST, 0) if self.server is None else self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _track(self, task: asyncio.Task) -> asyncio.Task:
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        return self._track(asyncio.ensure_future(coroutine))
+
+    def metrics(self) -> dict:
+        """
+        Returns the counters, queue depth, batches in flight and latency percentiles.
+        """
+        metrics = dict(self.stats)
+        metrics["mean_batch_size"] = self.stats["batched"] / self.stats["batches"] if self.stats["batches"] else 0.0
+        metrics["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        metrics["in_flight"] = self._in_flight
+        for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            metrics[f"latency_{name}_ms"] = 1000 * self.latencies.percentile(fraction)
+        metrics["latency_max_ms"] = 1000 * self.latencies.maximum
+        return metrics
+
+    async def _submit(self, payload: bytes) -> asyncio.Future:
+        # Queues a payload, waiting while the queue is full, and returns the future of its status
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((payload, future, time.perf_counter()))
+        return future
+
+    async def verify(self, payload: bytes) -> int:
+        """
+        Queues an encoded record (see `bulk_verify.encode_record`) and returns its status.
+        """
+        return await (await self._submit(payload))
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Reads requests until the end of the stream; responses are written in request order.
+        # Connections still open when the service closes are cancelled by `close`.
+        self._track(asyncio.current_task())
+        responses = asyncio.Queue()
+        sender = self._spawn(self._send(responses, writer))
+        try:
+            while True:
+                payload = await read_frame(reader)
+                if not payload:
+                    responses.put_nowait(self.metrics())
+                    continue
+                self.stats["requests"] += 1
+                responses.put_nowait(await self._submit(payload))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            responses.put_nowait(None)
+            await asyncio.gather(sender, return_exceptions=True)
+        except asyncio.CancelledError:
+            sender.cancel()
+
+    @staticmethod
+    async def _send(responses: asyncio.Queue, writer: asyncio.StreamWriter):
+        try:
+            while (response := await responses.get()) is not None:
+                if isinstance(response, dict):
+                    payload = json.dumps(response).encode()
+                elif isinstance(response, asyncio.Future):
+                    try:
+                        payload = bytes([await response])
+                    except Exception:  # pylint: disable=W0718
+                        payload = bytes([ERROR])
+                else:
+                    payload = bytes([response])
+                write_frame(writer, payload)
+                if responses.empty():
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _next_batch(self) -> list:
+        # Waits for a record and collects more until the batch is full or its deadline has passed
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _batch_loop(self):
+        while True:
+            batch = await self._next_batch()
+            await self._slots.acquire()
+            self._in_flight += 1
+            self._spawn(self._verify_batch(batch))
+
+    async def _verify_batch(self, batch):
+        try:
+            payloads = [payload for payload, _, _ in batch]
+            statuses = await asyncio.get_running_loop().run_in_executor(self._executor, _check_on_worker, payloads)
+        except Exception as exc:  # pylint: disable=W0718
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+        self.stats["batches"] += 1
+        self.stats["batched"] += len(batch)
+        done = time.perf_counter()
+        for (_, future, queued), status in zip(batch, statuses):
+            self.stats[_STATUS_COUNTERS[status]] += 1
+            self.latencies.add(done - queued)
+            if not future.done():
+                future.set_result(status)
+
+
+class VerificationClient:
+    """
+    Pipelining client of a VerificationService.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._lock = asyncio.Lock()
+        self._pending = asyncio.Queue()
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> "VerificationClient":
+        """
+        Opens a connection to a service.
+        """
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def _receive(self):
+        try:
+            while True:
+                payload = await read_frame(self.reader)
+                future = self._pending.get_nowait()
+                if not future.done():
+                    future.set_result(payload)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as exc:
+            while not self._pending.empty():
+                future = self._pending.get_nowait()
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Connection lost: {exc}"))
+
+    async def request(self, payload: bytes) -> bytes:
+        """
+        Sends one request payload and returns the response payload.
+        """
+        future = asyncio.get_running_loop().create_future()
+        async with self._lock:
+            self._pending.put_nowait(future)
+            write_frame(self.writer, payload)
+            await self.writer.drain()
+        return await future
+
+    async def verify_record(self, record: bytes) -> int:
+        """
+        Returns the status (INVALID, VALID, MALFORMED or ERROR) of an encoded record.
+        """
+        return (await self.request(record))[0]
+
+    async def verify(self, message: int, signature, public_key=None) -> bool:
+        """
+        Returns whether a signature is valid; `public_key` is required for Schnorr signatures.
+        """
+        return await self.verify_record(bulk_verify.encode_record(message, signature, public_key)) == VALID
+
+    async def metrics(self) -> dict:
+        """
+        Returns the metrics of the service.
+        """
+        return json.loads(await self.request(b""))
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._receiver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def serve(host: str, port: int, **kwargs):
+    """
+    Runs a service until cancelled.
+    """
+    service = await VerificationService(**kwargs).start(host, port)
+    print(f"listening on {':'.join(map(str, service.address))}", flush=True)
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None) -> int:
+    """
+    Run the service.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--max-delay-ms", type=float, default=1000 * DEFAULT_MAX_DELAY)
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, one thread when omitted")
+    parser.add_argument("--ring", action="append", default=[], help="key store file of a referenced ring")
+    args = parser.parse_args(argv)
+
+    registry = None
+    if args.ring:
+        registry = RingRegistry()
+        for path in args.ring:
+            with KeyStore(path) as keys:
+                registry.register(keys)
+    try:
+        asyncio.run(serve(args.host, args.port, batch_size=args.batch_size, max_delay=args.max_delay_ms / 1000,
+                          max_queue=args.max_queue, workers=args.workers, registry=registry))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,14 @@
 """
 File for running app
+
+Kept for compatibility; the commands are also available as `python -m nr_verify deploy|client`.
 """
-from nr_verify.deployment import run_client, deploy_contract
+import sys
+
+from nr_verify.__main__ import main
 
 TYPE = "deploy"
 
 
-if TYPE == "deploy":
-    deploy_contract()
-else:
-    run_client()
+if __name__ == "__main__":
+    sys.exit(main([TYPE if TYPE == "deploy" else "client"]))
@@ -1,9 +1,31 @@
 """
 Module with tests
 """
+import asyncio
+import hashlib
+import io
+import json
+import pickle
+import random
 
+import pytest
+from py_ecc.bn128 import multiply, add, neg, G1, curve_order
+
+from benchmarks import importtime, suite
+from nr_verify import __main__ as cli, bulk_verify, verify_service
+from nr_verify.schemas import curve, encoding, glv, hashing, instrumentation, prechecks
+from nr_verify.schemas.backends import BACKENDS, CurveBackend, JacobianBackend
+from nr_verify.schemas.fixed_base import FixedBaseTable, multiply_g1
+from nr_verify.schemas.key_cache import KeyTableCache, table_bytes
+from nr_verify.schemas.key_store import KeyStore, write_key_store
+from nr_verify.schemas.msm import FixedPointsTable, multi_scalar_multiply, pippenger, straus
+from nr_verify.schemas.nonces import DeterministicNonces, RandomNonces
+from nr_verify.schemas.node_ring_schnorr import NodeRingSchnorr
+from nr_verify.schemas.parallel import MemberPool
+from nr_verify.schemas.ring_registry import Ring, RingRegistry, UnknownRingError
 from nr_verify.schemas.util import encode_packed, keccak256
 from nr_verify.schemas.schnorr_signature import SchnorrSignature
+from nr_verify.schemas.verify_cache import VerificationCache
 
 def test_utils():
     """
@@ -45,3 +67,869 @@ def test_schnorr_sign():
     assert not SchnorrSignature.verify(pubkey_2, 124, signature_2)
     assert not SchnorrSignature.verify(pubkey_1, message, signature_2)
     assert not SchnorrSignature.verify(pubkey_2, message, signature_1)
+
+
+def test_node_ring_schnorr():
+    """
+    Test for node ring signing scheme
+    """
+    privkey = 34783947491279721981739821
+    scheme = NodeRingSchnorr()
+
+    signature = scheme.nr_sign(privkey, 123, [multiply(G1, 2), multiply(G1, 3)])
+
+    assert scheme.nr_verify(123, signature)
+    assert not scheme.nr_verify(124, signature)
+
+
+def test_fixed_base_table(tmp_path):
+    """
+    Test that precomputed generator multiplication matches py_ecc, also after persisting the table
+    """
+    scalars = [0, 1, 2, 63, 64, curve_order - 1, curve_order, curve_order + 5, 2 ** 256 - 1,
+               19977808579986318922850133509558564821349392755821541651519240729619349670944]
+    table = FixedBaseTable(window=4)
+    table.save(tmp_path / "g1.bin")
+    loaded = FixedBaseTable.load(tmp_path / "g1.bin")
+
+    for scalar in scalars:
+        expected = multiply(G1, scalar % curve_order)
+        assert table.multiply(scalar) == expected
+        assert loaded.multiply(scalar) == expected
+        assert multiply_g1(scalar) == expected
+
+    data = (tmp_path / "g1.bin").read_bytes()
+    for corrupt in (data[:4], data[:4] + b"\x00" + data[5:], data[:4] + b"\x11" + data[5:], data[:-1]):
+        (tmp_path / "corrupt.bin").write_bytes(corrupt)
+        with pytest.raises(ValueError):
+            FixedBaseTable.load(tmp_path / "corrupt.bin")
+
+
+def test_multi_scalar_multiply():
+    """
+    Test that both multi-scalar multiplication algorithms match summing py_ecc products
+    """
+    points = [multiply(G1, i * 7 + 1) for i in range(12)] + [None]
+    scalars = [curve_order - i * 3 - 1 for i in range(12)] + [5]
+    expected = None
+    for point, scalar in zip(points, scalars):
+        expected = add(expected, multiply(point, scalar))
+
+    assert straus(points, scalars) == expected
+    assert pippenger(points, scalars) == expected
+    assert pippenger(points, scalars, window=5) == expected
+    assert multi_scalar_multiply(points, scalars) == expected
+    assert multi_scalar_multiply([G1, neg(G1)], [3, 3]) is None
+
+
+def test_node_ring_schnorr_rejects_tampering():
+    """
+    Test that tampering with any part of a ring signature is detected
+    """
+    scheme = NodeRingSchnorr()
+    new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = scheme.nr_sign(
+        34783947491279721981739821, 123, [multiply(G1, 2), multiply(G1, 3), multiply(G1, 4)]
+    )
+
+    forged_sigmas = list(sigmas)
+    forged_sigmas[1] = (sigmas[1][0], (sigmas[1][1] + 1) % curve_order)
+    assert not scheme.nr_verify(
+        123, (new_public_key, ephemeral_randomness, forged_sigmas, master_sum, ext_public_keys)
+    )
+    assert not scheme.nr_verify(
+        123, (new_public_key, ephemeral_randomness, sigmas, (master_sum + 1) % curve_order, ext_public_keys)
+    )
+    assert not scheme.nr_verify(
+        123, (multiply(G1, 5), ephemeral_randomness, sigmas, master_sum, ext_public_keys)
+    )
+
+
+def test_schnorr_verify_batch():
+    """
+    Test that batch verification reports exactly the invalid signatures
+    """
+    items = []
+    for privkey in range(1000, 1012):
+        pubkey, signature = SchnorrSignature.sign(privkey, privkey)
+        items.append((pubkey, privkey, signature))
+    items[3] = (items[3][0], 7, items[3][2])
+    items[8] = (items[8][0], items[8][1], items[9][2])
+
+    assert SchnorrSignature.verify_batch(items) == [i not in (3, 8) for i in range(len(items))]
+    assert SchnorrSignature.verify_batch(items[:3]) == [True, True, True]
+    assert not SchnorrSignature.verify_batch([])
+
+    # Malformed items are rejected on their own instead of failing the batch
+    pubkey, message, (public_ephemeral_val, small_s) = items[0]
+    malformed = [(pubkey, message, (None, small_s)), (None, message, (public_ephemeral_val, small_s)),
+                 (pubkey, message, (public_ephemeral_val, curve_order)), (pubkey, message, ((1, 3), small_s)),
+                 (pubkey, message, (public_ephemeral_val,)), (pubkey, 1 << 256, (public_ephemeral_val, small_s))]
+    assert SchnorrSignature.verify_batch(items[:2] + malformed + items[2:4]) == [True] * 2 + [False] * 6 + [True, False]
+    assert not any(SchnorrSignature.verify(*item) for item in malformed)
+
+
+def test_node_ring_schnorr_verify_batch():
+    """
+    Test that ring batch verification over different rings reports exactly the invalid signatures
+    """
+    scheme = NodeRingSchnorr()
+    ring = [multiply(G1, 2), multiply(G1, 3)]
+    items = [(message, scheme.nr_sign(1000 + message, message, list(ring))) for message in range(5)]
+    items.append((5, scheme.nr_sign(1005, 5, [multiply(G1, 7)])))
+    items[2] = (99, items[2][1])
+    items[4] = (4, items[4][1][:3] + ((items[4][1][3] + 1) % curve_order,) + items[4][1][4:])
+
+    assert scheme.nr_verify_batch(items) == [i not in (2, 4) for i in range(len(items))]
+    assert not scheme.nr_verify_batch([])
+
+
+def test_backends_produce_identical_signatures():
+    """
+    Test that every curve backend produces and accepts exactly the same signatures
+    """
+    ring = [multiply(G1, 2), multiply(G1, 3)]
+    schnorr_signatures = []
+    ring_signatures = []
+    for backend in BACKENDS:
+        schnorr_signatures.append(SchnorrSignature(backend, deterministic=True).sign(34783947491279721981739821, 123))
+        ring_signatures.append(NodeRingSchnorr(backend, deterministic=True).nr_sign(
+            34783947491279721981739821, 123, list(ring)))
+
+    assert all(signature == schnorr_signatures[0] for signature in schnorr_signatures)
+    assert all(signature == ring_signatures[0] for signature in ring_signatures)
+    for backend in BACKENDS:
+        pubkey, signature = schnorr_signatures[0]
+        assert SchnorrSignature(backend).verify(pubkey, 123, signature)
+        assert NodeRingSchnorr(backend).nr_verify(123, ring_signatures[0])
+        assert not NodeRingSchnorr(backend).nr_verify(124, ring_signatures[0])
+
+    class IncompleteBackend(CurveBackend):  # pylint: disable=W0223
+        """
+        Backend lacking `add`, `neg` and `eq`
+        """
+
+        def multiply(self, point, scalar: int):
+            return curve.multiply(point, scalar)
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()  # pylint: disable=E0110
+
+
+def test_curve_matches_py_ecc():
+    """
+    Test that the integer curve arithmetic matches py_ecc and round-trips py_ecc points
+    """
+    point = multiply(G1, 987654321)
+    compact = curve.from_py_ecc(point)
+    scalars = [0, 1, 2, 3, curve_order - 1, 2 ** 200 + 12345]
+
+    assert curve.to_py_ecc(compact) == point
+    assert curve.is_on_curve(compact)
+    assert not curve.is_on_curve((compact[0], compact[1] + 1))
+    for scalar in scalars:
+        assert curve.multiply(compact, scalar) == curve.from_py_ecc(multiply(point, scalar))
+    assert curve.add(compact, curve.G1) == curve.from_py_ecc(add(point, G1))
+    assert curve.add(compact, compact) == curve.from_py_ecc(add(point, point))
+    assert curve.add(compact, curve.neg(compact)) is None
+    jacobian = [curve.jacobian_multiply(compact, scalar) for scalar in scalars]
+    assert curve.batch_to_affine(jacobian) == [curve.to_affine(point) for point in jacobian]
+
+
+def test_glv_matches_py_ecc():
+    """
+    Differential test of GLV/wNAF multiplication and Shamir's trick against py_ecc
+    """
+    rng = random.Random(7)
+    point = multiply(G1, 1234567)
+    scalars = [0, 1, 2, glv.LAMBDA, curve_order - 1, curve_order + 3, -5]
+    scalars += [rng.randrange(curve_order) for _ in range(8)]
+
+    for scalar in scalars:
+        k_1, k_2 = glv.decompose(scalar)
+        assert (k_1 + k_2 * glv.LAMBDA - scalar) % curve_order == 0
+        assert abs(k_1) < 2 ** 128 and abs(k_2) < 2 ** 128
+        assert sum(digit << i for i, digit in enumerate(glv.wnaf(abs(scalar), 5))) == abs(scalar)
+
+        expected = multiply(point, scalar % curve_order)
+        assert glv.multiply(curve.from_py_ecc(point), scalar) == curve.from_py_ecc(expected)
+        assert glv.GlvTable(curve.from_py_ecc(point), 3).multiply(scalar) == curve.from_py_ecc(expected)
+        assert glv.multiply_two(curve.G1, scalar, curve.from_py_ecc(point), -scalar) == curve.from_py_ecc(
+            add(multiply(G1, scalar % curve_order), neg(expected))
+        )
+
+
+def test_hashing_matches_encode_packed():
+    """
+    Test that the fixed-width hashing pipeline matches eth_abi based encode_packed
+    """
+    values = [0, 1, 0x1234, curve_order - 1, 2 ** 256 - 1]
+    assert hashing.pack_uint256(*values) == encode_packed(*values)
+    assert hashing.pack_uint256() == b""
+
+    expected = int.from_bytes(keccak256(encode_packed(*values)), byteorder="big") % curve_order
+    assert hashing.hash_to_scalar(*values) == expected
+    assert hashing.PrefixedHasher(*values[:2]).hash_to_scalar(*values[2:]) == expected
+
+    for value in (-1, 2 ** 256):
+        with pytest.raises(ValueError):
+            hashing.pack_uint256(value)
+
+
+def test_parallel_node_ring_schnorr_matches_serial():
+    """
+    Test that the process pool mode signs and verifies exactly like the serial mode
+    """
+    private_key = 0x1234
+    message = 0x5678
+    ring = [multiply(G1, 100 + i) for i in range(7)]
+
+    serial = NodeRingSchnorr(deterministic=True).nr_sign(private_key, message, list(ring))
+    with NodeRingSchnorr(workers=3, min_chunk_size=2, deterministic=True) as scheme:
+        parallel = scheme.nr_sign(private_key, message, list(ring))
+        assert parallel == serial
+        assert scheme.nr_verify(message, parallel)
+        assert not scheme.nr_verify(message + 1, parallel)
+        assert scheme.nr_verify_batch([(message, parallel), (message + 1, parallel)]) == [True, False]
+
+    points = [curve.multiply(curve.G1, i + 1) for i in range(9)]
+    scalars = [3 * i + 1 for i in range(9)]
+    with MemberPool(workers=2, min_chunk_size=4) as pool:
+        assert pool.chunk_ranges(9) == [(0, 5), (5, 9)]
+        assert pool.msm(BACKENDS["jacobian"], points, scalars) == multi_scalar_multiply(points, scalars)
+
+
+def test_signature_encoding_round_trip():
+    """
+    Test encoding and decoding of signatures, plain and compressed, one at a time and from a shared buffer
+    """
+    private_key = 0x1234
+    message = 0x5678
+    _, schnorr_signature = SchnorrSignature.sign(private_key, message)
+    ring_scheme = NodeRingSchnorr()
+    ring_signature = ring_scheme.nr_sign(private_key, message, [multiply(G1, 3), multiply(G1, 5)])
+    native_schnorr = (curve.from_py_ecc(schnorr_signature[0]), schnorr_signature[1])
+    native_ring = NodeRingSchnorr.native_signature(ring_signature)
+
+    buffer = bytearray()
+    for compressed in (False, True):
+        encoded = encoding.encode_schnorr_signature(schnorr_signature, compressed)
+        assert len(encoded) == 7 + encoding.point_size(compressed) + 32
+        assert encoding.decode_schnorr_signature(encoded) == native_schnorr
+        encoded_ring = encoding.encode_ring_signature(ring_signature, compressed)
+        assert encoding.frame_size(encoded_ring) == len(encoded_ring)
+        decoded_ring = encoding.decode_ring_signature(encoded_ring)
+        assert decoded_ring == native_ring
+        assert ring_scheme.nr_verify(message, decoded_ring)
+        buffer += encoded + encoded_ring
+
+    assert list(encoding.iter_signatures(buffer)) == [
+        (encoding.SCHNORR_SIGNATURE, native_schnorr), (encoding.RING_SIGNATURE, native_ring)
+    ] * 2
+    for compressed in (False, True):
+        assert encoding.decode_point(encoding.encode_point(None, compressed), 0, compressed) == (
+            None, encoding.point_size(compressed))
+
+
+def test_signature_decoding_rejects_malformed_input():
+    """
+    Test that decoding rejects truncated, non-canonical and off-curve encodings
+    """
+    _, signature = SchnorrSignature.sign(0x1234, 0x5678)
+    encoded = encoding.encode_schnorr_signature(signature)
+    off_curve = encoded[:7] + (1).to_bytes(32, "big") + (1).to_bytes(32, "big") + encoded[-32:]
+    invalid = [
+        encoded[:-1],
+        encoded + b"\0",
+        b"XXXX" + encoded[4:],
+        encoded[:4] + bytes([2]) + encoded[5:],
+        encoded[:6] + bytes([0x80]) + encoded[7:],
+        off_curve,
+        encoded[:-32] + curve_order.to_bytes(32, "big"),
+        encoding.encode_ring_signature((None, [], [], 0, []))
+    ]
+    for buffer in invalid:
+        with pytest.raises(ValueError):
+            encoding.decode_schnorr_signature(buffer)
+    with pytest.raises(ValueError):
+        encoding.decode_point(curve.FIELD_MODULUS.to_bytes(32, "big"), 0, True)
+
+
+def test_bulk_verify(tmp_path):
+    """
+    Test the bulk verification tool on binary and JSONL files with valid, invalid and unreadable records
+    """
+    public_key, schnorr_signature = SchnorrSignature.sign(0x1234, 0x5678)
+    ring_signature = NodeRingSchnorr().nr_sign(0x1234, 0x5678, [multiply(G1, 3)])
+    records = [(0x5678, schnorr_signature, public_key), (0x5678, ring_signature, None), (0x5679, ring_signature, None)]
+
+    binary = b"".join(bulk_verify.encode_record(*record, compressed=i == 1) for i, record in enumerate(records))
+    (tmp_path / "signatures.bin").write_bytes(binary)
+    lines = [bulk_verify.json_record(*record) for record in records] + ['{"kind": "ring"}']
+    (tmp_path / "signatures.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    for name, expected in (("signatures.bin", [True, True, False]), ("signatures.jsonl", [True, True, False, False])):
+        assert bulk_verify.main([str(tmp_path / name), "--batch-size", "2", "--output", str(tmp_path / "out")]) == 1
+        verdicts = [json.loads(line) for line in (tmp_path / "out").read_text(encoding="utf-8").splitlines()]
+        assert [verdict["valid"] for verdict in verdicts] == expected
+        assert [verdict["record"] for verdict in verdicts] == list(range(len(expected)))
+    assert "error" in verdicts[-1]
+
+    output = io.StringIO()
+    stats = bulk_verify.run(bulk_verify.iter_binary_records(io.BytesIO(binary), read_size=16), output, 2, workers=2)
+    assert (stats["records"], stats["valid"], stats["invalid"]) == (3, 2, 1)
+    assert stats["latency_p50_ms"] <= stats["latency_max_ms"]
+    with pytest.raises(ValueError):
+        list(bulk_verify.iter_binary_records(io.BytesIO(binary[:-1])))
+
+
+def test_bulk_verify_malformed_records(monkeypatch):  # pylint: disable=R0914
+    """
+    Test that malformed records and failing verifications only affect their own verdicts
+    """
+    public_key, signature = SchnorrSignature.sign(0x1234, 7)
+    good = bulk_verify.encode_record(7, signature, public_key)
+    ring_signature = NodeRingSchnorr().nr_sign(0x1234, 7, [multiply(G1, 3)])
+    binary = good * 3 + bulk_verify.encode_record(7, (None, 1), G1) + good * 2 + bulk_verify.encode_record(
+        8, signature, public_key) + b"".join(bulk_verify.encode_record(7, ring) for ring in (
+            ring_signature, (None, *ring_signature[1:]),
+            (ring_signature[0], [None, *ring_signature[1][1:]], *ring_signature[2:])))
+    line = json.loads(bulk_verify.json_record(7, signature, public_key))
+    ring_line = json.loads(bulk_verify.json_record(8, ring_signature))
+    lines = [json.dumps(line), json.dumps(dict(line, signature=[None, 1])), json.dumps(dict(line, public_key=None)),
+             json.dumps(dict(line, signature=[[1, 2, 3], 1])), json.dumps(line), json.dumps(ring_line),
+             json.dumps(dict(ring_line, signature=ring_line["signature"][:3] + ring_line["signature"][3:][::-1]))]
+
+    for entries, expected in ((bulk_verify.iter_binary_records(io.BytesIO(binary)),
+                               [1, 1, 1, None, 1, 1, 0, 1, None, None]),
+                              (bulk_verify.iter_json_records(io.StringIO("\n".join(lines))),
+                               [1, None, None, None, 1, 0, None])):
+        output = io.StringIO()
+        stats = bulk_verify.run(entries, output, batch_size=4)
+        verdicts = [json.loads(verdict) for verdict in output.getvalue().splitlines()]
+        assert [None if "error" in verdict else int(verdict["valid"]) for verdict in verdicts] == expected
+        assert stats["errors"] == expected.count(None) and stats["valid"] == expected.count(1)
+
+    # A batch whose verification raises is verified record by record
+    verify_batch = SchnorrSignature.verify_batch
+
+    def failing_verify_batch(items):
+        if any(message == 8 for _, message, _ in items):
+            raise RuntimeError("verification failed")
+        return verify_batch(items)
+
+    monkeypatch.setattr(bulk_verify.SchnorrSignature, "verify_batch", failing_verify_batch)
+    records = [bulk_verify.decode_record(record)
+               for record in (good, good, bulk_verify.encode_record(8, signature, public_key))]
+    assert bulk_verify.check_records(records) == [(True, None), (True, None),
+                                                  (False, "Verification failed: verification failed")]
+
+
+def test_benchmark_suite_compare():
+    """
+    Test a minimal benchmark run and its comparison with a baseline
+    """
+    results = suite.run([1, 2], ["jacobian"], repeat=1, min_time=0)
+    keys = [suite.case_key(case) for case in results["results"]]
+    assert "encode_packed" in keys and "nr_verify/jacobian/2" in keys
+    assert not any(slower for *_, slower in suite.compare(results, results))
+
+    slower = {"meta": results["meta"], "results": [dict(case, min=2 * case["min"]) for case in results["results"]]}
+    assert all(slower for *_, slower in suite.compare(slower, results))
+
+
+def test_instrumentation():
+    """
+    Test operation counters, phase timers and their export
+    """
+    scheme = NodeRingSchnorr()
+    ring = [multiply(G1, 3), multiply(G1, 5)]
+    assert instrumentation.active() is None
+
+    with instrumentation.collect() as metrics:
+        signature = scheme.nr_sign(0x1234, 0x5678, list(ring))
+        with instrumentation.collect() as verify_metrics:
+            assert scheme.nr_verify(0x5678, signature)
+
+    assert instrumentation.active() is None
+    assert verify_metrics.counters["curve.key_msm"] == 1
+    assert verify_metrics.counters["hash"] == 6
+    assert verify_metrics.counters["hash_bytes"] == 3 * (6 + 3) * 32
+    assert set(verify_metrics.phases) == {"nr_verify.prechecks", "nr_verify.terms", "nr_verify.equation"}
+
+    exported = metrics.as_dict()
+    assert exported["counters"]["curve.key_msm"] == 2
+    assert {f"nr_sign.step{i}" for i in range(1, 8)} == {name[:13] for name in exported["phases"]
+                                                         if name.startswith("nr_sign")}
+    assert exported["phases"]["nr_verify.terms"]["calls"] == 1
+    prometheus = metrics.to_prometheus()
+    assert 'nr_verify_operations_total{operation="curve.key_msm"} 2' in prometheus
+    assert 'nr_verify_phase_calls_total{phase="nr_sign.step3_partial_signatures"} 1' in prometheus
+
+    metrics.reset()
+    scheme.nr_verify(0x5678, signature)
+    assert not metrics.counters
+
+
+def test_key_table_cache():
+    """
+    Test LRU eviction, memory cap and statistics of the key table cache, and backends using it
+    """
+    keys = [curve.multiply(curve.G1, i + 2) for i in range(4)]
+    size = table_bytes(glv.GlvTable(keys[0]))
+    cache = KeyTableCache(max_bytes=2 * size + size // 2)
+    cache.table(keys[0])
+    cache.table(keys[1])
+    cache.table(keys[0])
+    cache.table(keys[2])
+    assert keys[0] in cache and keys[1] not in cache and keys[2] in cache
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (1, 3, 1, 2)
+    assert stats["hit_rate"] == 0.25 and stats["bytes"] <= stats["max_bytes"]
+    assert len(pickle.loads(pickle.dumps(cache))) == 0
+
+    cached = JacobianBackend(KeyTableCache())
+    scalars = [curve_order - 5, 7, 2 ** 200 + 1, 3]
+    expected = multi_scalar_multiply(keys + [curve.G1], scalars + [11])
+    for backend in (cached, JacobianBackend()):
+        assert backend.key_msm(keys, scalars, [curve.G1], [11]) == expected
+        assert backend.multiply_two(curve.G1, 11, keys[1], 7) == multi_scalar_multiply([curve.G1, keys[1]], [11, 7])
+    assert cached.key_cache.stats()["hits"] == 1
+
+
+def test_ring_registry(tmp_path):
+    """
+    Test signing and verifying against a registered ring referenced by identifier
+    """
+    private_key = 0x1234
+    keys = [multiply(G1, 3), multiply(G1, private_key), multiply(G1, 5)]
+    registry = RingRegistry()
+    ring = registry.register(keys)
+    assert registry.register(list(reversed(keys))) is ring and len(registry) == 1
+    assert ring.ring_id == keccak256(encode_packed(*[coordinate for key in ring.keys for coordinate in key]))
+    assert registry.get(ring.ring_id) is ring and ring.ring_id in registry
+    with pytest.raises(UnknownRingError):
+        registry.get(bytes(32))
+    with pytest.raises(ValueError):
+        Ring([multiply(G1, 3), multiply(G1, 3)])
+    with pytest.raises(ValueError):
+        ring.position(multiply(G1, 7))
+
+    scheme = NodeRingSchnorr()
+    signature = scheme.nr_sign_ring(private_key, 0x5678, ring)
+    assert signature[0] == ring.ring_id and len(signature[2]) == len(ring)
+    assert scheme.nr_verify_ring(0x5678, signature, registry)
+    assert not scheme.nr_verify_ring(0x5679, signature, registry)
+
+    encoded = encoding.encode_ring_reference_signature(signature, compressed=True)
+    decoded = encoding.decode_ring_reference_signature(encoded)
+    assert decoded[0] == ring.ring_id
+    assert scheme.nr_verify_ring(0x5678, decoded, registry)
+    assert len(encoded) < len(encoding.encode_ring_signature(scheme.nr_sign(private_key, 0x5678, keys[::2]), True))
+    with pytest.raises(UnknownRingError):
+        scheme.nr_verify_ring(0x5678, signature, RingRegistry())
+
+    # References are resolved once and batched with the other ring signatures
+    references = [(encoding.RING_REFERENCE_SIGNATURE, message, None, signature) for message in (0x5678, 0x5679)]
+    ring_record = (encoding.RING_SIGNATURE, 0x5678, None, scheme.nr_sign(private_key, 0x5678, keys[::2]))
+    assert bulk_verify.check_records([*references, ring_record], registry) == [(True, None), (False, None),
+                                                                               (True, None)]
+    assert bulk_verify.check_records(references, RingRegistry()) == [(False, f"Unknown ring {ring.ring_id.hex()}")] * 2
+    with pytest.raises(ValueError):
+        bulk_verify.check_records(references)
+
+    # Bulk verification reports references to unknown rings as errors
+    records = (bulk_verify.encode_record(0x5678, signature) + bulk_verify.encode_record(0x5679, signature)) * 2
+    (tmp_path / "signatures.bin").write_bytes(records)
+    write_key_store(tmp_path / "ring.keys", keys)
+    for rings, expected in (([], [None] * 4), (["--ring", str(tmp_path / "ring.keys")], [True, False] * 2)):
+        bulk_verify.main([str(tmp_path / "signatures.bin"), "--batch-size", "3", "--output", str(tmp_path / "out")]
+                         + rings)
+        verdicts = [json.loads(line) for line in (tmp_path / "out").read_text(encoding="utf-8").splitlines()]
+        assert [None if "error" in verdict else verdict["valid"] for verdict in verdicts] == expected
+        assert all(verdict.get("error", f"Unknown ring {ring.ring_id.hex()}") == f"Unknown ring {ring.ring_id.hex()}"
+                   for verdict in verdicts)
+
+
+def test_key_store(tmp_path):
+    """
+    Test signing and verifying with the ring keys in a memory-mapped key store
+    """
+    private_key = 0x1234
+    keys = [curve.multiply(curve.G1, i + 2) for i in range(40)]
+    keys[17] = curve.multiply(curve.G1, private_key)
+    path = tmp_path / "ring.keys"
+    assert write_key_store(path, keys) == 40
+    with pytest.raises(ValueError):
+        write_key_store(tmp_path / "invalid.keys", [(1, 1)])
+
+    store = KeyStore(path, chunk_size=16)
+    assert len(store) == 40 and list(store) == keys and store[-1] == keys[-1]
+    assert list(store[5:30].without(3)) == keys[5:8] + keys[9:30]
+    assert store.position(keys[17]) == 17 and store[10:].position(keys[17]) == 7
+    assert b"".join(store.without(17).coordinate_words()) == encode_packed(
+        *[key[0] for key in keys if key != keys[17]], *[key[1] for key in keys if key != keys[17]])
+    assert list(pickle.loads(pickle.dumps(store[20:]))) == keys[20:]
+    with pytest.raises(ValueError):
+        store.position(curve.multiply(curve.G1, 1))
+
+    scheme = NodeRingSchnorr()
+    signature = scheme.nr_sign(private_key, 0x5678, store)
+    assert signature[4] is store and len(signature[1]) == len(signature[2]) == 40
+    assert scheme.nr_verify(0x5678, signature)
+    assert not scheme.nr_verify(0x5679, signature)
+    assert scheme.nr_verify(0x5678, signature[:4] + ([curve.to_py_ecc(key) for key in keys],))
+    assert scheme.nr_verify_batch([(0x5678, signature), (0x5679, signature), (0x5678, signature)]) == [
+        True, False, True]
+    with NodeRingSchnorr(workers=2, min_chunk_size=8) as parallel:
+        assert parallel.nr_verify(0x5678, parallel.nr_sign(private_key, 0x5678, store))
+    store.close()
+
+
+def test_nonces():
+    """
+    Test the CSPRNG and RFC 6979 nonce sources and deterministic signing
+    """
+    # RFC 6979, A.2.5: ECDSA with P-256 and SHA-256
+    p256_order = 0xFFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551
+    p256_key = 0xC9AFA9D845BA75166B5C215767B1D6934E50C3DB36E89B127B8A622B120F6721
+    for message, nonce in ((b"sample", 0xA6E3C57DD01ABE90086538398355DD4C3B17AA873382B0F24D6129493D8AAD60),
+                           (b"test", 0xD16B6AE827F17175E040871A1C7EC3500192C4C92677336EC2537ACAEE0008E0)):
+        assert DeterministicNonces(p256_key, hashlib.sha256(message).digest(), p256_order).scalar() == nonce
+
+    for source in (RandomNonces(), DeterministicNonces(0x1234, b"digest")):
+        values = source.scalars(500, distinct=True)
+        assert len(set(values)) == 500 and all(0 < value < curve_order for value in values)
+        assert 0 <= source.below(3) < 3
+    assert len(set(RandomNonces(order=3).scalars(2, distinct=True))) == 2
+    assert DeterministicNonces(5, b"a").scalars(3) == DeterministicNonces(5, b"a").scalars(3)
+    assert DeterministicNonces(5, b"a").scalar() != DeterministicNonces(5, b"b").scalar()
+
+    ring = [multiply(G1, 3), multiply(G1, 5)]
+    scheme = NodeRingSchnorr(deterministic=True)
+    signature = scheme.nr_sign(0x1234, 0x5678, list(ring))
+    assert scheme.nr_sign(0x1234, 0x5678, list(ring)) == signature and scheme.nr_verify(0x5678, signature)
+    assert scheme.nr_sign(0x1234, 0x5679, list(ring))[3] != signature[3]
+    assert NodeRingSchnorr().nr_sign(0x1234, 0x5678, list(ring))[3] != NodeRingSchnorr().nr_sign(
+        0x1234, 0x5678, list(ring))[3]
+    assert SchnorrSignature(deterministic=True).sign(0x1234, 7) == SchnorrSignature(deterministic=True).sign(0x1234, 7)
+
+
+def test_signing_session():
+    """
+    Test that signing many messages with one session matches signing them one by one
+    """
+    points = [curve.multiply(curve.G1, i + 2) for i in range(9)] + [None]
+    scalars = [curve_order - 3 * i - 1 for i in range(10)]
+    table = FixedPointsTable(points)
+    assert table.multiply(scalars) == multi_scalar_multiply(points, scalars)
+    assert FixedPointsTable(points, window=3).multiply(scalars[::-1]) == multi_scalar_multiply(points, scalars[::-1])
+    assert FixedPointsTable([]).multiply([]) is None
+
+    private_key = 0x1234
+    ring = [multiply(G1, 3), multiply(G1, 5), multiply(G1, 7)]
+    messages = [0x5678, 0x5679, 0x567A]
+    for backend in BACKENDS:
+        scheme = NodeRingSchnorr(backend, deterministic=True)
+        signatures = scheme.nr_sign_many(private_key, messages, ring)
+        assert len(ring) == 3
+        assert signatures == [scheme.nr_sign(private_key, message, list(ring)) for message in messages]
+
+    scheme = NodeRingSchnorr()
+    session = scheme.signing_session(private_key, Ring(ring + [multiply(G1, private_key)]))
+    registry = RingRegistry()
+    registry.register(session.ring)
+    for message, signature in zip(messages, session.sign_many(messages)):
+        assert scheme.nr_verify_ring(message, signature, registry)
+        assert not scheme.nr_verify_ring(message + 1, signature, registry)
+
+
+def test_staged_verification():
+    """
+    Test that malformed signatures are rejected by the cheapest failing stage
+    """
+    scheme = NodeRingSchnorr()
+    signature = scheme.nr_sign(0x1234, 0x5678, [multiply(G1, 3), multiply(G1, 5)])
+    new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys = signature
+    off_curve = (1, 1)
+    cases = [
+        (signature[:4], prechecks.STRUCTURE),
+        ((new_public_key, ephemeral_randomness[:2], sigmas, master_sum, ext_public_keys), prechecks.STRUCTURE),
+        ((new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys[:2]), prechecks.STRUCTURE),
+        ((new_public_key, [], [], master_sum, []), prechecks.STRUCTURE),
+        ((new_public_key, ephemeral_randomness, sigmas, curve_order, ext_public_keys), prechecks.STRUCTURE),
+        ((None, ephemeral_randomness, sigmas, master_sum, ext_public_keys), prechecks.STRUCTURE),
+        ((new_public_key, ephemeral_randomness, sigmas[:2] + [(sigmas[2][0], -1)], master_sum, ext_public_keys),
+         prechecks.STRUCTURE),
+        ((new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys[:2] + ["key"]),
+         prechecks.STRUCTURE),
+        ((new_public_key, ephemeral_randomness, sigmas, master_sum, ext_public_keys[:2] + [off_curve]),
+         prechecks.CURVE),
+        ((off_curve, ephemeral_randomness, sigmas, master_sum, ext_public_keys), prechecks.CURVE),
+        ((new_public_key, ephemeral_randomness, sigmas, (master_sum + 1) % curve_order, ext_public_keys),
+         prechecks.EQUATION),
+    ]
+    with instrumentation.collect() as metrics:
+        for case, stage in cases:
+            verdict = scheme.nr_verify_staged(0x5678, case)
+            assert not verdict and verdict.stage == stage and verdict.reason
+            assert not scheme.nr_verify(0x5678, case)
+        assert scheme.nr_verify_staged(2 ** 256, signature).stage == prechecks.STRUCTURE
+        assert scheme.nr_verify_staged(0x5678, signature) == (True, None, "")
+        assert scheme.nr_verify_batch([(0x5678, case) for case, _ in cases] + [(0x5678, signature)]) == [
+            False] * len(cases) + [True]
+    # Every malformed case is rejected by nr_verify_staged, nr_verify and nr_verify_batch
+    assert metrics.counters["nr_verify.rejected.structure"] == 3 * 8 + 1
+    assert metrics.counters["nr_verify.rejected.curve"] == 3 * 2
+    assert metrics.counters["nr_verify.rejected.equation"] == 2
+
+
+def test_verification_cache():
+    """
+    Test that cached verification returns the uncached results and answers repeats from the cache
+    """
+    now = [0.0]
+    cache = VerificationCache(max_entries=8, ttl=10, clock=lambda: now[0])
+    schnorr = SchnorrSignature(verify_cache=cache)
+    items = [(pubkey, privkey, signature) for privkey in range(2000, 2004)
+             for pubkey, signature in [SchnorrSignature.sign(privkey, privkey)]]
+    items[1] = (items[1][0], 7, items[1][2])
+    expected = [True, False, True, True]
+    assert [schnorr.verify(*item) for item in items[:2]] == expected[:2]
+    assert schnorr.verify_batch(items) == expected
+    assert schnorr.verify_batch(items) == expected
+    # Inputs that cannot be encoded bypass the cache and are rejected as without it
+    assert not schnorr.verify(items[0][0], 2 ** 256, items[0][2])
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (6, 4, 4)
+
+    # Verdicts expire after the time to live and the least recently used ones are evicted
+    now[0] = 10
+    assert schnorr.verify(*items[0]) and cache.stats()["expirations"] == 1
+    ring = NodeRingSchnorr(verify_cache=cache)
+    signatures = [ring.nr_sign(0x1234 + i, 0x5678, [multiply(G1, 3), multiply(G1, 5)]) for i in range(5)]
+    tampered = signatures[0][:3] + ((signatures[0][3] + 1) % curve_order, signatures[0][4])
+    with instrumentation.collect() as metrics:
+        assert ring.nr_verify_batch([(0x5678, signature) for signature in signatures]) == [True] * 5
+        assert ring.nr_verify(0x5678, signatures[4]) and not ring.nr_verify(0x5678, tampered)
+        assert not ring.nr_verify(0x5678, tampered)
+    assert metrics.counters["verify_cache.hit"] == 2 and metrics.counters["verify_cache.miss"] == 6
+    assert len(cache) == 8 and cache.stats()["evictions"] == 2
+
+    registry = RingRegistry()
+    signature = ring.nr_sign_ring(
+        0x1234, 0x5678, registry.register([multiply(G1, 3), multiply(G1, 0x1234)]))
+    assert ring.nr_verify_ring(0x5678, signature, registry) and ring.nr_verify_ring(0x5678, signature, registry)
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()["hits"] == 0
+
+
+def test_verify_service():
+    """
+    Test that the verification service batches pipelined requests and answers them in order
+    """
+    public_key, schnorr_signature = SchnorrSignature.sign(0x1234, 0x5678)
+    ring_signature = NodeRingSchnorr().nr_sign(0x1234, 0x5678, [multiply(G1, 3)])
+
+    async def run():
+        async with verify_service.VerificationService(batch_size=8, max_delay=0.05, max_queue=4) as service:
+            async with await verify_service.VerificationClient.connect(*service.address) as client:
+                verdicts = await asyncio.gather(
+                    *[client.verify(0x5678, schnorr_signature, public_key) for _ in range(12)],
+                    client.verify(0x5679, schnorr_signature, public_key),
+                    client.verify(0x5678, ring_signature),
+                    client.verify_record(b"NRSG"),
+                    client.verify_record(bulk_verify.encode_record(0x5678, ring_signature)[:-1]))
+                return verdicts, await client.metrics()
+
+    verdicts, metrics = asyncio.run(run())
+    assert verdicts == [True] * 12 + [False, True] + [verify_service.MALFORMED] * 2
+    assert (metrics["requests"], metrics["valid"], metrics["invalid"], metrics["malformed"]) == (16, 13, 1, 2)
+    assert metrics["batched"] == 16 and metrics["batches"] < 16
+    assert metrics["queue_depth"] == 0 and metrics["latency_p50_ms"] <= metrics["latency_max_ms"]
+
+
+def test_verify_service_isolates_bad_records(monkeypatch):
+    """
+    Test that malformed records and failing verifications do not affect the rest of their batch
+    """
+    public_key, signature = SchnorrSignature.sign(0x1234, 0x5678)
+    ring_signature = NodeRingSchnorr().nr_sign(0x1234, 0x5678, [multiply(G1, 3)])
+    verify_batch = SchnorrSignature.verify_batch
+
+    def failing_verify_batch(items):
+        if any(message == 0x9999 for _, message, _ in items):
+            raise RuntimeError("verification failed")
+        return verify_batch(items)
+
+    monkeypatch.setattr(SchnorrSignature, "verify_batch", failing_verify_batch)
+    records = [bulk_verify.encode_record(0x5678, signature, public_key)] * 5 + [
+        bulk_verify.encode_record(0x5678, (None, signature[1]), public_key),
+        bulk_verify.encode_record(0x5678, (None, *ring_signature[1:])),
+        bulk_verify.encode_record(0x9999, signature, public_key),
+        bulk_verify.encode_record(0x5678, ring_signature)]
+
+    async def run():
+        async with verify_service.VerificationService(batch_size=16, max_delay=0.05) as service:
+            async with await verify_service.VerificationClient.connect(*service.address) as client:
+                statuses = await asyncio.gather(*[client.verify_record(record) for record in records])
+                return statuses, await client.metrics()
+
+    statuses, metrics = asyncio.run(run())
+    assert statuses == [verify_service.VALID] * 5 + [verify_service.MALFORMED] * 2 + [
+        verify_service.ERROR, verify_service.VALID]
+    assert (metrics["valid"], metrics["malformed"], metrics["errors"]) == (6, 2, 1)
+
+
+def test_verify_service_ring_references():
+    """
+    Test that the verification service verifies ring references against its registry
+    """
+    registry = RingRegistry()
+    scheme = NodeRingSchnorr()
+    signature = scheme.nr_sign_ring(0x1234, 0x5678, registry.register([multiply(G1, 3), multiply(G1, 0x1234)]))
+    unknown = scheme.nr_sign_ring(0x1234, 0x5678, Ring([multiply(G1, 5), multiply(G1, 0x1234)]))
+    records = [bulk_verify.encode_record(0x5678, signature), bulk_verify.encode_record(0x5679, signature),
+               bulk_verify.encode_record(0x5678, unknown)]
+
+    async def run(rings):
+        async with verify_service.VerificationService(batch_size=8, max_delay=0.05, registry=rings) as service:
+            async with await verify_service.VerificationClient.connect(*service.address) as client:
+                return await asyncio.gather(*[client.verify_record(record) for record in records])
+
+    assert asyncio.run(run(registry)) == [verify_service.VALID, verify_service.INVALID, verify_service.ERROR]
+    assert asyncio.run(run(None)) == [verify_service.MALFORMED] * 3
+
+
+def test_contract_verifier():  # pylint: disable=R0914
+    """
+    Test that the async contract client batches calls and returns the verdicts in order
+    """
+    pytest.importorskip("eth_tester")
+    from web3 import AsyncWeb3  # pylint: disable=C0415
+    from web3.providers.eth_tester import AsyncEthereumTesterProvider  # pylint: disable=C0415
+    from nr_verify.deployment.async_client import ContractVerifier  # pylint: disable=C0415
+
+    class BatchingProvider(AsyncEthereumTesterProvider):  # pylint: disable=W0223
+        """
+        eth-tester provider answering JSON-RPC batches like a node, reverts included
+        """
+        async def make_batch_request(self, requests):
+            responses = []
+            for method, params in requests:
+                try:
+                    responses.append(await self.make_request(method, params))
+                except Exception as exc:  # pylint: disable=W0718
+                    responses.append({"jsonrpc": "2.0", "error": {"code": 3, "message": str(exc)}})
+            return responses
+
+    # Stand-in contracts: the Schnorr one accepts odd messages, the ring one reverts on even messages
+    schnorr_runtime = bytes.fromhex("60443560011660005260206000f3")
+    ring_runtime = bytes.fromhex("60043560011680600e57600080fd5b60005260206000f3")
+    public_key, signature = SchnorrSignature.sign(0x1234, 0x5678)
+    ring_signature = NodeRingSchnorr().nr_sign(0x1234, 0x5678, [multiply(G1, 3)])
+
+    async def run(provider):
+        w3 = AsyncWeb3(provider)
+        sender = (await w3.eth.accounts)[0]
+        addresses = []
+        for runtime in (schnorr_runtime, ring_runtime):
+            init_code = bytes.fromhex(f"60{len(runtime):02x}80600b6000396000f3") + runtime
+            transaction = await w3.eth.send_transaction({"from": sender, "data": init_code})
+            addresses.append((await w3.eth.wait_for_transaction_receipt(transaction)).contractAddress)
+        verifier = ContractVerifier(w3, *addresses, batch_size=3, concurrency=2, sender=sender)
+        with instrumentation.collect() as metrics:
+            verdicts = await verifier.verify_many([(public_key, message, signature) for message in range(8)])
+            ring_verdicts = await verifier.nr_verify_many([(message, ring_signature) for message in range(4)])
+            single = await verifier.verify(public_key, 1, signature), await verifier.nr_verify(2, ring_signature)
+        return verdicts, ring_verdicts, single, metrics.counters, verifier.batching
+
+    for provider, requests in ((BatchingProvider(), 3 + 2 + 2), (AsyncEthereumTesterProvider(), 8 + 4 + 2)):
+        verdicts, ring_verdicts, single, counters, batching = asyncio.run(run(provider))
+        assert batching == isinstance(provider, BatchingProvider)
+        assert verdicts == [message % 2 == 1 for message in range(8)]
+        assert ring_verdicts == [False, True, False, True] and single == (True, False)
+        assert counters["rpc.calls"] == 14 and counters["rpc.requests"] == requests
+
+
+def test_gas_benchmark():
+    """
+    Test the gas benchmark harness on an in-process chain, with stand-in verifiers accepting every call
+    """
+    pytest.importorskip("eth_tester")
+    from benchmarks import gas  # pylint: disable=C0415
+
+    assert gas.calldata_gas(bytes([0, 1, 0, 255])) == 4 + 16 + 4 + 16
+    runtime = bytes.fromhex("600160005260206000f3")
+    bytecode = (bytes.fromhex(f"60{len(runtime):02x}80600b6000396000f3") + runtime).hex()
+    artifacts = {name: {"bytecode": bytecode, "abi": []} for name in ("SchnorrSignature", "SchnorrSignatureNodeRing")}
+    results = gas.run(artifacts, [1, 3], repeat=1)["results"]
+    assert [(result["name"], result["ring_size"]) for result in results] == [
+        ("verify", None), ("nr_verify", 1), ("nr_verify", 3)]
+    assert all(result["valid"] and result["execution_gas"] > 0 for result in results)
+    assert results[0]["calldata_bytes"] == 4 + 6 * 32
+    assert results[1]["calldata_bytes"] < results[2]["calldata_bytes"]
+
+
+def test_contract_build_and_deployment(tmp_path, monkeypatch):  # pylint: disable=R0914
+    """
+    Test that unchanged sources reuse the build artifact and that contracts deploy with consecutive nonces
+    """
+    pytest.importorskip("eth_tester")
+    from web3 import AsyncWeb3  # pylint: disable=C0415
+    from web3.providers.eth_tester import AsyncEthereumTesterProvider  # pylint: disable=C0415
+    from nr_verify.deployment import compiler  # pylint: disable=C0415
+    from nr_verify.deployment.deployment import deploy_contracts  # pylint: disable=C0415
+
+    runtime = bytes.fromhex("600160005260206000f3")
+    bytecode = (bytes.fromhex(f"60{len(runtime):02x}80600b6000396000f3") + runtime).hex()
+    compilations = []
+
+    def compile_standard(compiler_input, solc_version):
+        compilations.append(solc_version)
+        return {"contracts": {name: {name.split(".")[0]: {"evm": {"bytecode": {"object": bytecode}}, "abi": []}}
+                              for name in compiler_input["sources"]}}
+
+    monkeypatch.setattr(compiler, "install_solc", lambda version: None)
+    monkeypatch.setattr(compiler, "compile_standard", compile_standard)
+    paths = [tmp_path / "A.sol", tmp_path / "B.sol"]
+    for path in paths:
+        path.write_text("contract X {}", encoding="utf-8")
+    artifact = str(tmp_path / "contracts.json")
+    contracts = compiler.compile_contracts(paths, "0.8.18", artifact)
+    assert compiler.compile_contracts(paths, "0.8.18", artifact) == contracts and len(compilations) == 1
+    assert set(contracts) == {"A", "B"} and compiler.load_artifact(artifact)["contracts"] == contracts
+    paths[1].write_text("contract Y {}", encoding="utf-8")
+    compiler.compile_contracts(paths, "0.8.18", artifact)
+    compiler.compile_contracts(paths, "0.8.19", artifact)
+    assert compilations == ["0.8.18", "0.8.18", "0.8.19"]
+
+    async def deploy():
+        provider = AsyncEthereumTesterProvider()
+        w3 = AsyncWeb3(provider)
+        private_key = provider.ethereum_tester.backend.account_keys[0]
+        addresses = await deploy_contracts(w3, dict(contracts, C=contracts["A"]), private_key.to_hex())
+        codes = [await w3.eth.get_code(address) for address in addresses.values()]
+        return addresses, codes, await w3.eth.get_transaction_count(private_key.public_key.to_checksum_address())
+
+    addresses, codes, nonce = asyncio.run(deploy())
+    assert list(addresses) == ["A", "B", "C"] and len(set(addresses.values())) == 3
+    assert codes == [runtime] * 3 and nonce == 3
+
+
+def test_lazy_imports(tmp_path, capsys):
+    """
+    Test that a verify-only run does not import the deployment dependencies, and the console entry point
+    """
+    for module in ("nr_verify.bulk_verify", "nr_verify.schemas", "nr_verify.deployment"):
+        result = importtime.run(module, budget_ms=float("inf"), repeat=1)
+        assert result["forbidden"] == [] and result["within_budget"], result
+    assert importtime.parse_importtime("import time: self [us] | cumulative | imported package\n"
+                                       "import time:        12 |         34 | nr_verify") == {"nr_verify": (12, 34)}
+
+    public_key, signature = SchnorrSignature.sign(0x1234, 7)
+    path = tmp_path / "signatures.bin"
+    path.write_bytes(bulk_verify.encode_record(7, signature, public_key))
+    assert cli.main(["verify", str(path), "--output", str(tmp_path / "verdicts.jsonl")]) == 0
+    assert json.loads((tmp_path / "verdicts.jsonl").read_text(encoding="utf-8"))["valid"] is True
+    assert cli.main(["--help"]) == 0 and "verify" in capsys.readouterr().out
+    assert cli.main(["unknown"]) == 2 and cli.main([]) == 2